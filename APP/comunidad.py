@@ -1,50 +1,113 @@
-import pickle
-import igraph as ig
-from graphObj import Graph
-
-# =============================
-# Paso 1: Cargar tu grafo .pkl
-# =============================
-with open("data/grafo_guardado.pkl", "rb") as f:
-    grafo = pickle.load(f)
-
-# =============================
-# Paso 2: Convertir a igraph
-# =============================
-edges = []
-for u, vecinos in grafo.adj.items():
-    for v in vecinos:
-        edges.append((u, v))
-
-# Total de nodos (usa los con ubicaciones)
-n_total = max(grafo.locations.keys()) + 1  # Suponiendo IDs consecutivos
-
-g = ig.Graph(n=n_total, edges=edges, directed=True)
-
-# =============================
-# Paso 3: Detectar comunidades
-# =============================
-# Convertimos el grafo a no-dirigido para Louvain
-g_undirected = g.as_undirected()
-
-print("🔍 Detectando comunidades (Louvain)...")
-louvain = g_undirected.community_multilevel()
-print(f"✅ Se detectaron {len(louvain)} comunidades.")
-
-# =============================
-# Paso 4: Asignar comunidad a cada nodo
-# =============================
-comunidades = {}
-for comunidad_id, members in enumerate(louvain):
-    for node_id in members:
-        comunidades[node_id] = comunidad_id
-
-# Guardamos dentro del grafo
-grafo.comunidades = comunidades
-
-# =============================
-# Paso 5: Guardar el grafo actualizado
-# =============================
-with open("data/grafo_con_comunidades.pkl", "wb") as f:
-    pickle.dump(grafo, f)
-    print("💾 Grafo con comunidades guardado como 'grafo_con_comunidades.pkl'")
+import resource
+import sys
+import time
+
+import igraph as ig
+import numpy as np
+from graphObj import CSRGraph
+from comunidades_io import guardar_comunidades
+
+# =============================
+# Parámetros
+# =============================
+RUTA_GRAFO = "data/grafo"
+
+# Nombre de la corrida en data/comunidades.parquet
+CORRIDA = "louvain"
+
+
+def pico_rss_mb():
+    """Pico de memoria residente del proceso (ru_maxrss está en KB en Linux)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+# =============================
+# Extremos de las aristas como arreglos NumPy contiguos
+# =============================
+def aristas_desde_grafo(ruta=RUTA_GRAFO):
+    """Origen y destino leídos de los arreglos CSR (indices no se copia)."""
+    grafo = CSRGraph.load(ruta)
+    return grafo.edge_sources(), grafo.indices, grafo.num_ids
+
+
+def colapsar_no_dirigido(origenes, destinos, n_total):
+    """Una sola arista por par {u, v}, igual que as_undirected(mode="collapse").
+
+    Cada arista se codifica como min(u, v) * n + max(u, v) en un int64; ordenar y quitar
+    duplicados sobre esa clave reemplaza la copia que hacía as_undirected().
+    """
+    claves = np.minimum(origenes, destinos).astype(np.int64)
+    claves *= n_total
+    claves += np.maximum(origenes, destinos)
+    claves.sort()
+
+    nuevas = np.empty(len(claves), dtype=bool)
+    nuevas[:1] = True
+    np.not_equal(claves[1:], claves[:-1], out=nuevas[1:])
+    claves = claves[nuevas]
+
+    extremos = np.empty((len(claves), 2), dtype=np.int64)
+    np.floor_divide(claves, n_total, out=extremos[:, 0])
+    np.remainder(claves, n_total, out=extremos[:, 1])
+    return extremos
+
+
+def construir_igraph(origenes, destinos, n_total):
+    """Grafo no dirigido de igraph a partir de los arreglos."""
+    # add_edges sobre un grafo vacío en lugar de Graph(edges=...): con un ndarray el
+    # constructor deja un transitorio de ~140 B por arista, add_edges menos de la mitad
+    g = ig.Graph(n=n_total, directed=False)
+    g.add_edges(colapsar_no_dirigido(origenes, destinos, n_total))
+    return g
+
+
+def construir_igraph_tuplas(ruta=RUTA_GRAFO):
+    """Construcción anterior (lista de tuplas + as_undirected), solo para comparar memoria."""
+    grafo = CSRGraph.load(ruta)
+    edges = []
+    for u, vecinos in grafo.adj.items():
+        for v in vecinos:
+            edges.append((u, v))
+    g = ig.Graph(n=grafo.num_ids, edges=edges, directed=True)
+    return g.as_undirected()
+
+
+if __name__ == "__main__":
+    # `python comunidad.py --tuplas` usa la construcción anterior para comparar el pico de RSS
+    modo_tuplas = "--tuplas" in sys.argv
+    print(f"📏 Pico de RSS inicial: {pico_rss_mb():,.1f} MB")
+
+    # =============================
+    # Paso 1 y 2: Cargar las aristas y construir el grafo de igraph
+    # =============================
+    inicio = time.time()
+    if modo_tuplas:
+        print("🐢 Construyendo igraph con la lista de tuplas (modo de comparación)...")
+        g = construir_igraph_tuplas()
+    else:
+        print(f"📥 Cargando aristas desde '{RUTA_GRAFO}'...")
+        origenes, destinos, n_total = aristas_desde_grafo()
+        g = construir_igraph(origenes, destinos, n_total)
+        del origenes, destinos
+    print(f"✅ igraph: {g.vcount():,} nodos, {g.ecount():,} aristas no dirigidas "
+          f"en {time.time() - inicio:.2f} s")
+    print(f"📏 Pico de RSS tras construir el grafo: {pico_rss_mb():,.1f} MB")
+
+    # =============================
+    # Paso 3: Detectar comunidades
+    # =============================
+    print("🔍 Detectando comunidades (Louvain)...")
+    louvain = g.community_multilevel()
+    print(f"✅ Se detectaron {len(louvain)} comunidades.")
+    print(f"📏 Pico de RSS tras la detección: {pico_rss_mb():,.1f} MB")
+
+    # =============================
+    # Paso 4: Comunidad de cada nodo (membership ya está indexado por node_id)
+    # =============================
+    etiquetas = np.asarray(louvain.membership, dtype=np.int32)
+
+    # =============================
+    # Paso 5: Guardar las comunidades como columna aparte
+    # =============================
+    guardar_comunidades(etiquetas, CORRIDA)
+    print(f"💾 Comunidades guardadas como corrida '{CORRIDA}' en 'data/comunidades.parquet'")
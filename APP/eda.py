@@ -1,176 +1,219 @@
-# Importación de bibliotecas necesarias
-import polars as pl
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-import networkx as nx
-import os
-import sys
-import logging
-from scipy.stats import zscore
-from logger_config import setup_logger
-
-# --------------------------
-# Configurar logging
-# --------------------------
-# Configuración básica del sistema de logging para mostrar mensajes informativos
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    datefmt="%H:%M:%S"
-)
-
-# Inicialización del logger personalizado
-log = setup_logger()
-
-# --------------------------
-# Función principal
-# --------------------------
-def main():
-    try:
-        # Crear carpeta para los gráficos si no existe
-        os.makedirs("graficos", exist_ok=True)
-
-        # --------------------------
-        # 1. Cargar datos procesados
-        # --------------------------
-        log.info(" Cargando archivos Parquet procesados...")
-
-        # Cargar datos de ubicaciones limpias
-        ubicaciones = pl.read_parquet("ubicaciones_limpias.parquet")
-
-        # Cargar datos de conexiones entre usuarios
-        conexiones = pl.read_parquet("usuarios_conexiones.parquet")
-
-        # Registrar el tamaño de los datasets cargados
-        log.info(f" Ubicaciones cargadas: {ubicaciones.shape}")
-        log.info(f" Conexiones cargadas: {conexiones.shape}")
-
-        # --------------------------
-        # 2. Verificar valores nulos
-        # --------------------------
-        log.info(" Verificando valores nulos...")
-
-        # Mostrar conteo de valores nulos en ambos datasets
-        log.info(f"Nulos en ubicaciones:\n{ubicaciones.null_count()}")
-        log.info(f"Nulos en conexiones:\n{conexiones.null_count()}")
-
-        # --------------------------
-        # 3. Estadísticas Descriptivas
-        # --------------------------
-        log.info(" Generando estadísticas descriptivas...")
-
-        # Generar y mostrar resumen estadístico de ubicaciones
-        stats = ubicaciones.describe()
-        log.info(f"Resumen estadístico:\n{stats}")
-
-        # --------------------------
-        # 4. Outliers Geográficos (Z-score)
-        # --------------------------
-        log.info(" Detectando outliers geográficos con Z-score...")
-
-        # Convertir a pandas para usar zscore
-        df_geo = ubicaciones.to_pandas()
-
-        # Calcular z-score para latitud y longitud
-        df_geo["z_lat"] = zscore(df_geo["latitude"])
-        df_geo["z_lon"] = zscore(df_geo["longitude"])
-
-        # Filtrar los outliers (valores con z-score > 3 o < -3)
-        df_outliers = df_geo[(df_geo["z_lat"].abs() > 3) | (df_geo["z_lon"].abs() > 3)]
-
-        # Registrar la cantidad de outliers detectados
-        log.info(f" Outliers detectados: {df_outliers.shape[0]}")
-        
-        # --------------------------
-        # 5. Gráfico de Outliers Geográficos
-        # --------------------------
-        log.info(" Generando gráfico de outliers geográficos...")
-
-        # Crear figura del scatter plot
-        plt.figure(figsize=(10, 6))
-
-        # Graficar puntos normales
-        sns.scatterplot(
-            data=df_geo, x="longitude", y="latitude", s=1, alpha=0.3, label="Normal"
-        )
-
-        # Graficar puntos outliers
-        sns.scatterplot(
-            data=df_outliers, x="longitude", y="latitude", color="red", s=10, label="Outliers"
-        )
-
-        # Añadir título y etiquetas
-        plt.title("Distribución Geográfica con Outliers Destacados")
-        plt.xlabel("Longitud")
-        plt.ylabel("Latitud")
-        plt.legend()
-
-        # Guardar gráfico en archivo
-        plt.savefig("graficos/distribucion_outliers.png", dpi=300)
-        plt.close()
-
-        # Registrar guardado exitoso
-        log.info(" Guardado: graficos/distribucion_outliers.png")
-
-        # --------------------------
-        # 6. Mapa geográfico general
-        # --------------------------
-        log.info(" Generando gráfico de distribución general...")
-
-        # Crear figura para el mapa de distribución general
-        plt.figure(figsize=(10, 6))
-
-        # Graficar todos los puntos de ubicación
-        sns.scatterplot(
-            x=ubicaciones["longitude"],
-            y=ubicaciones["latitude"],
-            s=1, alpha=0.4
-        )
-
-        # Añadir título y etiquetas
-        plt.title("Distribución Geográfica de Usuarios")
-        plt.xlabel("Longitud")
-        plt.ylabel("Latitud")
-
-        # Guardar gráfico
-        plt.savefig("graficos/distribucion_geografica.png", dpi=300)
-        plt.close()
-
-        # Registrar guardado exitoso
-        log.info(" Guardado: graficos/distribucion_geografica.png")
-
-        # --------------------------
-        # 7. Tabla de distribución geográfica resumida
-        # --------------------------
-        log.info(" Generando resumen de distribución geográfica...")
-
-        # Crear bins de latitud y longitud agrupando por rangos de 10
-        geo_bins = (
-            ubicaciones
-            .with_columns([
-                (pl.col("latitude") // 10).alias("lat_bin"),
-                (pl.col("longitude") // 10).alias("lon_bin")
-            ])
-            .group_by(["lat_bin", "lon_bin"])  # Agrupar por estos bins
-            .agg(pl.len().alias("conteo"))     # Contar registros por grupo
-            .sort("conteo", descending=True)   # Ordenar de mayor a menor
-        )
-
-        # Mostrar las 10 regiones con mayor concentración
-        log.info(" Top 10 regiones más densas:\n%s", geo_bins.head(10))
-
-        # Mensaje de finalización exitosa del análisis
-        log.info(" Análisis completado con éxito.")
-
-    except Exception as e:
-        # Captura y registro de cualquier error que ocurra durante la ejecución
-        log.exception(" Error crítico durante el análisis EDA.")
-        sys.exit(1)
-
-# --------------------------
-# Entry point
-# --------------------------
-# Ejecutar la función principal si el archivo es el principal
-if __name__ == "__main__":
-    main()
+# Importación de bibliotecas necesarias
+import polars as pl
+import networkx as nx
+import os
+import sys
+import logging
+from logger_config import setup_logger
+from raster_densidad import histograma_2d, dibujar_densidad
+
+# --------------------------
+# Parámetros
+# --------------------------
+RUTA_UBICACIONES = "data/ubicaciones_limpias.parquet"
+RUTA_CONEXIONES = "data/usuarios_conexiones.parquet"
+RUTA_OUTLIERS = "data/outliers_geograficos.parquet"
+UMBRAL_Z = 3                 # |z| mayor a este valor se considera outlier
+RESOLUCION_CUANTILES = 0.01  # Ancho (en grados) de los bins usados para aproximar los percentiles
+CELDAS_RASTER = (1440, 720)  # Resolución (ancho, alto) de los mapas de densidad: celdas de 0.25°
+
+# --------------------------
+# Configurar logging
+# --------------------------
+# Configuración básica del sistema de logging para mostrar mensajes informativos
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s",
+    datefmt="%H:%M:%S"
+)
+
+# Inicialización del logger personalizado
+log = setup_logger()
+
+# --------------------------
+# Estadísticas en streaming
+# --------------------------
+# Todas las consultas son LazyFrame que se ejecutan con collect(engine="streaming"): los
+# datos se leen por lotes y la memoria no crece con la cantidad de usuarios.
+def cuantiles_aproximados(lf, columna, cuantiles, resolucion=RESOLUCION_CUANTILES):
+    """Percentiles de `columna` a partir de un histograma de ancho `resolucion`.
+
+    Un percentil exacto necesita ordenar la columna completa en memoria; agrupando por bins
+    el group_by se hace en streaming y el error queda acotado por `resolucion`.
+    """
+    histograma = (
+        lf.select((pl.col(columna) / resolucion).floor().alias("bin"))
+        .drop_nulls()
+        .group_by("bin")
+        .agg(pl.len().alias("conteo"))
+        .sort("bin")
+        .collect(engine="streaming")
+    )
+    acumulado = histograma["conteo"].cum_sum()
+    total = acumulado[-1] if len(acumulado) else 0
+    valores = []
+    for q in cuantiles:
+        if total == 0:
+            valores.append(None)
+            continue
+        posicion = acumulado.search_sorted(q * total, side="left")
+        posicion = min(posicion, len(histograma) - 1)
+        # Centro del bin que contiene el percentil
+        valores.append((histograma["bin"][posicion] + 0.5) * resolucion)
+    return valores
+
+
+def describir(lf):
+    """Equivalente a DataFrame.describe() para las columnas numéricas, en streaming."""
+    esquema = lf.collect_schema()
+    columnas = [c for c, tipo in esquema.items() if tipo.is_numeric()]
+    agregados = lf.select(
+        *[pl.col(c).count().alias(f"{c}|count") for c in columnas],
+        *[pl.col(c).null_count().alias(f"{c}|null_count") for c in columnas],
+        *[pl.col(c).mean().alias(f"{c}|mean") for c in columnas],
+        *[pl.col(c).std(ddof=0).alias(f"{c}|std") for c in columnas],
+        *[pl.col(c).min().alias(f"{c}|min") for c in columnas],
+        *[pl.col(c).max().alias(f"{c}|max") for c in columnas],
+    ).collect(engine="streaming").row(0, named=True)
+
+    estadisticos = ["count", "null_count", "mean", "std", "min", "25%", "50%", "75%", "max"]
+    tabla = {"statistic": estadisticos}
+    for c in columnas:
+        q25, q50, q75 = cuantiles_aproximados(lf, c, [0.25, 0.5, 0.75])
+        valores = {e: agregados.get(f"{c}|{e}") for e in estadisticos}
+        valores.update({"25%": q25, "50%": q50, "75%": q75})
+        tabla[c] = [None if valores[e] is None else float(valores[e]) for e in estadisticos]
+    return pl.DataFrame(tabla)
+
+
+# --------------------------
+# Función principal
+# --------------------------
+def main():
+    try:
+        # Crear carpeta para los gráficos si no existe
+        os.makedirs("graficos", exist_ok=True)
+
+        # --------------------------
+        # 1. Cargar datos procesados
+        # --------------------------
+        log.info(" Abriendo archivos Parquet procesados (lectura diferida)...")
+
+        # Ubicaciones limpias y conexiones entre usuarios como LazyFrame: no se lee nada todavía
+        ubicaciones = pl.scan_parquet(RUTA_UBICACIONES)
+        conexiones = pl.scan_parquet(RUTA_CONEXIONES)
+
+        # Registrar el tamaño de los datasets (solo se cuentan filas)
+        filas_ubicaciones = ubicaciones.select(pl.len()).collect(engine="streaming").item()
+        filas_conexiones = conexiones.select(pl.len()).collect(engine="streaming").item()
+        log.info(f" Ubicaciones cargadas: {(filas_ubicaciones, len(ubicaciones.collect_schema()))}")
+        log.info(f" Conexiones cargadas: {(filas_conexiones, len(conexiones.collect_schema()))}")
+
+        # --------------------------
+        # 2. Verificar valores nulos
+        # --------------------------
+        log.info(" Verificando valores nulos...")
+
+        # Mostrar conteo de valores nulos en ambos datasets
+        log.info(f"Nulos en ubicaciones:\n{ubicaciones.null_count().collect(engine='streaming')}")
+        log.info(f"Nulos en conexiones:\n{conexiones.null_count().collect(engine='streaming')}")
+
+        # --------------------------
+        # 3. Estadísticas Descriptivas
+        # --------------------------
+        log.info(" Generando estadísticas descriptivas...")
+
+        # Resumen estadístico de ubicaciones (percentiles aproximados por histograma)
+        stats = describir(ubicaciones.select("latitude", "longitude"))
+        log.info(f"Resumen estadístico (percentiles ±{RESOLUCION_CUANTILES / 2}°):\n{stats}")
+
+        # --------------------------
+        # 4. Outliers Geográficos (Z-score)
+        # --------------------------
+        log.info(" Detectando outliers geográficos con Z-score...")
+
+        # Media y desviación (ddof=0, igual que scipy.stats.zscore) salen del resumen anterior
+        media = dict(zip(stats.columns[1:], stats.row(2)[1:]))
+        desviacion = dict(zip(stats.columns[1:], stats.row(3)[1:]))
+
+        # Calcular z-score para latitud y longitud como expresiones (sin columnas en memoria)
+        z_lat = ((pl.col("latitude") - media["latitude"]) / desviacion["latitude"]).alias("z_lat")
+        z_lon = ((pl.col("longitude") - media["longitude"]) / desviacion["longitude"]).alias("z_lon")
+
+        # Filtrar los outliers (valores con z-score > 3 o < -3) y escribirlos en streaming
+        (
+            ubicaciones
+            .with_columns(z_lat, z_lon)  # node_id ya viene de la ingesta
+            .filter((pl.col("z_lat").abs() > UMBRAL_Z) | (pl.col("z_lon").abs() > UMBRAL_Z))
+            .sink_parquet(RUTA_OUTLIERS)
+        )
+        df_outliers = pl.read_parquet(RUTA_OUTLIERS, columns=["latitude", "longitude"])
+
+        # Registrar la cantidad de outliers detectados
+        log.info(f" Outliers detectados: {df_outliers.height} (guardados en {RUTA_OUTLIERS})")
+
+        # --------------------------
+        # 5. Gráfico de Outliers Geográficos
+        # --------------------------
+        log.info(" Generando gráfico de outliers geográficos...")
+
+        # Conteo de usuarios por celda lat/lon (streaming): se usa en los dos mapas
+        grilla = histograma_2d(ubicaciones, celdas=CELDAS_RASTER)
+
+        # Densidad de todos los puntos con los outliers encima como capa dispersa
+        dibujar_densidad(
+            grilla,
+            "graficos/distribucion_outliers.png",
+            "Distribución Geográfica con Outliers Destacados",
+            capa=(df_outliers["longitude"], df_outliers["latitude"]),
+        )
+
+        # Registrar guardado exitoso
+        log.info(" Guardado: graficos/distribucion_outliers.png")
+
+        # --------------------------
+        # 6. Mapa geográfico general
+        # --------------------------
+        log.info(" Generando gráfico de distribución general...")
+
+        # Misma grilla, sin la capa de outliers
+        dibujar_densidad(grilla, "graficos/distribucion_geografica.png", "Distribución Geográfica de Usuarios")
+
+        # Registrar guardado exitoso
+        log.info(" Guardado: graficos/distribucion_geografica.png")
+
+        # --------------------------
+        # 7. Tabla de distribución geográfica resumida
+        # --------------------------
+        log.info(" Generando resumen de distribución geográfica...")
+
+        # Crear bins de latitud y longitud agrupando por rangos de 10
+        geo_bins = (
+            ubicaciones
+            .with_columns([
+                (pl.col("latitude") // 10).alias("lat_bin"),
+                (pl.col("longitude") // 10).alias("lon_bin")
+            ])
+            .group_by(["lat_bin", "lon_bin"])  # Agrupar por estos bins
+            .agg(pl.len().alias("conteo"))     # Contar registros por grupo
+            .sort("conteo", descending=True)   # Ordenar de mayor a menor
+            .collect(engine="streaming")
+        )
+
+        # Mostrar las 10 regiones con mayor concentración
+        log.info(" Top 10 regiones más densas:\n%s", geo_bins.head(10))
+
+        # Mensaje de finalización exitosa del análisis
+        log.info(" Análisis completado con éxito.")
+
+    except Exception as e:
+        # Captura y registro de cualquier error que ocurra durante la ejecución
+        log.exception(" Error crítico durante el análisis EDA.")
+        sys.exit(1)
+
+# --------------------------
+# Entry point
+# --------------------------
+# Ejecutar la función principal si el archivo es el principal
+if __name__ == "__main__":
+    main()
@@ -1,80 +1,77 @@
-# paso_3_grafo_parquet.py
-
-import polars as pl
-import pickle
-from graphObj import Graph
-
-def construir_grafo_desde_parquet(parquet_usuarios, parquet_ubicaciones):
-    grafo = Graph()
-
-    print("📥 Leyendo conexiones desde .parquet...")
-    df_usuarios = pl.read_parquet(parquet_usuarios)
-
-    for idx, row in enumerate(df_usuarios.iter_rows(named=True)):
-        vecinos = row["connections"]
-        if vecinos is None:
-            continue
-
-        try:
-            # Si es string, convertirlo en lista
-            if isinstance(vecinos, str):
-                vecinos = vecinos.split(",")
-            for v in vecinos:
-                if v.strip().isdigit():
-                    grafo.add_edge(idx, int(v))
-        except Exception as e:
-            print(f"❌ Error en fila {idx}: {e}")
-
-        if idx % 100_000 == 0 and idx > 0:
-            print(f"  → {idx:,} usuarios procesados")
-
-    print("📍 Leyendo ubicaciones desde .parquet...")
-    df_ubicaciones = pl.read_parquet(parquet_ubicaciones)
-
-    for idx, (lat, lon) in enumerate(zip(df_ubicaciones["latitude"], df_ubicaciones["longitude"])):
-        grafo.set_location(idx, float(lat), float(lon))
-
-    return grafo
-
-
-# =============================
-# 📌 EJECUCIÓN PRINCIPAL
-# =============================
-if __name__ == "__main__":
-    path_usuarios = "data/usuarios_conexiones.parquet"
-    path_ubicaciones = "data/ubicaciones_limpias.parquet"
-
-    grafo = construir_grafo_desde_parquet(path_usuarios, path_ubicaciones)
-
-    print("\n✅ GRAFO CONSTRUIDO")
-    print(f"Total de nodos: {grafo.num_nodes():,}")
-    print(f"Total de aristas: {grafo.num_edges():,}")
-    print(f"Ubicaciones cargadas: {len(grafo.locations):,}")
-
-    # =============================
-    # 📊 Análisis simple del grafo
-    # =============================
-    print("\n📊 ANÁLISIS DEL GRAFO")
-
-    grados = {nodo: len(vecinos) for nodo, vecinos in grafo.adj.items()}
-    top_10 = sorted(grados.items(), key=lambda x: x[1], reverse=True)[:10]
-
-    print("🔝 Top 10 nodos con más conexiones salientes:")
-    for nodo, grado in top_10:
-        print(f" - Nodo {nodo} → {grado} conexiones")
-
-    nodos_sin_aristas = [n for n in range(len(grafo.locations)) if n not in grafo.adj]
-    print(f"\n🧍 Nodos sin conexiones salientes: {len(nodos_sin_aristas):,}")
-
-    if grados:
-        grado_promedio = sum(grados.values()) / len(grados)
-        print(f"📈 Grado promedio: {grado_promedio:.2f}")
-        print(f"🔺 Máximo grado: {max(grados.values())}")
-        print(f"🔻 Mínimo grado (>0): {min([g for g in grados.values() if g > 0])}")
-    else:
-        print("⚠️ No se encontraron aristas para analizar grados.")
-
-    # Guardar el grafo en un archivo .pkl
-    with open("data/grafo_guardado.pkl", "wb") as f:
-        pickle.dump(grafo, f)
-        print("💾 Grafo guardado en 'data/grafo_guardado.pkl'")
\ No newline at end of file
+# paso_3_grafo_parquet.py
+
+import polars as pl
+import numpy as np
+from graphObj import CSRGraph
+
+def construir_grafo_desde_parquet(parquet_usuarios, parquet_ubicaciones):
+    print("📥 Leyendo conexiones desde .parquet...")
+    # Una fila por arista: se explota la lista de conexiones (ya son UInt32 desde la ingesta)
+    df_aristas = (
+        pl.scan_parquet(parquet_usuarios)
+        .explode("connections")
+        .select(
+            pl.col("node_id").cast(pl.Int64).alias("source"),
+            pl.col("connections").cast(pl.Int64).alias("target"),
+        )
+        .drop_nulls("target")
+        .collect(engine="streaming")
+    )
+
+    print("📍 Leyendo ubicaciones desde .parquet...")
+    df_ubicaciones = pl.read_parquet(parquet_ubicaciones, columns=["node_id", "latitude", "longitude"])
+    node_ids = df_ubicaciones["node_id"].to_numpy()
+
+    grafo = CSRGraph.from_arrays(
+        df_aristas["source"].to_numpy(),
+        df_aristas["target"].to_numpy(),
+        num_ids=int(node_ids.max()) + 1 if len(node_ids) else 0,
+    )
+    # Cada coordenada va a su node_id; los rechazados en la ingesta quedan sin ubicación (NaN)
+    grafo.set_locations(df_ubicaciones["latitude"].to_numpy(), df_ubicaciones["longitude"].to_numpy(), node_ids=node_ids)
+    return grafo
+
+
+# =============================
+# 📌 EJECUCIÓN PRINCIPAL
+# =============================
+if __name__ == "__main__":
+    path_usuarios = "data/usuarios_conexiones.parquet"
+    path_ubicaciones = "data/ubicaciones_limpias.parquet"
+
+    grafo = construir_grafo_desde_parquet(path_usuarios, path_ubicaciones)
+
+    print("\n✅ GRAFO CONSTRUIDO")
+    print(f"Total de nodos: {grafo.num_nodes():,}")
+    print(f"Total de aristas: {grafo.num_edges():,}")
+    print(f"Ubicaciones cargadas: {len(grafo.locations):,}")
+
+    # =============================
+    # 📊 Análisis simple del grafo
+    # =============================
+    print("\n📊 ANÁLISIS DEL GRAFO")
+
+    grados = grafo.out_degree  # Calculado al construir el CSR
+    con_aristas = grados > 0
+    top_10 = np.argpartition(grados, -10)[-10:] if len(grados) > 10 else np.arange(len(grados))
+    top_10 = top_10[np.argsort(grados[top_10])[::-1]]
+
+    print("🔝 Top 10 nodos con más conexiones salientes:")
+    for nodo in top_10:
+        if grados[nodo] > 0:
+            print(f" - Nodo {nodo} → {grados[nodo]} conexiones")
+
+    nodos_sin_aristas = np.count_nonzero(~con_aristas[:len(grafo.latitudes)])
+    print(f"\n🧍 Nodos sin conexiones salientes: {nodos_sin_aristas:,}")
+
+    if con_aristas.any():
+        grado_promedio = grados[con_aristas].mean()
+        print(f"📈 Grado promedio: {grado_promedio:.2f}")
+        print(f"🔺 Máximo grado: {grados.max()}")
+        print(f"🔻 Mínimo grado (>0): {grados[con_aristas].min()}")
+    else:
+        print("⚠️ No se encontraron aristas para analizar grados.")
+
+    # Guardar el grafo como directorio de arreglos (se abre con mmap)
+    grafo.save("data/grafo")
+    print("💾 Grafo guardado en 'data/grafo/' (arreglos .npy + header.json)")
\ No newline at end of file
@@ -1,19 +1,583 @@
-
-class Graph:
-    def __init__(self):
-        self.adj = {}  # usuario -> lista de vecinos
-        self.locations = {}  # usuario -> (lat, lon)
-
-    def add_edge(self, u, v):
-        if u not in self.adj:
-            self.adj[u] = []
-        self.adj[u].append(v)
-
-    def set_location(self, user_id, lat, lon):
-        self.locations[user_id] = (lat, lon)
-
-    def num_nodes(self):
-        return len(self.adj)
-
-    def num_edges(self):
-        return sum(len(v) for v in self.adj.values())
\ No newline at end of file
+import json
+import os
+from array import array
+from collections.abc import Mapping
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin bloqueo entre procesos al agregar arreglos
+    fcntl = None
+
+from comunidades_io import RUTA_COMUNIDADES, cargar_comunidades, listar_corridas
+
+
+class Graph:
+    def __init__(self):
+        self.adj = {}  # usuario -> lista de vecinos
+        self.locations = {}  # usuario -> (lat, lon)
+
+    def add_edge(self, u, v):
+        if u not in self.adj:
+            self.adj[u] = []
+        self.adj[u].append(v)
+
+    def set_location(self, user_id, lat, lon):
+        self.locations[user_id] = (lat, lon)
+
+    def num_nodes(self):
+        return len(self.adj)
+
+    def num_edges(self):
+        return sum(len(v) for v in self.adj.values())
+
+
+# =============================
+# Grafo en formato CSR (compressed sparse row)
+# =============================
+def _es_id(node_id):
+    return isinstance(node_id, (int, np.integer)) and not isinstance(node_id, bool)
+
+
+def _construir_csr(origenes, destinos, pesos, n):
+    """Arma (indptr, indices, weights) a partir de listas de aristas en bloque.
+
+    Si `origenes` ya viene ordenado se evita el argsort; en ambos casos el orden
+    relativo de los vecinos de cada nodo se conserva.
+    """
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(origenes, minlength=n), out=indptr[1:])
+
+    if len(origenes) > 1 and not np.all(origenes[1:] >= origenes[:-1]):
+        orden = np.argsort(origenes, kind="stable")
+        destinos = destinos[orden]
+        if pesos is not None:
+            pesos = pesos[orden]
+
+    indices = np.ascontiguousarray(destinos, dtype=np.int32)
+    weights = None if pesos is None else np.ascontiguousarray(pesos, dtype=np.float32)
+    return indptr, indices, weights
+
+
+class AdjacencyView(Mapping):
+    """Vista de solo lectura con la misma interfaz que el dict `adj` de Graph.
+
+    Solo los nodos con conexiones salientes son claves, igual que en el dict original.
+    Con `inversa=True` la vista recorre las aristas entrantes (índice inverso `radj`).
+    """
+
+    def __init__(self, graph, inversa=False):
+        self._g = graph
+        self._inversa = inversa
+
+    def _csr(self):
+        g = self._g
+        if self._inversa:
+            return g._reverse_arrays()
+        g._compact()
+        return g.indptr, g.indices, g.weights
+
+    def _vecinos(self, u):
+        indptr, indices, weights = self._csr()
+        inicio, fin = indptr[u], indptr[u + 1]
+        destinos = indices[inicio:fin].tolist()
+        if weights is None:
+            return destinos
+        return list(zip(destinos, weights[inicio:fin].tolist()))
+
+    def __contains__(self, u):
+        indptr = self._csr()[0]
+        return _es_id(u) and 0 <= u < len(indptr) - 1 and indptr[u + 1] > indptr[u]
+
+    def __getitem__(self, u):
+        if u not in self:
+            raise KeyError(u)
+        return self._vecinos(u)
+
+    def get(self, u, default=None):
+        if u not in self:
+            return default
+        return self._vecinos(u)
+
+    def __iter__(self):
+        indptr = self._csr()[0]
+        # Se recorre por bloques para no materializar una lista de 10M enteros
+        bloque = 1_000_000
+        for inicio in range(0, len(indptr) - 1, bloque):
+            grados = np.diff(indptr[inicio:inicio + bloque + 1])
+            yield from (np.flatnonzero(grados) + inicio).tolist()
+
+    def __len__(self):
+        return int(np.count_nonzero(np.diff(self._csr()[0])))
+
+
+class LocationView(Mapping):
+    """Vista nodo -> (lat, lon) sobre los arreglos de coordenadas (NaN = sin ubicación)."""
+
+    def __init__(self, graph):
+        self._g = graph
+
+    def __contains__(self, u):
+        g = self._g
+        return _es_id(u) and 0 <= u < len(g.latitudes) and not np.isnan(g.latitudes[u])
+
+    def __getitem__(self, u):
+        if u not in self:
+            raise KeyError(u)
+        return float(self._g.latitudes[u]), float(self._g.longitudes[u])
+
+    def __iter__(self):
+        yield from np.flatnonzero(~np.isnan(self._g.latitudes)).tolist()
+
+    def __len__(self):
+        return int(np.count_nonzero(~np.isnan(self._g.latitudes)))
+
+
+class CommunityView(Mapping):
+    """Vista nodo -> comunidad sobre un arreglo int32 (-1 = sin comunidad)."""
+
+    def __init__(self, graph):
+        self._g = graph
+
+    def __contains__(self, u):
+        etiquetas = self._g.community_labels
+        return _es_id(u) and 0 <= u < len(etiquetas) and etiquetas[u] >= 0
+
+    def __getitem__(self, u):
+        if u not in self:
+            raise KeyError(u)
+        return int(self._g.community_labels[u])
+
+    def get(self, u, default=None):
+        if u not in self:
+            return default
+        return int(self._g.community_labels[u])
+
+    def __iter__(self):
+        yield from np.flatnonzero(self._g.community_labels >= 0).tolist()
+
+    def __len__(self):
+        return int(np.count_nonzero(self._g.community_labels >= 0))
+
+
+# Formato en disco: un directorio con un .npy por arreglo y un header.json
+FORMATO_GRAFO = "csr-grafo"
+VERSION_FORMATO = 1
+# Índice inverso (aristas entrantes), opcional en el directorio del grafo
+ARREGLOS_INVERSOS = ("rev_indptr", "rev_indices", "rev_weights")
+# Grados por nodo (int32), calculados al construir el CSR
+ARREGLOS_GRADOS = ("in_degree", "out_degree")
+
+
+def _calcular_grados(indptr, indices, n):
+    """(in_degree, out_degree) int32 de cada node_id: bincount de destinos y diff de indptr."""
+    entrada = np.bincount(indices, minlength=n).astype(np.int32)
+    salida = np.diff(indptr).astype(np.int32)
+    return entrada, salida
+
+
+def _guardar_npy(ruta, arreglo):
+    # Se escribe en un temporal y se reemplaza: un grafo abierto con mmap sigue
+    # leyendo el archivo anterior en lugar de ver uno truncado. El temporal lleva el PID:
+    # dos etapas en paralelo pueden guardar el mismo arreglo a la vez
+    temporal = f"{ruta}.{os.getpid()}.tmp"
+    with open(temporal, "wb") as f:
+        np.save(f, arreglo)
+    os.replace(temporal, ruta)
+
+
+@contextmanager
+def _bloqueo_directorio(directorio):
+    """Bloqueo exclusivo del directorio del grafo mientras se actualiza header.json."""
+    if fcntl is None:
+        yield
+        return
+    with open(os.path.join(directorio, ".header.lock"), "w") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class CSRGraph:
+    """Grafo dirigido guardado en arreglos NumPy contiguos (formato CSR).
+
+    - indptr  (int64):   los vecinos del nodo u están en indices[indptr[u]:indptr[u + 1]]
+    - indices (int32):   nodo destino de cada arista
+    - weights (float32): peso de cada arista (None si el grafo no es ponderado)
+    - in_degree / out_degree (int32): aristas entrantes y salientes de cada nodo
+
+    `adj` y `locations` exponen la misma interfaz de diccionario que Graph, así que los
+    scripts de análisis funcionan sin cambios.
+    """
+
+    # Comunidades: arreglo int32 en memoria o corrida del almacén que se carga al primer uso
+    _labels = None
+    _labels_fuente = None
+    # Índice inverso (rev_indptr, rev_indices, rev_weights): se construye al primer uso de
+    # `radj` y, si el grafo se abrió con load(), se guarda junto a los demás arreglos
+    _rev = None
+    _directorio = None
+    # (in_degree, out_degree): se calculan junto con el CSR y se guardan con save()
+    _grados = None
+
+    def __init__(self, weighted=True):
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.indices = np.empty(0, dtype=np.int32)
+        self.weights = np.empty(0, dtype=np.float32) if weighted else None
+        self.latitudes = np.empty(0, dtype=np.float64)
+        self.longitudes = np.empty(0, dtype=np.float64)
+        self._init_buffers()
+
+    def _init_buffers(self):
+        # Aristas agregadas con add_edge que aún no se han compactado al CSR
+        self._pend_u = array("q")
+        self._pend_v = array("q")
+        self._pend_w = array("f")
+        self.adj = AdjacencyView(self)
+        self.radj = AdjacencyView(self, inversa=True)
+        self.locations = LocationView(self)
+
+    @classmethod
+    def from_arrays(cls, sources, targets, weights=None, num_ids=None):
+        """Construye el grafo de una sola vez a partir de arreglos de aristas.
+
+        Es mucho más rápido que llamar a add_edge por cada arista: se ordena por
+        origen, se cuentan los grados con bincount y se llenan los arreglos CSR.
+        """
+        sources = np.asarray(sources)
+        targets = np.asarray(targets)
+        grafo = cls(weighted=weights is not None)
+        n = int(num_ids) if num_ids is not None else 0
+        if len(sources):
+            n = max(n, int(sources.max()) + 1, int(targets.max()) + 1)
+        pesos = None if weights is None else np.asarray(weights)
+        grafo.indptr, grafo.indices, grafo.weights = _construir_csr(sources, targets, pesos, n)
+        grafo._grados = _calcular_grados(grafo.indptr, grafo.indices, n)
+        return grafo
+
+    @property
+    def num_ids(self):
+        """Tamaño del espacio de IDs (máximo ID + 1)."""
+        return len(self.indptr) - 1
+
+    def _degree_arrays(self):
+        self._compact()
+        if self._grados is None:
+            # Grafo vacío o directorio guardado antes de que existieran los grados
+            self._grados = _calcular_grados(self.indptr, self.indices, self.num_ids)
+            if self._directorio is not None:
+                self._guardar_en_directorio(self._directorio, zip(ARREGLOS_GRADOS, self._grados), "los grados")
+        return self._grados
+
+    @property
+    def in_degree(self):
+        """Arreglo int32 con la cantidad de aristas entrantes de cada node_id."""
+        return self._degree_arrays()[0]
+
+    @property
+    def out_degree(self):
+        """Arreglo int32 con la cantidad de aristas salientes de cada node_id."""
+        return self._degree_arrays()[1]
+
+    # ---------- construcción ----------
+    def add_edge(self, u, v, weight=1.0):
+        self._pend_u.append(u)
+        self._pend_v.append(v)
+        if self.weights is not None:
+            self._pend_w.append(weight)
+
+    def set_location(self, user_id, lat, lon):
+        if user_id >= len(self.latitudes):
+            self._resize_locations(max(user_id + 1, 2 * len(self.latitudes)))
+        elif not self.latitudes.flags.writeable:
+            # Arreglos abiertos con mmap en solo lectura: se copian antes de modificar
+            self._resize_locations(len(self.latitudes))
+        self.latitudes[user_id] = lat
+        self.longitudes[user_id] = lon
+
+    def set_locations(self, latitudes, longitudes, node_ids=None):
+        """Carga en bloque las coordenadas; sin `node_ids` el ID es la posición."""
+        latitudes = np.asarray(latitudes, dtype=np.float64)
+        longitudes = np.asarray(longitudes, dtype=np.float64)
+        if node_ids is None:
+            self.latitudes = latitudes.copy()
+            self.longitudes = longitudes.copy()
+            return
+        node_ids = np.asarray(node_ids)
+        n = max(self.num_ids, int(node_ids.max()) + 1 if len(node_ids) else 0)
+        self.latitudes = np.full(n, np.nan, dtype=np.float64)
+        self.longitudes = np.full(n, np.nan, dtype=np.float64)
+        self.latitudes[node_ids] = latitudes
+        self.longitudes[node_ids] = longitudes
+
+    def set_communities(self, labels):
+        """Asigna las comunidades (dict nodo -> comunidad o arreglo indexado por nodo)."""
+        if isinstance(labels, Mapping):
+            arreglo = np.full(self.num_ids, -1, dtype=np.int32)
+            nodos = np.fromiter(labels.keys(), dtype=np.int64, count=len(labels))
+            valores = np.fromiter(labels.values(), dtype=np.int32, count=len(labels))
+            if len(nodos) and nodos.max() >= len(arreglo):
+                arreglo = np.concatenate([arreglo, np.full(nodos.max() + 1 - len(arreglo), -1, dtype=np.int32)])
+            arreglo[nodos] = valores
+            labels = arreglo
+        self._labels = np.asarray(labels, dtype=np.int32)
+        self._labels_fuente = None
+
+    def attach_communities(self, nombre="louvain", ruta=RUTA_COMUNIDADES):
+        """Asocia una corrida del almacén de comunidades; se lee recién al usar `comunidades`."""
+        corridas = listar_corridas(ruta)
+        if nombre not in corridas:
+            raise ValueError(
+                f"❌ No existe la corrida de comunidades '{nombre}' en '{ruta}'. "
+                f"Disponibles: {corridas or 'ninguna (debes calcularlas primero)'}"
+            )
+        self._labels = None
+        self._labels_fuente = (nombre, ruta)
+
+    @property
+    def community_labels(self):
+        if self._labels is None and self._labels_fuente is not None:
+            self._labels = cargar_comunidades(*self._labels_fuente)
+        return self._labels
+
+    @property
+    def comunidades(self):
+        if self.community_labels is None:
+            raise AttributeError("El grafo no tiene comunidades asignadas (usa attach_communities)")
+        return CommunityView(self)
+
+    @classmethod
+    def from_graph(cls, grafo):
+        """Convierte un Graph (dict de listas) en CSRGraph, conservando ubicaciones y comunidades."""
+        origenes, destinos, pesos = array("q"), array("q"), array("f")
+        ponderado = None
+        for u, vecinos in grafo.adj.items():
+            for vecino in vecinos:
+                if ponderado is None:
+                    ponderado = isinstance(vecino, tuple)
+                if ponderado:
+                    v, w = vecino
+                    pesos.append(w)
+                else:
+                    v = vecino
+                origenes.append(u)
+                destinos.append(v)
+
+        n = max(grafo.locations.keys(), default=-1) + 1
+        csr = cls.from_arrays(
+            np.frombuffer(origenes, dtype=np.int64),
+            np.frombuffer(destinos, dtype=np.int64),
+            np.frombuffer(pesos, dtype=np.float32) if ponderado is not False else None,
+            num_ids=n,
+        )
+        if grafo.locations:
+            ids = np.fromiter(grafo.locations.keys(), dtype=np.int64, count=len(grafo.locations))
+            coords = np.array(list(grafo.locations.values()), dtype=np.float64).reshape(-1, 2)
+            csr.set_locations(coords[:, 0], coords[:, 1], node_ids=ids)
+        if getattr(grafo, "comunidades", None):
+            csr.set_communities(grafo.comunidades)
+        return csr
+
+    def _resize_locations(self, n):
+        for nombre in ("latitudes", "longitudes"):
+            viejo = getattr(self, nombre)
+            nuevo = np.full(n, np.nan, dtype=np.float64)
+            nuevo[:len(viejo)] = viejo
+            setattr(self, nombre, nuevo)
+
+    def _edge_sources(self):
+        """Nodo origen de cada arista del CSR (inverso de indptr)."""
+        return np.repeat(np.arange(self.num_ids, dtype=np.int32), np.diff(self.indptr))
+
+    def edge_sources(self):
+        """Arreglo int32 con el origen de cada arista, alineado con indices y weights."""
+        self._compact()
+        return self._edge_sources()
+
+    def _compact(self):
+        """Incorpora al CSR las aristas pendientes de add_edge."""
+        if not self._pend_u:
+            return
+        nuevos_u = np.frombuffer(self._pend_u, dtype=np.int64)
+        nuevos_v = np.frombuffer(self._pend_v, dtype=np.int64)
+        n = max(self.num_ids, int(nuevos_u.max()) + 1, int(nuevos_v.max()) + 1)
+
+        origenes = np.concatenate([self._edge_sources(), nuevos_u])
+        destinos = np.concatenate([self.indices, nuevos_v])
+        pesos = None
+        if self.weights is not None:
+            pesos = np.concatenate([self.weights, np.frombuffer(self._pend_w, dtype=np.float32)])
+
+        self.indptr, self.indices, self.weights = _construir_csr(origenes, destinos, pesos, n)
+        self._grados = _calcular_grados(self.indptr, self.indices, n)
+
+        self._pend_u = array("q")
+        self._pend_v = array("q")
+        self._pend_w = array("f")
+        # El grafo ya no coincide con el directorio del que se cargó
+        self._rev = None
+        self._directorio = None
+
+    def _reverse_arrays(self):
+        """CSR de las aristas entrantes: los predecesores de v están en rev_indices[rev_indptr[v]:...]."""
+        self._compact()
+        if self._rev is None:
+            self._rev = _construir_csr(self.indices, self._edge_sources(), self.weights, self.num_ids)
+            if self._directorio is not None:
+                self._guardar_en_directorio(self._directorio, zip(ARREGLOS_INVERSOS, self._rev), "el índice inverso")
+        return self._rev
+
+    def _guardar_en_directorio(self, directorio, arreglos, descripcion):
+        """Agrega arreglos (nombre, arreglo) al directorio sin reescribir los demás.
+
+        El header se lee y se reescribe con el directorio bloqueado: si otro proceso agrega
+        arreglos a la vez, ninguno pierde las entradas del otro, y lo que el otro ya guardó
+        no se vuelve a escribir.
+        """
+        ruta_header = os.path.join(directorio, "header.json")
+        try:
+            with _bloqueo_directorio(directorio):
+                with open(ruta_header, encoding="utf-8") as f:
+                    header = json.load(f)
+                nuevos = [(nombre, arr) for nombre, arr in arreglos
+                          if arr is not None and nombre not in header["arreglos"]]
+                if not nuevos:
+                    return
+                for nombre, arr in nuevos:
+                    _guardar_npy(os.path.join(directorio, f"{nombre}.npy"), arr)
+                    header["arreglos"][nombre] = {"dtype": str(arr.dtype), "shape": list(arr.shape)}
+                temporal = f"{ruta_header}.{os.getpid()}.tmp"
+                with open(temporal, "w", encoding="utf-8") as f:
+                    json.dump(header, f, indent=2)
+                os.replace(temporal, ruta_header)
+        except OSError as e:
+            print(f"⚠️ No se pudo guardar {descripcion} en '{directorio}': {e}")
+
+    # ---------- consultas ----------
+    def num_nodes(self):
+        return len(self.adj)
+
+    def num_edges(self):
+        self._compact()
+        return len(self.indices)
+
+    def get_neighbors(self, node_id):
+        """Devuelve solo los vecinos (sin pesos)"""
+        self._compact()
+        if not (_es_id(node_id) and 0 <= node_id < self.num_ids):
+            return []
+        return self.indices[self.indptr[node_id]:self.indptr[node_id + 1]].tolist()
+
+    def print_node_info(self, node_id):
+        print(f"📍 Nodo {node_id}")
+
+        # Ubicación
+        if node_id in self.locations:
+            lat, lon = self.locations[node_id]
+            print(f"  🌎 Ubicación: ({lat:.6f}, {lon:.6f})")
+        else:
+            print("  ⚠️ Ubicación no registrada.")
+
+        # Vecinos
+        vecinos = self.adj.get(node_id)
+        if vecinos:
+            print(f"  🔗 Conexiones ({len(vecinos)}):")
+            for vecino in vecinos:
+                if self.weights is None:
+                    print(f"    → {vecino}")
+                else:
+                    v, peso = vecino
+                    print(f"    → {v} (peso: {peso})")
+        else:
+            print("  ❌ Sin conexiones salientes.")
+
+    # ---------- persistencia (directorio de .npy + header.json) ----------
+    def _arrays(self):
+        arreglos = {
+            "indptr": self.indptr,
+            "indices": self.indices,
+            "latitudes": self.latitudes,
+            "longitudes": self.longitudes,
+        }
+        if self.weights is not None:
+            arreglos["weights"] = self.weights
+        arreglos.update(zip(ARREGLOS_GRADOS, self._degree_arrays()))
+        if self._rev is not None:
+            arreglos.update((n, a) for n, a in zip(ARREGLOS_INVERSOS, self._rev) if a is not None)
+        return arreglos
+
+    def _write_header(self, directorio, arreglos):
+        header = {
+            "formato": FORMATO_GRAFO,
+            "version": VERSION_FORMATO,
+            "creado": datetime.now().isoformat(timespec="seconds"),
+            "num_ids": self.num_ids,
+            "num_edges": len(self.indices),
+            "ponderado": self.weights is not None,
+            "arreglos": {
+                nombre: {"dtype": str(arr.dtype), "shape": list(arr.shape)}
+                for nombre, arr in arreglos.items()
+            },
+        }
+        with open(os.path.join(directorio, "header.json"), "w", encoding="utf-8") as f:
+            json.dump(header, f, indent=2)
+
+    def save(self, directorio):
+        """Guarda el grafo como un directorio de arreglos .npy más un header.json."""
+        self._compact()
+        os.makedirs(directorio, exist_ok=True)
+        arreglos = self._arrays()
+        for nombre, arr in arreglos.items():
+            _guardar_npy(os.path.join(directorio, f"{nombre}.npy"), arr)
+        # Un índice inverso de una versión anterior del grafo ya no es válido
+        for nombre in ARREGLOS_INVERSOS:
+            ruta = os.path.join(directorio, f"{nombre}.npy")
+            if nombre not in arreglos and os.path.exists(ruta):
+                os.remove(ruta)
+        self._write_header(directorio, arreglos)
+        self._directorio = directorio
+
+    @classmethod
+    def load(cls, directorio, mmap=True):
+        """Abre un grafo guardado con save(); con mmap=True los arreglos se leen bajo demanda."""
+        with open(os.path.join(directorio, "header.json"), encoding="utf-8") as f:
+            header = json.load(f)
+        if header.get("formato") != FORMATO_GRAFO:
+            raise ValueError(f"❌ '{directorio}' no es un grafo en formato {FORMATO_GRAFO}.")
+
+        modo = "r" if mmap else None
+        arreglos = {
+            nombre: np.load(os.path.join(directorio, f"{nombre}.npy"), mmap_mode=modo)
+            for nombre in header["arreglos"]
+        }
+
+        grafo = cls.__new__(cls)
+        grafo.indptr = arreglos["indptr"]
+        grafo.indices = arreglos["indices"]
+        grafo.weights = arreglos.get("weights")
+        grafo.latitudes = arreglos["latitudes"]
+        grafo.longitudes = arreglos["longitudes"]
+        if "rev_indptr" in arreglos:
+            grafo._rev = tuple(arreglos.get(nombre) for nombre in ARREGLOS_INVERSOS)
+        if all(nombre in arreglos for nombre in ARREGLOS_GRADOS):
+            grafo._grados = tuple(arreglos[nombre] for nombre in ARREGLOS_GRADOS)
+        grafo._directorio = directorio
+        grafo._init_buffers()
+        return grafo
+
+    # ---------- pickle ----------
+    def __getstate__(self):
+        self._compact()
+        estado = self.__dict__.copy()
+        for clave in ("adj", "radj", "locations", "_pend_u", "_pend_v", "_pend_w", "_directorio"):
+            estado.pop(clave, None)
+        return estado
+
+    def __setstate__(self, estado):
+        self.__dict__.update(estado)
+        self._init_buffers()
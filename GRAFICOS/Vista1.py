@@ -1,22 +1,26 @@
-import pickle
 from pyvis.network import Network
-from graphObj import Graph
+from graphObj import CSRGraph
+import numpy as np
 import os
 
 # =======================
 # Cargar grafo
 # =======================
-with open("data/grafo_guardado.pkl", "rb") as f:
-    grafo = pickle.load(f)
+grafo = CSRGraph.load("data/grafo")
 
 # =======================
-# Calcular grado de salida
+# Grado de salida (arreglo precalculado en el grafo)
 # =======================
-grados = {nodo: len(vecinos) for nodo, vecinos in grafo.adj.items()}
+grados = grafo.out_degree
 
-# Obtener los top N nodos con mayor out-degree
+# Obtener los top N nodos con mayor out-degree sin ordenar todos los nodos; solo entre los que
+# tienen aristas, para no completar el top con nodos de grado 0 si hay menos de N
 top_n = 1000
-top_nodos = sorted(grados.items(), key=lambda x: x[1], reverse=True)[:top_n]
+con_aristas = np.flatnonzero(grados > 0)
+candidatos = (con_aristas[np.argpartition(grados[con_aristas], -top_n)[-top_n:]]
+              if len(con_aristas) > top_n else con_aristas)
+candidatos = candidatos[np.argsort(-grados[candidatos], kind="stable")]
+top_nodos = list(zip(candidatos.tolist(), grados[candidatos].tolist()))
 nodos_top = set(n for n, _ in top_nodos)
 
 # =======================
@@ -24,7 +28,7 @@ nodos_top = set(n for n, _ in top_nodos)
 # =======================
 edges = []
 for nodo in nodos_top:
-    for vecino in grafo.adj.get(nodo, []):
+    for vecino in grafo.get_neighbors(nodo):  # Solo destinos, también en grafos ponderados
         if vecino in nodos_top:
             edges.append((nodo, vecino))
 
@@ -1,103 +1,217 @@
-from collections import defaultdict
-import pickle
-from graphObj import Graph  
-import time
-class LouvainCommunityDetector:
-    def __init__(self, graph):
-        self.graph = graph
-        self.total_weight = self._compute_total_weight()
-        self.node_community = {node: node for node in self.graph.adj}
-        self.community_internal_weight = defaultdict(float)
-        self.community_total_degree = defaultdict(float)
-
-    def _compute_total_weight(self):
-        total = 0
-        for u in self.graph.adj:
-            for v, w in self.graph.adj[u]:
-                total += w
-        return total / 2  # Cada arista se cuenta dos veces
-
-    def _node_degree(self, node):
-        return sum(w for _, w in self.graph.adj[node])
-
-    def _init_communities(self):
-        for node in self.graph.adj:
-            deg = self._node_degree(node)
-            self.community_total_degree[node] = deg
-            for v, w in self.graph.adj[node]:
-                if node == v:
-                    self.community_internal_weight[node] += w
-
-    def _modularity_gain(self, node, community, k_i, sum_tot, k_i_in):
-        m = self.total_weight
-        return (k_i_in - (sum_tot * k_i) / (2 * m))
-
-    def _neighbor_communities(self, node):
-        neighbor_coms = defaultdict(float)
-        for neighbor, weight in self.graph.adj[node]:
-            if neighbor == node:
-                continue
-            community = self.node_community[neighbor]
-            neighbor_coms[community] += weight
-        return neighbor_coms
-
-    def _move_node(self, node, k_i):
-        best_community = self.node_community[node]
-        best_gain = 0.0
-        current_community = best_community
-
-        neighbor_coms = self._neighbor_communities(node)
-
-        # Quitar nodo de su comunidad actual
-        self.community_total_degree[current_community] -= k_i
-
-        for community, k_i_in in neighbor_coms.items():
-            gain = self._modularity_gain(node, community, k_i, self.community_total_degree[community], k_i_in)
-            if gain > best_gain:
-                best_gain = gain
-                best_community = community
-
-        # Mover nodo si hay mejora
-        self.node_community[node] = best_community
-        self.community_total_degree[best_community] += k_i
-
-        return best_community != current_community
-
-    def run(self, max_passes=10):
-        self._init_communities()
-        for _ in range(max_passes):
-            moved = False
-            for node in self.graph.adj:
-                k_i = self._node_degree(node)
-                moved |= self._move_node(node, k_i)
-            if not moved:
-                break
-        return self._build_communities()
-
-    def _build_communities(self):
-        communities = defaultdict(list)
-        for node, com in self.node_community.items():
-            communities[com].append(node)
-        return list(communities.values())
-
-print("Cargando GRafo")
-# Paso 1: Cargar grafo
-with open("data/grafo_guardado.pkl", "rb") as f:
-    grafo = pickle.load(f)
-print("Comunidades:")
-# Paso 2: Detectar comunidades
-inicio = time.time()
-detector = LouvainCommunityDetector(grafo)
-comunidades = detector.run()
-tiempo = time.time() - inicio
-print(f"Tiempo transcurrido: {tiempo:.4f} segundos")
-# Paso 3: Guardar comunidad por nodo
-grafo.comunidades = {}
-for cid, grupo in enumerate(comunidades):
-    for nodo in grupo:
-        grafo.comunidades[nodo] = cid
-print("Guardando grafo")
-# Paso 4: Guardar grafo
-with open("data/grafo_con_comunidades.pkl", "wb") as f:
-    pickle.dump(grafo, f)
-    print("💾 Grafo con comunidades guardado como 'grafo_con_comunidades.pkl'")
+import sys
+import time
+
+import numpy as np
+from graphObj import CSRGraph
+from comunidades_io import USAR_PESOS, guardar_comunidades, nombre_corrida
+
+# Nombre de la corrida en data/comunidades.parquet ("louvain_propio_ponderado" con --con-pesos)
+CORRIDA = "louvain_propio"
+
+
+class LouvainCommunityDetector:
+    """Louvain multinivel sobre arreglos NumPy.
+
+    Cada nivel es un grafo no dirigido en CSR simétrico (sin lazos) más un arreglo `lazos`
+    con el peso interno de cada (super)nodo. Los grados y los totales por comunidad viven en
+    arreglos; entre niveles las comunidades se agregan en supernodos.
+    """
+
+    def __init__(self, graph, usar_pesos=USAR_PESOS, aleatorio=False, semilla=None, max_passes=10, tolerancia=1e-7):
+        self.graph = graph
+        self.usar_pesos = usar_pesos and graph.weights is not None
+        self.rng = np.random.default_rng(semilla) if aleatorio else None
+        self.max_passes = max_passes
+        self.tolerancia = tolerancia
+        self.niveles = []  # Un dict por nivel: nodos, comunidades, modularidad, pasadas, tiempo
+        self.indptr, self.indices, self.weights, self.lazos = self._simetrizar()
+        self.nivel_0 = (self.indptr, self.indices, self.weights, self.lazos)
+
+    def _simetrizar(self):
+        """Grafo dirigido -> no dirigido: un solo enlace por par {u, v} (como as_undirected de igraph)."""
+        n = self.graph.num_ids
+        origenes = self.graph.edge_sources().astype(np.int64)
+        destinos = np.asarray(self.graph.indices, dtype=np.int64)
+        if self.usar_pesos:
+            pesos = np.asarray(self.graph.weights, dtype=np.float64)
+        else:
+            pesos = np.ones(len(destinos), dtype=np.float64)
+
+        claves = np.minimum(origenes, destinos) * n + np.maximum(origenes, destinos)
+        claves, primera = np.unique(claves, return_index=True)
+        pesos = pesos[primera]
+        a, b = np.divmod(claves, n)
+        del origenes, destinos, claves, primera
+
+        es_lazo = a == b
+        lazos = np.bincount(a[es_lazo], weights=pesos[es_lazo], minlength=n)
+        a, b, pesos = a[~es_lazo], b[~es_lazo], pesos[~es_lazo]
+        return self._csr(np.concatenate([a, b]), np.concatenate([b, a]), np.concatenate([pesos, pesos]), n) + (lazos,)
+
+    @staticmethod
+    def _csr(origenes, destinos, pesos, n):
+        orden = np.argsort(origenes, kind="stable")
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(origenes, minlength=n), out=indptr[1:])
+        return indptr, destinos[orden].astype(np.int32), pesos[orden]
+
+    def _grados(self):
+        """k_i = suma de pesos incidentes (los lazos cuentan dos veces)."""
+        filas = np.repeat(np.arange(len(self.lazos)), np.diff(self.indptr))
+        return np.bincount(filas, weights=self.weights, minlength=len(self.lazos)) + 2 * self.lazos
+
+    def _modularidad(self, comm, k, m2):
+        filas = np.repeat(np.arange(len(comm)), np.diff(self.indptr))
+        internas = self.weights[comm[filas] == comm[self.indices]].sum() + 2 * self.lazos.sum()
+        tot = np.bincount(comm, weights=k)
+        return internas / m2 - np.square(tot / m2).sum()
+
+    def _mover_nodos(self, comm, k, m2):
+        """Fase local: mueve cada nodo a la comunidad vecina con mayor ganancia de modularidad."""
+        tot = np.bincount(comm, weights=k, minlength=len(comm))
+        indptr, indices, weights = self.indptr, self.indices, self.weights
+        n = len(comm)
+        pasadas = 0
+        for _ in range(self.max_passes):
+            pasadas += 1
+            orden = self.rng.permutation(n) if self.rng is not None else np.arange(n)
+            movidos = 0
+            for i in orden.tolist():
+                a, b = indptr[i], indptr[i + 1]
+                if a == b:
+                    continue
+                k_i = k[i]
+                actual = comm[i]
+
+                k_i_in = {}
+                for c, w in zip(comm[indices[a:b]].tolist(), weights[a:b].tolist()):
+                    k_i_in[c] = k_i_in.get(c, 0.0) + w
+
+                # Se retira el nodo de su comunidad: la ganancia de volver a ella se compara
+                # con la de las vecinas (término de remoción incluido)
+                tot[actual] -= k_i
+                mejor = actual
+                mejor_ganancia = k_i_in.get(actual, 0.0) - tot[actual] * k_i / m2
+                for c, peso in k_i_in.items():
+                    ganancia = peso - tot[c] * k_i / m2
+                    if ganancia > mejor_ganancia + self.tolerancia:
+                        mejor, mejor_ganancia = c, ganancia
+                tot[mejor] += k_i
+                if mejor != actual:
+                    comm[i] = mejor
+                    movidos += 1
+            if movidos == 0:
+                break
+        return pasadas
+
+    def _agregar(self, comm):
+        """Colapsa cada comunidad en un supernodo; los pesos internos pasan a `lazos`."""
+        c = int(comm.max()) + 1
+        filas = comm[np.repeat(np.arange(len(comm)), np.diff(self.indptr))].astype(np.int64)
+        columnas = comm[self.indices].astype(np.int64)
+
+        internas = filas == columnas
+        # Cada arista no dirigida aparece dos veces en el CSR simétrico
+        lazos = np.bincount(filas[internas], weights=self.weights[internas] / 2, minlength=c)
+        lazos += np.bincount(comm, weights=self.lazos, minlength=c)
+
+        claves = filas[~internas] * c + columnas[~internas]
+        claves, inversa = np.unique(claves, return_inverse=True)
+        pesos = np.bincount(inversa, weights=self.weights[~internas])
+        origenes, destinos = np.divmod(claves, c)
+        self.indptr, self.indices, self.weights = self._csr(origenes, destinos, pesos, c)
+        self.lazos = lazos
+
+    def run(self):
+        """Devuelve la comunidad de cada node_id (arreglo int32) y deja el reporte en self.niveles."""
+        n = len(self.lazos)
+        etiquetas = np.arange(n, dtype=np.int64)
+        k = self._grados()
+        m2 = k.sum()
+        if m2 == 0:
+            return etiquetas.astype(np.int32)
+
+        nivel = 0
+        while True:
+            inicio = time.time()
+            nodos = len(self.lazos)
+            comm = np.arange(nodos, dtype=np.int64)
+            pasadas = self._mover_nodos(comm, k, m2)
+            _, comm = np.unique(comm, return_inverse=True)
+            comunidades = int(comm.max()) + 1
+            modularidad = self._modularidad(comm, k, m2)
+
+            etiquetas = comm[etiquetas]
+            self.niveles.append({
+                "nivel": nivel,
+                "nodos": nodos,
+                "comunidades": comunidades,
+                "modularidad": modularidad,
+                "pasadas": pasadas,
+                "tiempo": time.time() - inicio,
+            })
+            print(f"  Nivel {nivel}: {nodos:,} nodos → {comunidades:,} comunidades | "
+                  f"Q = {modularidad:.6f} | {pasadas} pasadas | {time.time() - inicio:.2f} s")
+
+            if comunidades == nodos:
+                break
+            self._agregar(comm)
+            k = self._grados()
+            nivel += 1
+
+        return etiquetas.astype(np.int32)
+
+
+def comparar_con_igraph(detector):
+    """Ejecuta community_multilevel de igraph sobre el mismo grafo no dirigido del nivel 0."""
+    import igraph as ig
+
+    indptr, indices, weights, lazos = detector.nivel_0
+    filas = np.repeat(np.arange(len(lazos)), np.diff(indptr))
+    una_vez = filas < indices
+    con_lazo = np.flatnonzero(lazos)
+    extremos = np.column_stack((
+        np.concatenate([filas[una_vez], con_lazo]),
+        np.concatenate([indices[una_vez], con_lazo]),
+    ))
+    g = ig.Graph(n=len(lazos), edges=extremos, directed=False)
+    g.es["weight"] = np.concatenate([weights[una_vez], lazos[con_lazo]])
+
+    inicio = time.time()
+    niveles = g.community_multilevel(weights="weight", return_levels=True)
+    tiempo = time.time() - inicio
+    print(f"\n📐 igraph community_multilevel ({tiempo:.2f} s en total):")
+    for nivel, particion in enumerate(niveles):
+        print(f"  Nivel {nivel}: {len(particion):,} comunidades | Q = {particion.modularity:.6f}")
+
+
+if __name__ == "__main__":
+    # Opciones: --aleatorio (orden de visita aleatorio), --con-pesos (ver USAR_PESOS en
+    # comunidades_io.py), --igraph (comparación)
+    con_pesos = USAR_PESOS or "--con-pesos" in sys.argv
+    corrida = nombre_corrida(CORRIDA, con_pesos)
+    print("📥 Cargando grafo...")
+    # Paso 1: Cargar grafo
+    grafo = CSRGraph.load("data/grafo")
+
+    # Paso 2: Detectar comunidades
+    print("🔍 Detectando comunidades (Louvain multinivel)...")
+    inicio = time.time()
+    detector = LouvainCommunityDetector(
+        grafo,
+        usar_pesos=con_pesos,
+        aleatorio="--aleatorio" in sys.argv,
+    )
+    etiquetas = detector.run()
+    tiempo = time.time() - inicio
+    print(f"✅ {len(np.unique(etiquetas)):,} comunidades, Q = {detector.niveles[-1]['modularidad']:.6f}"
+          if detector.niveles else "⚠️ El grafo no tiene aristas.")
+    print(f"Tiempo transcurrido: {tiempo:.4f} segundos")
+
+    if "--igraph" in sys.argv:
+        comparar_con_igraph(detector)
+
+    # Paso 3: Guardar comunidades como columna aparte (corrida 'louvain_propio')
+    print("Guardando comunidades")
+    guardar_comunidades(etiquetas, corrida)
+    print(f"💾 Comunidades guardadas como corrida '{corrida}' en 'data/comunidades.parquet'")
@@ -0,0 +1,341 @@
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import polars as pl
+from generar_datos import LOCATION, USER, generar
+from metricas import lanzar_medido
+
+# =============================
+# Benchmark del pipeline y los algoritmos a varias escalas
+# =============================
+# Para cada tamaño se generan datos sintéticos (generar_datos.py) y, por cada variante
+# (V1, V2, APP), se ejecutan sus scripts de ingesta, pesos, construcción del grafo y
+# comunidades en un directorio de trabajo propio. Después se miden la carga del grafo, el
+# muestreo BFS, Dijkstra y Kruskal, cada operación en su propio subproceso para que el
+# pico de RSS (os.wait4, vía el lanzador de metricas.py) sea el de esa operación. Los
+# resultados se agregan a bench/resultados.parquet y se dibuja la curva de escalado.
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DIRECTORIO_BENCH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench")
+RUTA_RESULTADOS = os.path.join(DIRECTORIO_BENCH, "resultados.parquet")
+TAMANOS = [10_000, 100_000, 1_000_000]  # Usuarios
+REPETICIONES = 20  # Muestras por operación (pares de Dijkstra, inicios de BFS, cargas)
+REPETICIONES_KRUSKAL = 3
+NODOS_BFS = 1_000  # Igual que sample_size en mapa_BFS.py
+SEMILLA = 42
+MARCA = "RESULTADO "  # Prefijo de la línea con la que un subproceso de medición devuelve sus tiempos
+
+# Scripts del pipeline de cada variante (en orden) y módulos de sus algoritmos. APP no tiene
+# pesos, así que no tiene Dijkstra ni Kruskal.
+VARIANTES = {
+    "V1": {
+        "etapas": [("ingesta", "data_to_parquet.py"), ("pesos", "calc_weight.py"),
+                   ("construccion", "graph_construction.py"), ("comunidades", "comunidad_igraph.py")],
+        "corrida": "louvain",
+        "dijkstra": "dijkstra",
+        "kruskal": "kruskal",
+    },
+    "V2": {
+        "etapas": [("ingesta", "data_raw_to_parquet.py"), ("pesos", "data_weights_to_parquet.py"),
+                   ("construccion", "data_graph_construction.py"), ("comunidades", "data_asignar_comunidad.py")],
+        "corrida": "louvain_propio",
+        "dijkstra": "analisis_dijkstra",
+        "kruskal": "analisis_kruskal",
+    },
+    "APP": {
+        "etapas": [("ingesta", "app.py"), ("construccion", "graph.py"), ("comunidades", "comunidad.py")],
+        "corrida": "louvain",
+        "dijkstra": None,
+        "kruskal": None,
+    },
+}
+OPERACIONES = ["carga", "bfs", "dijkstra", "kruskal"]
+
+ESQUEMA = {
+    "corrida": pl.String,
+    "variante": pl.String,
+    "usuarios": pl.Int64,
+    "aristas": pl.Int64,
+    "operacion": pl.String,
+    "estado": pl.String,
+    "repeticiones": pl.Int64,
+    "p50_s": pl.Float64,
+    "p95_s": pl.Float64,
+    "p99_s": pl.Float64,
+    "media_s": pl.Float64,
+    "procesados": pl.Int64,
+    "unidad": pl.String,
+    "por_segundo": pl.Float64,
+    "rss_pico_mb": pl.Float64,
+}
+
+
+# ========================
+# Subprocesos
+# ========================
+def _ejecutar(comando, directorio):
+    """Ejecuta el comando; devuelve (código, segundos, métricas de recursos, salida combinada)."""
+    inicio = time.perf_counter()
+    proceso, uso = lanzar_medido(comando, cwd=directorio, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    salida, _ = proceso.communicate()
+    return proceso.returncode, time.perf_counter() - inicio, uso(), salida
+
+
+def _fila(variante, usuarios, aristas, operacion, tiempos, procesados, unidad, uso, estado="ok"):
+    tiempos = np.asarray(tiempos, dtype=np.float64)
+    medido = estado == "ok" and len(tiempos) > 0
+    return {
+        "variante": variante,
+        "usuarios": usuarios,
+        "aristas": aristas,
+        "operacion": operacion,
+        "estado": estado,
+        "repeticiones": len(tiempos),
+        "p50_s": float(np.percentile(tiempos, 50)) if medido else None,
+        "p95_s": float(np.percentile(tiempos, 95)) if medido else None,
+        "p99_s": float(np.percentile(tiempos, 99)) if medido else None,
+        "media_s": float(tiempos.mean()) if medido else None,
+        "procesados": procesados,
+        "unidad": unidad,
+        "por_segundo": procesados / tiempos.sum() if medido and procesados and tiempos.sum() > 0 else None,
+        "rss_pico_mb": uso["rss_pico_mb"] if uso is not None else None,
+    }
+
+
+def _espacio(variante, usuarios, semilla):
+    """Directorio de trabajo de la variante con los datos crudos del tamaño (enlazados, no copiados)."""
+    crudos = os.path.join(DIRECTORIO_BENCH, "datos", f"{usuarios}_{semilla}")
+    if not all(os.path.exists(os.path.join(crudos, f)) for f in (LOCATION, USER)):
+        generar(usuarios, crudos, semilla, sobrescribir=True)
+
+    espacio = os.path.join(DIRECTORIO_BENCH, variante, f"{usuarios}_{semilla}")
+    os.makedirs(os.path.join(espacio, "data"), exist_ok=True)
+    for archivo in (LOCATION, USER):
+        destino = os.path.join(espacio, "data", archivo)
+        if not os.path.lexists(destino):
+            os.symlink(os.path.join(crudos, archivo), destino)
+    return espacio
+
+
+def _aristas(espacio):
+    ruta = os.path.join(espacio, "data", "grafo", "indices.npy")
+    return int(np.load(ruta, mmap_mode="r").shape[0]) if os.path.exists(ruta) else None
+
+
+# ========================
+# Mediciones dentro del subproceso (python benchmark.py --medir ...)
+# ========================
+def medir(variante, operacion, repeticiones, semilla):
+    """Corre `operacion` sobre data/grafo del directorio actual con los módulos de la variante.
+
+    Devuelve (tiempos por repetición, elementos procesados, unidad).
+    """
+    # Los módulos de la variante (graphObj, dijkstra, ...) tienen prioridad sobre los de V1
+    sys.path.insert(0, os.path.join(RAIZ, variante))
+    from graphObj import CSRGraph
+
+    config = VARIANTES[variante]
+    rng = np.random.default_rng(semilla)
+    tiempos = []
+
+    if operacion == "carga":
+        aristas = 0
+        for _ in range(repeticiones):
+            t0 = time.perf_counter()
+            grafo = CSRGraph.load("data/grafo")
+            aristas += grafo.num_edges()
+            tiempos.append(time.perf_counter() - t0)
+        return tiempos, aristas, "aristas"
+
+    grafo = CSRGraph.load("data/grafo")
+    con_salida = np.flatnonzero(grafo.out_degree)
+
+    if operacion == "bfs":
+        from benchmark_mapa_aristas import muestra_bfs
+        nodos = 0
+        for inicio in rng.choice(con_salida, repeticiones).tolist():
+            t0 = time.perf_counter()
+            nodos += len(muestra_bfs(grafo, inicio, NODOS_BFS))
+            tiempos.append(time.perf_counter() - t0)
+        return tiempos, nodos, "nodos"
+
+    if operacion == "dijkstra":
+        dijkstra = __import__(config["dijkstra"]).dijkstra
+        con_entrada = np.flatnonzero(grafo.in_degree)
+        asentados = 0
+        for origen, destino in zip(rng.choice(con_salida, repeticiones).tolist(),
+                                   rng.choice(con_entrada, repeticiones).tolist()):
+            stats = {}
+            t0 = time.perf_counter()
+            dijkstra(grafo, origen, destino, stats)
+            tiempos.append(time.perf_counter() - t0)
+            asentados += stats["asentados"]
+        return tiempos, asentados, "nodos"
+
+    if operacion == "kruskal":
+        modulo = __import__(config["kruskal"])
+        for _ in range(repeticiones):
+            t0 = time.perf_counter()
+            if hasattr(modulo, "kruskal_arrays"):
+                # V1: bosque generador mínimo del grafo completo
+                modulo.kruskal_arrays(grafo.edge_sources(), grafo.indices, grafo.weights, grafo.num_ids)
+            else:
+                # V2: un MST por comunidad
+                grafo.attach_communities(config["corrida"])
+                modulo.mst_por_comunidad(grafo, np.asarray(grafo.community_labels))
+            tiempos.append(time.perf_counter() - t0)
+        return tiempos, grafo.num_edges() * repeticiones, "aristas"
+
+    raise ValueError(f"❌ Operación desconocida '{operacion}'.")
+
+
+# ========================
+# Corrida completa
+# ========================
+def ejecutar_variante(variante, usuarios, semilla, repeticiones):
+    """Filas de resultados de una variante a un tamaño: etapas del pipeline y luego algoritmos."""
+    config = VARIANTES[variante]
+    espacio = _espacio(variante, usuarios, semilla)
+    filas = []
+
+    for operacion, script in config["etapas"]:
+        codigo, segundos, uso, salida = _ejecutar([sys.executable, os.path.join(RAIZ, variante, script)], espacio)
+        estado = "ok" if codigo == 0 else "fallida"
+        filas.append(_fila(variante, usuarios, None, operacion, [segundos], None, "aristas", uso, estado))
+        print(f"  {variante:<4} {operacion:<13} {segundos:>9.2f} s  {filas[-1]['rss_pico_mb'] or 0:>8,.0f} MB"
+              + ("" if codigo == 0 else f"  ❌ código {codigo}"))
+        if codigo != 0:
+            print("\n".join("      " + linea for linea in salida.strip().splitlines()[-5:]))
+            return filas  # Sin el paso anterior las etapas siguientes no tienen entrada
+
+    # El rendimiento de cada etapa se expresa en aristas del grafo final por segundo
+    aristas = _aristas(espacio)
+    for fila in filas:
+        fila.update(aristas=aristas, procesados=aristas, por_segundo=aristas / fila["p50_s"])
+    for operacion in OPERACIONES:
+        if operacion in ("dijkstra", "kruskal") and config[operacion] is None:
+            continue
+        veces = REPETICIONES_KRUSKAL if operacion == "kruskal" else repeticiones
+        codigo, _, uso, salida = _ejecutar(
+            [sys.executable, os.path.abspath(__file__), "--medir", variante, operacion, str(veces), str(semilla)],
+            espacio,
+        )
+        resultado = next((l[len(MARCA):] for l in reversed(salida.splitlines()) if l.startswith(MARCA)), None)
+        if codigo != 0 or resultado is None:
+            filas.append(_fila(variante, usuarios, aristas, operacion, [], None, None, uso, "fallida"))
+            print(f"  {variante:<4} {operacion:<13} ❌ código {codigo}")
+            print("\n".join("      " + linea for linea in salida.strip().splitlines()[-5:]))
+            continue
+        tiempos, procesados, unidad = json.loads(resultado)
+        filas.append(_fila(variante, usuarios, aristas, operacion, tiempos, procesados, unidad, uso))
+        fila = filas[-1]
+        print(f"  {variante:<4} {operacion:<13} p50 {fila['p50_s'] * 1000:>9.2f} ms  p95 {fila['p95_s'] * 1000:>9.2f} ms"
+              f"  {fila['rss_pico_mb']:>8,.0f} MB  {fila['por_segundo'] or 0:>14,.0f} {unidad}/s")
+    return filas
+
+
+def guardar_resultados(filas, corrida, ruta=RUTA_RESULTADOS):
+    """Agrega las filas de la corrida al final de `ruta`."""
+    nuevas = pl.DataFrame([dict(f, corrida=corrida) for f in filas], schema=ESQUEMA)
+    if os.path.exists(ruta):
+        nuevas = pl.concat([pl.read_parquet(ruta), nuevas], how="diagonal_relaxed")
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    temporal = f"{ruta}.{os.getpid()}.tmp"
+    nuevas.write_parquet(temporal)
+    os.replace(temporal, ruta)
+
+
+def resumen(corrida, ruta=RUTA_RESULTADOS):
+    """Tabla de la corrida con el cociente de p50 contra la corrida anterior (mismo caso)."""
+    resultados = pl.read_parquet(ruta).filter(pl.col("estado") == "ok")
+    claves = ["variante", "usuarios", "operacion"]
+    anterior = (
+        resultados.filter(pl.col("corrida") < corrida)
+        .sort("corrida")
+        .group_by(claves)
+        .agg(pl.col("p50_s").last().alias("p50_anterior"))
+    )
+    return (
+        resultados.filter(pl.col("corrida") == corrida)
+        .join(anterior, on=claves, how="left")
+        .with_columns((pl.col("p50_s") / pl.col("p50_anterior")).alias("vs_anterior"))
+        .sort("operacion", "variante", "usuarios")
+    )
+
+
+def dibujar_escalado(tabla, ruta):
+    """p50 en función de la cantidad de usuarios (log-log), un panel por operación."""
+    import matplotlib.pyplot as plt
+
+    operaciones = tabla["operacion"].unique(maintain_order=True).to_list()
+    columnas = 4
+    filas = -(-len(operaciones) // columnas)
+    fig, ejes = plt.subplots(filas, columnas, figsize=(4 * columnas, 3.2 * filas), squeeze=False)
+    for eje, operacion in zip(ejes.flat, operaciones):
+        for (variante,), grupo in tabla.filter(pl.col("operacion") == operacion).group_by("variante", maintain_order=True):
+            grupo = grupo.sort("usuarios")
+            color = f"C{list(VARIANTES).index(variante)}"  # Mismo color por variante en todos los paneles
+            eje.plot(grupo["usuarios"], grupo["p50_s"], marker="o", color=color, label=variante)
+        eje.set_xscale("log")
+        eje.set_yscale("log")
+        eje.set_title(operacion)
+        eje.set_xlabel("Usuarios")
+        eje.set_ylabel("p50 (s)")
+        eje.legend()
+    for eje in list(ejes.flat)[len(operaciones):]:
+        eje.axis("off")
+    fig.tight_layout()
+    fig.savefig(ruta, dpi=120)
+    plt.close(fig)
+
+
+def main(tamanos=TAMANOS, variantes=tuple(VARIANTES), repeticiones=REPETICIONES, semilla=SEMILLA):
+    corrida = datetime.now().strftime("%Y%m%d_%H%M%S")
+    filas = []
+    for usuarios in tamanos:
+        print(f"\n===== {usuarios:,} usuarios (semilla {semilla}) =====")
+        for variante in variantes:
+            filas.extend(ejecutar_variante(variante, usuarios, semilla, repeticiones))
+
+    guardar_resultados(filas, corrida)
+    tabla = resumen(corrida)
+    print(f"\n===== Resumen de la corrida {corrida} =====")
+    print(f"{'operación':<13}{'variante':<9}{'usuarios':>11}{'aristas':>13}{'p50 (s)':>11}{'p95 (s)':>11}"
+          f"{'por segundo':>15}{'RSS (MB)':>10}{'vs anterior':>13}")
+    for f in tabla.iter_rows(named=True):
+        relacion = "-" if f["vs_anterior"] is None else f"x{f['vs_anterior']:.2f}"
+        print(f"{f['operacion']:<13}{f['variante']:<9}{f['usuarios']:>11,}{f['aristas'] or 0:>13,}{f['p50_s']:>11.4f}"
+              f"{f['p95_s']:>11.4f}{f['por_segundo'] or 0:>15,.0f}{f['rss_pico_mb']:>10,.0f}{relacion:>13}")
+
+    ruta_grafico = os.path.join(DIRECTORIO_BENCH, f"escalado_{corrida}.png")
+    dibujar_escalado(tabla, ruta_grafico)
+    print(f"\n💾 Resultados en '{RUTA_RESULTADOS}', curva de escalado en '{ruta_grafico}'")
+
+
+if __name__ == "__main__":
+    if "--medir" in sys.argv:
+        # Modo interno: una operación por subproceso, el resultado va en la última línea
+        variante, operacion, veces, semilla = sys.argv[sys.argv.index("--medir") + 1:][:4]
+        tiempos, procesados, unidad = medir(variante, operacion, int(veces), int(semilla))
+        print(MARCA + json.dumps([tiempos, procesados, unidad]))
+        sys.exit(0)
+
+    # Uso: python benchmark.py [usuarios ...] [--variantes V1,V2,APP] [--repeticiones N] [--semilla N]
+    argumentos = sys.argv[1:]
+    opciones = {}
+    for nombre in ("--variantes", "--repeticiones", "--semilla"):
+        if nombre in argumentos:
+            i = argumentos.index(nombre)
+            opciones[nombre] = argumentos[i + 1]
+            del argumentos[i:i + 2]
+    tamanos = [int(a.replace("_", "")) for a in argumentos] or TAMANOS
+    main(
+        tamanos,
+        opciones.get("--variantes", ",".join(VARIANTES)).split(","),
+        int(opciones.get("--repeticiones", REPETICIONES)),
+        int(opciones.get("--semilla", SEMILLA)),
+    )
@@ -0,0 +1,90 @@
+import os
+import sys
+import tempfile
+import time
+from collections import deque
+
+import plotly.graph_objects as go
+from graphObj import CSRGraph
+from mapa_aristas import aristas_entre, trazas_aristas
+
+# =============================
+# Parámetros
+# =============================
+TAMANOS = [250, 500, 1000, 2000, 5000, 10000, 20000]  # Nodos de la muestra BFS
+LIMITE_SEGUNDOS = 60  # Un método deja de medirse cuando supera este tiempo
+
+
+def muestra_bfs(grafo, inicio, n):
+    visitados = set()
+    cola = deque([inicio])
+    while cola and len(visitados) < n:
+        u = cola.popleft()
+        if u in visitados or u not in grafo.locations:
+            continue
+        visitados.add(u)
+        cola.extend(v for v in grafo.get_neighbors(u) if v not in visitados)
+    return visitados
+
+
+def trazas_por_arista(grafo, nodos):
+    """Método anterior: una traza Scattergeo por arista."""
+    trazas = []
+    for u in nodos:
+        for v in grafo.get_neighbors(u):
+            if v in nodos:
+                lat1, lon1 = grafo.locations[u]
+                lat2, lon2 = grafo.locations[v]
+                trazas.append(go.Scattergeo(
+                    lon=[lon1, lon2, None],
+                    lat=[lat1, lat2, None],
+                    mode="lines",
+                    line=dict(width=0.3, color="gray"),
+                    hoverinfo="none",
+                    showlegend=False
+                ))
+    return trazas
+
+
+def traza_unica(grafo, nodos):
+    """Método nuevo: todas las aristas en una traza (mapa_aristas)."""
+    origenes, destinos, _ = aristas_entre(grafo, nodos)
+    return trazas_aristas(grafo, origenes, destinos)
+
+
+def medir(grafo, nodos, metodo, directorio):
+    inicio = time.time()
+    fig = go.Figure(metodo(grafo, nodos))
+    construir = time.time() - inicio
+
+    ruta = os.path.join(directorio, "mapa.html")
+    inicio = time.time()
+    fig.write_html(ruta)
+    escribir = time.time() - inicio
+    return len(fig.data), construir, escribir, os.path.getsize(ruta)
+
+
+if __name__ == "__main__":
+    grafo = CSRGraph.load("data/grafo")
+    # Nodo inicial: argumento o el de mayor grado de salida
+    inicio = int(sys.argv[1]) if len(sys.argv) > 1 else int(grafo.out_degree.argmax())
+
+    metodos = [("Una traza por arista", trazas_por_arista), ("Traza única (NumPy)", traza_unica)]
+    activos = {nombre for nombre, _ in metodos}
+
+    print(f"{'Nodos':>7} {'Método':<22}{'Trazas':>9}{'Construir (s)':>15}{'HTML (s)':>10}{'HTML (MB)':>11}")
+    with tempfile.TemporaryDirectory() as directorio:
+        for tamano in TAMANOS:
+            nodos = muestra_bfs(grafo, inicio, tamano)
+            for nombre, metodo in metodos:
+                if nombre not in activos:
+                    continue
+                trazas, construir, escribir, tamano_html = medir(grafo, nodos, metodo, directorio)
+                print(f"{len(nodos):>7,} {nombre:<22}{trazas:>9,}{construir:>15.2f}{escribir:>10.2f}"
+                      f"{tamano_html / 1024**2:>11.2f}")
+                if construir + escribir > LIMITE_SEGUNDOS:
+                    print(f"        ⏹️ '{nombre}' superó {LIMITE_SEGUNDOS} s: límite práctico ≈ {len(nodos):,} nodos")
+                    activos.discard(nombre)
+            if len(nodos) < tamano:
+                print(f"⚠️ El componente alcanzable tiene solo {len(nodos):,} nodos")
+                break
@@ -1,90 +1,77 @@
-import polars as pl
-import math
-import sys
-from pathlib import Path
-from logger_config import setup_logger
-
-# ======================
-# Configuración
-# ======================
-log = setup_logger()
-PARQUET_LOC = "data/ubicaciones_limpias.parquet"
-PARQUET_USER = "data/usuarios_conexiones.parquet"
-OUTPUT_DIR = Path("data/aristas_parquet")
-OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-BATCH_SIZE = 100_000
-
-# ======================
-# Distancia geográfica
-# ======================
-def haversine(lat1, lon1, lat2, lon2):
-    R = 6371
-    phi1, phi2 = math.radians(lat1), math.radians(lat2)
-    dphi = math.radians(lat2 - lat1)
-    dlambda = math.radians(lon2 - lon1)
-    a = math.sin(dphi/2)**2 + math.cos(phi1)*math.cos(phi2)*math.sin(dlambda/2)**2
-    return 2 * R * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-
-# ======================
-# Función principal
-# ======================
-def main():
-    try:
-        log.info("📦 Cargando ubicaciones desde Parquet...")
-        locs = pl.read_parquet(PARQUET_LOC)
-        coords = locs.to_dicts()
-        coord_map = {idx: (row["latitude"], row["longitude"]) for idx, row in enumerate(coords)}
-
-        log.info("📦 Cargando conexiones desde Parquet...")
-        users = pl.read_parquet(PARQUET_USER)
-
-        log.info("🔁 Generando aristas con pesos por lotes...")
-        batch, batch_num, total = [], 0, 0
-
-        for idx, row in enumerate(users.iter_rows()):
-            src = idx
-            vecinos = row[0]  # lista de strings
-            if not isinstance(vecinos, list):
-                continue
-
-            if src not in coord_map:
-                continue
-            lat1, lon1 = coord_map[src]
-
-            for v_str in vecinos:
-                try:
-                    tgt = int(v_str)
-                    if tgt not in coord_map:
-                        continue
-                    lat2, lon2 = coord_map[tgt]
-                    peso = haversine(lat1, lon1, lat2, lon2)
-                    batch.append((src, tgt, peso))
-                    total += 1
-                except ValueError:
-                    continue
-
-            if len(batch) >= BATCH_SIZE:
-                df = pl.DataFrame(batch, schema=["source", "target", "weight"])
-                output = OUTPUT_DIR / f"aristas_lote_{batch_num:03}.parquet"
-                df.write_parquet(str(output))
-                log.info(f"✅ Lote {batch_num} guardado con {len(batch):,} aristas")
-                batch = []
-                batch_num += 1
-
-            if idx % 50_000 == 0:
-                log.info(f"  → Procesados {idx:,} nodos")
-
-        if batch:
-            df = pl.DataFrame(batch, schema=["source", "target", "weight"])
-            output = OUTPUT_DIR / f"aristas_lote_{batch_num:03}.parquet"
-            df.write_parquet(str(output))
-            log.info(f"✅ Último lote {batch_num} guardado con {len(batch):,} aristas")
-
-        log.info(f"🎉 Proceso finalizado. Total aristas: {total:,}")
-
-    except Exception as e:
-        log.exception("❌ Error al generar el archivo de aristas.")
-        sys.exit(1)
-
-if __name__ == "__main__":
-    main()
+import polars as pl
+import sys
+import time
+from pathlib import Path
+from logger_config import setup_logger
+
+# ======================
+# Configuración
+# ======================
+log = setup_logger()
+PARQUET_LOC = "data/ubicaciones_limpias.parquet"
+PARQUET_USER = "data/usuarios_conexiones.parquet"
+OUTPUT_FINAL = Path("data/aristas_completo.parquet")
+RADIO_TIERRA_KM = 6371
+
+# ======================
+# Distancia geográfica (por columnas)
+# ======================
+def haversine_expr(lat1, lon1, lat2, lon2):
+    """Distancia Haversine en km como expresión de Polars (se evalúa sobre columnas completas)."""
+    phi1, phi2 = lat1.radians(), lat2.radians()
+    dphi = (lat2 - lat1).radians()
+    dlambda = (lon2 - lon1).radians()
+    a = (dphi / 2).sin() ** 2 + phi1.cos() * phi2.cos() * (dlambda / 2).sin() ** 2
+    return 2 * RADIO_TIERRA_KM * pl.arctan2(a.sqrt(), (1 - a).sqrt())
+
+# ======================
+# Plan de cálculo de aristas
+# ======================
+def plan_aristas(parquet_loc, parquet_user):
+    """Plan perezoso: explota las conexiones (listas UInt32), une coordenadas de origen y destino y calcula el peso."""
+    coords = (
+        pl.scan_parquet(parquet_loc)
+        # node_id viene de la ingesta (línea original): no se usa la posición dentro del archivo filtrado
+        .select(pl.col("node_id").cast(pl.Int64), "latitude", "longitude")
+    )
+    coords_src = coords.rename({"node_id": "source", "latitude": "lat1", "longitude": "lon1"})
+    coords_tgt = coords.rename({"node_id": "target", "latitude": "lat2", "longitude": "lon2"})
+
+    return (
+        pl.scan_parquet(parquet_user)
+        # node_id y connections ya vienen como enteros desde la ingesta: no hay texto que parsear
+        .explode("connections")
+        .select(
+            pl.col("node_id").cast(pl.Int64).alias("source"),
+            pl.col("connections").cast(pl.Int64).alias("target"),
+        )
+        .drop_nulls("target")  # Usuarios sin conexiones (lista vacía)
+        # Inner joins: se descartan orígenes o destinos sin ubicación válida
+        .join(coords_src, on="source", how="inner", maintain_order="left")
+        .join(coords_tgt, on="target", how="inner", maintain_order="left")
+        .select(
+            "source",
+            "target",
+            haversine_expr(pl.col("lat1"), pl.col("lon1"), pl.col("lat2"), pl.col("lon2")).alias("weight"),
+        )
+    )
+
+# ======================
+# Función principal
+# ======================
+def main():
+    try:
+        inicio = time.time()
+        log.info("🔁 Calculando aristas con pesos (Polars, por columnas y en streaming)...")
+        plan_aristas(PARQUET_LOC, PARQUET_USER).sink_parquet(OUTPUT_FINAL)
+
+        total = pl.scan_parquet(OUTPUT_FINAL).select(pl.len()).collect().item()
+        log.info(f"✅ Archivo final guardado: {OUTPUT_FINAL}")
+        log.info(f"🎉 Proceso finalizado en {time.time() - inicio:.2f} s. Total aristas: {total:,}")
+
+    except Exception as e:
+        log.exception("❌ Error al generar el archivo de aristas.")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+import gc
+import time
+import tracemalloc
+
+import polars as pl
+from graphObj import Graph, CSRGraph
+
+# =============================
+# Parámetros
+# =============================
+PATH_ARISTAS = "data/aristas_completo.parquet"
+LIMITE_ARISTAS = None   # p. ej. 5_000_000 para una prueba rápida (None = todas)
+LOTE = 1_000_000
+
+
+def cargar_en(grafo, df_aristas):
+    for inicio in range(0, df_aristas.height, LOTE):
+        lote = df_aristas.slice(inicio, LOTE)
+        for u, v, w in zip(lote["source"].to_list(), lote["target"].to_list(), lote["weight"].to_list()):
+            grafo.add_edge(u, v, w)
+    grafo.num_edges()  # fuerza la compactación en CSRGraph
+    return grafo
+
+
+def medir(nombre, clase, df_aristas):
+    gc.collect()
+    tracemalloc.start()
+    inicio = time.time()
+    grafo = cargar_en(clase(), df_aristas)
+    tiempo = time.time() - inicio
+    gc.collect()
+    actual, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"\n🧪 {nombre}")
+    print(f"  Aristas          : {grafo.num_edges():,}")
+    print(f"  Nodos con salida : {grafo.num_nodes():,}")
+    print(f"  Memoria final    : {actual / 1024**2:,.1f} MB")
+    print(f"  Pico construcción: {pico / 1024**2:,.1f} MB")
+    print(f"  Tiempo           : {tiempo:.2f} s")
+    del grafo
+    return actual
+
+
+if __name__ == "__main__":
+    print("📥 Leyendo aristas ponderadas desde .parquet...")
+    df = pl.read_parquet(PATH_ARISTAS, n_rows=LIMITE_ARISTAS)
+    print(f"  → {df.height:,} aristas")
+
+    mem_dict = medir("Graph (dict de listas de tuplas)", Graph, df)
+    mem_csr = medir("CSRGraph (indptr int64 / indices int32 / weights float32)", CSRGraph, df)
+
+    print(f"\n📉 Reducción de memoria: {mem_dict / max(mem_csr, 1):.1f}x "
+          f"({(mem_dict - mem_csr) / 1024**2:,.1f} MB menos)")
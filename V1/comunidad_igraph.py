@@ -1,50 +1,152 @@
-import pickle
-import igraph as ig
-from graphObj import Graph
-
-# =============================
-# Paso 1: Cargar tu grafo .pkl
-# =============================
-with open("data/grafo_guardado.pkl", "rb") as f:
-    grafo = pickle.load(f)
-
-# =============================
-# Paso 2: Convertir a igraph
-# =============================
-edges = []
-for u, vecinos in grafo.adj.items():
-    for v in vecinos:
-        edges.append((u, v))
-
-# Total de nodos (usa los con ubicaciones)
-n_total = max(grafo.locations.keys()) + 1  # Suponiendo IDs consecutivos
-
-g = ig.Graph(n=n_total, edges=edges, directed=True)
-
-# =============================
-# Paso 3: Detectar comunidades
-# =============================
-# Convertimos el grafo a no-dirigido para Louvain
-g_undirected = g.as_undirected()
-
-print("🔍 Detectando comunidades (Louvain)...")
-louvain = g_undirected.community_multilevel()
-print(f"✅ Se detectaron {len(louvain)} comunidades.")
-
-# =============================
-# Paso 4: Asignar comunidad a cada nodo
-# =============================
-comunidades = {}
-for comunidad_id, members in enumerate(louvain):
-    for node_id in members:
-        comunidades[node_id] = comunidad_id
-
-# Guardamos dentro del grafo
-grafo.comunidades = comunidades
-
-# =============================
-# Paso 5: Guardar el grafo actualizado
-# =============================
-with open("data/grafo_con_comunidades.pkl", "wb") as f:
-    pickle.dump(grafo, f)
-    print("💾 Grafo con comunidades guardado como 'grafo_con_comunidades.pkl'")
\ No newline at end of file
+import resource
+import sys
+import time
+
+import igraph as ig
+import numpy as np
+import polars as pl
+from graphObj import CSRGraph
+from comunidades_io import USAR_PESOS, guardar_comunidades, nombre_corrida
+
+# =============================
+# Parámetros
+# =============================
+RUTA_GRAFO = "data/grafo"
+RUTA_ARISTAS = "data/aristas_completo.parquet"
+RUTA_UBICACIONES = "data/ubicaciones_limpias.parquet"
+FUENTE = "grafo"     # "grafo" (arreglos CSR en mmap) o "parquet" (tabla de aristas)
+
+# Nombre de la corrida en data/comunidades.parquet ("louvain_ponderado" con --con-pesos)
+CORRIDA = "louvain"
+
+
+def pico_rss_mb():
+    """Pico de memoria residente del proceso (ru_maxrss está en KB en Linux)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+# =============================
+# Extremos de las aristas como arreglos NumPy contiguos
+# =============================
+def aristas_desde_grafo(ruta=RUTA_GRAFO, con_pesos=USAR_PESOS):
+    """Origen, destino y peso (None sin `con_pesos`) de los arreglos CSR, sin copiarlos."""
+    grafo = CSRGraph.load(ruta)
+    return grafo.edge_sources(), grafo.indices, grafo.weights if con_pesos else None, grafo.num_ids
+
+
+def aristas_desde_parquet(ruta=RUTA_ARISTAS, ruta_ubicaciones=RUTA_UBICACIONES, con_pesos=USAR_PESOS):
+    """Origen, destino y peso (None sin `con_pesos`) leídos directamente de la tabla de aristas."""
+    # Sin pesos la columna weight ni se lee
+    df = pl.read_parquet(ruta, columns=["source", "target", "weight"] if con_pesos else ["source", "target"]).drop_nulls()
+    # Los IDs son node_id (línea original), no posiciones: el espacio llega hasta el mayor node_id
+    n_ubicaciones = pl.scan_parquet(ruta_ubicaciones).select(pl.col("node_id").max()).collect().item()
+    n_ubicaciones = 0 if n_ubicaciones is None else int(n_ubicaciones) + 1
+    origenes = df["source"].to_numpy()
+    destinos = df["target"].to_numpy()
+    n_total = max(n_ubicaciones, int(max(origenes.max(), destinos.max())) + 1 if df.height else 0)
+    return origenes, destinos, df["weight"].to_numpy() if con_pesos else None, n_total
+
+
+def colapsar_no_dirigido(origenes, destinos, pesos, n_total):
+    """Una sola arista por par {u, v}, igual que as_undirected(mode="collapse").
+
+    Cada arista se codifica como min(u, v) * n + max(u, v) en un int64; ordenar y quitar
+    duplicados sobre esa clave reemplaza la copia que hacía as_undirected().
+    """
+    claves = np.minimum(origenes, destinos).astype(np.int64)
+    claves *= n_total
+    claves += np.maximum(origenes, destinos)
+
+    # Sin pesos basta ordenar las claves en su lugar; con pesos hace falta el índice int64
+    # del argsort (8 B por arista) y una copia reordenada de los pesos
+    if pesos is None:
+        claves.sort()
+    else:
+        orden = np.argsort(claves, kind="stable")
+        claves = claves[orden]
+        pesos = np.asarray(pesos)[orden]
+        del orden
+
+    nuevas = np.empty(len(claves), dtype=bool)
+    nuevas[:1] = True
+    np.not_equal(claves[1:], claves[:-1], out=nuevas[1:])
+    claves = claves[nuevas]
+    if pesos is not None:
+        pesos = pesos[nuevas]
+
+    extremos = np.empty((len(claves), 2), dtype=np.int64)
+    np.floor_divide(claves, n_total, out=extremos[:, 0])
+    np.remainder(claves, n_total, out=extremos[:, 1])
+    return extremos, pesos
+
+
+def construir_igraph(origenes, destinos, pesos, n_total):
+    """Grafo no dirigido de igraph a partir de los arreglos, con el peso como atributo 'weight'."""
+    extremos, pesos = colapsar_no_dirigido(origenes, destinos, pesos, n_total)
+    # add_edges sobre un grafo vacío en lugar de Graph(edges=...): con un ndarray el
+    # constructor deja un transitorio de ~140 B por arista, add_edges menos de la mitad
+    g = ig.Graph(n=n_total, directed=False)
+    g.add_edges(extremos)
+    del extremos
+    if pesos is not None:
+        g.es["weight"] = pesos
+    return g
+
+
+def construir_igraph_tuplas(ruta=RUTA_GRAFO):
+    """Construcción anterior (lista de tuplas + as_undirected), solo para comparar memoria."""
+    grafo = CSRGraph.load(ruta)
+    edges = []
+    for u, vecinos in grafo.adj.items():
+        for v, _ in vecinos:
+            edges.append((u, v))
+    g = ig.Graph(n=grafo.num_ids, edges=edges, directed=True)
+    return g.as_undirected()
+
+
+if __name__ == "__main__":
+    # `python comunidad_igraph.py --tuplas` usa la construcción anterior para comparar el pico de RSS
+    # `--con-pesos`: Louvain ponderado con la distancia (ver USAR_PESOS en comunidades_io.py)
+    modo_tuplas = "--tuplas" in sys.argv
+    con_pesos = USAR_PESOS or "--con-pesos" in sys.argv
+    corrida = nombre_corrida(CORRIDA, con_pesos)
+    print(f"📏 Pico de RSS inicial: {pico_rss_mb():,.1f} MB")
+
+    # =============================
+    # Paso 1 y 2: Cargar las aristas y construir el grafo de igraph
+    # =============================
+    inicio = time.time()
+    if modo_tuplas:
+        print("🐢 Construyendo igraph con la lista de tuplas (modo de comparación)...")
+        g = construir_igraph_tuplas()
+    else:
+        print(f"📥 Cargando aristas desde '{RUTA_GRAFO if FUENTE == 'grafo' else RUTA_ARISTAS}'...")
+        if FUENTE == "grafo":
+            origenes, destinos, pesos, n_total = aristas_desde_grafo(con_pesos=con_pesos)
+        else:
+            origenes, destinos, pesos, n_total = aristas_desde_parquet(con_pesos=con_pesos)
+        g = construir_igraph(origenes, destinos, pesos, n_total)
+        del origenes, destinos, pesos
+    print(f"✅ igraph: {g.vcount():,} nodos, {g.ecount():,} aristas no dirigidas "
+          f"en {time.time() - inicio:.2f} s")
+    print(f"📏 Pico de RSS tras construir el grafo: {pico_rss_mb():,.1f} MB")
+
+    # =============================
+    # Paso 3: Detectar comunidades
+    # =============================
+    pesos_louvain = "weight" if con_pesos and "weight" in g.es.attributes() else None
+    print(f"🔍 Detectando comunidades (Louvain{', ponderado' if pesos_louvain else ''})...")
+    louvain = g.community_multilevel(weights=pesos_louvain)
+    print(f"✅ Se detectaron {len(louvain)} comunidades.")
+    print(f"📏 Pico de RSS tras la detección: {pico_rss_mb():,.1f} MB")
+
+    # =============================
+    # Paso 4: Comunidad de cada nodo (membership ya está indexado por node_id)
+    # =============================
+    etiquetas = np.asarray(louvain.membership, dtype=np.int32)
+
+    # =============================
+    # Paso 5: Guardar las comunidades como columna aparte
+    # =============================
+    guardar_comunidades(etiquetas, corrida)
+    print(f"💾 Comunidades guardadas como corrida '{corrida}' en 'data/comunidades.parquet'")
@@ -0,0 +1,78 @@
+import os
+
+import numpy as np
+import polars as pl
+
+# =============================
+# Almacén de comunidades: un Parquet con la columna node_id y una
+# columna Int32 por corrida (louvain, louvain_propio, louvain_r0.5, ...)
+# =============================
+RUTA_COMUNIDADES = "data/comunidades.parquet"
+
+# Louvain corre sin pesos salvo que se pida con --con-pesos (comunidad_igraph.py y
+# asignar_comunidad.py). El peso de las aristas es la distancia haversine en km, un costo:
+# en modularidad un peso mayor es un vínculo más fuerte, así que usarla cruda haría pesar
+# más a las conexiones lejanas. Las corridas ponderadas llevan el sufijo "_ponderado" y
+# nunca se mezclan con las sin pesos.
+USAR_PESOS = False
+
+
+def nombre_corrida(base, con_pesos):
+    """Nombre de la corrida en data/comunidades.parquet: `base` o `base_ponderado`."""
+    return f"{base}_ponderado" if con_pesos else base
+
+
+def listar_corridas(ruta=RUTA_COMUNIDADES):
+    """Nombres de las corridas guardadas (columnas distintas de node_id)."""
+    if not os.path.exists(ruta):
+        return []
+    return [c for c in pl.read_parquet_schema(ruta) if c != "node_id"]
+
+
+def guardar_comunidades(etiquetas, nombre, ruta=RUTA_COMUNIDADES):
+    """Guarda (o reemplaza) la corrida `nombre`.
+
+    `etiquetas` es un arreglo indexado por node_id (-1 = sin comunidad) o un dict nodo -> comunidad.
+    Las demás corridas del archivo se conservan.
+    """
+    if isinstance(etiquetas, dict):
+        nodos = np.fromiter(etiquetas.keys(), dtype=np.int64, count=len(etiquetas))
+        arreglo = np.full(int(nodos.max()) + 1 if len(nodos) else 0, -1, dtype=np.int32)
+        arreglo[nodos] = np.fromiter(etiquetas.values(), dtype=np.int32, count=len(etiquetas))
+        etiquetas = arreglo
+    etiquetas = np.asarray(etiquetas, dtype=np.int32)
+
+    nueva = pl.DataFrame({
+        "node_id": np.arange(len(etiquetas), dtype=np.int32),
+        nombre: etiquetas,
+    })
+
+    if os.path.exists(ruta):
+        existentes = pl.read_parquet(ruta)
+        if nombre in existentes.columns:
+            existentes = existentes.drop(nombre)
+        nueva = (
+            existentes.join(nueva, on="node_id", how="full", coalesce=True)
+            .sort("node_id")
+            .fill_null(-1)
+        )
+
+    os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+    temporal = ruta + ".tmp"
+    nueva.write_parquet(temporal)
+    os.replace(temporal, ruta)
+
+
+def cargar_comunidades(nombre, ruta=RUTA_COMUNIDADES):
+    """Devuelve la corrida `nombre` como arreglo int32 indexado por node_id (-1 = sin comunidad)."""
+    corridas = listar_corridas(ruta)
+    if nombre not in corridas:
+        raise ValueError(
+            f"❌ No existe la corrida de comunidades '{nombre}' en '{ruta}'. "
+            f"Disponibles: {corridas or 'ninguna (debes calcularlas primero)'}"
+        )
+    df = pl.read_parquet(ruta, columns=["node_id", nombre])
+    nodos = df["node_id"].to_numpy()
+    etiquetas = np.full(int(nodos.max()) + 1 if len(nodos) else 0, -1, dtype=np.int32)
+    etiquetas[nodos] = df[nombre].to_numpy()
+    return etiquetas
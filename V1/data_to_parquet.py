@@ -1,111 +1,172 @@
-# Importación de bibliotecas necesarias
-import polars as pl
-import logging
-import sys
-from pathlib import Path
-
-# --------------------------
-# Configurar logging
-# --------------------------
-from logger_config import setup_logger
-
-# Inicialización del logger personalizado
-log = setup_logger()
-
-LOCATION = "data/10_million_location.txt"
-USER = "data/10_million_user.txt"
-
-# --------------------------
-# Función principal
-# --------------------------
-def main():
-    try:
-        # Log de inicio de carga de ubicaciones usando lectura perezosa (lazy)
-        log.info(" Cargando ubicaciones en modo streaming (lazy)...")
-
-        # Cargar archivo de ubicaciones usando polars en modo scan_csv (streaming/lazy)
-        locations_lazy = pl.scan_csv(
-            LOCATION,  # Ruta al archivo
-            separator=",",  # Separador de columnas
-            has_header=False,  # El archivo no tiene encabezados
-            new_columns=["latitude", "longitude"]  # Nombres de columnas asignados
-        )
-
-        # Log de inicio de carga de usuarios/conexiones
-        log.info(" Cargando usuarios (adyacencias) en modo streaming (lazy)...")
-
-        # Cargar archivo de conexiones de usuarios
-        users_lazy = pl.scan_csv(
-            USER,  # Ruta al archivo
-            separator="\n",  # Cada línea es una fila con una sola columna
-            has_header=False,  # Sin encabezado
-            new_columns=["connections"],  # Nombre asignado a la columna
-            truncate_ragged_lines=True  # Ignora líneas que no cumplen el formato esperado
-        )
-
-        # --------------------------
-        # Limpieza y validaciones
-        # --------------------------
-        log.info(" Validando datos de ubicación...")
-
-        # Filtrar ubicaciones con latitudes y longitudes válidas
-        locations_valid = locations_lazy.filter(
-            (pl.col("latitude").cast(pl.Float64) >= -90) & 
-            (pl.col("latitude").cast(pl.Float64) <= 90) &
-            (pl.col("longitude").cast(pl.Float64) >= -180) & 
-            (pl.col("longitude").cast(pl.Float64) <= 180)
-        )
-
-        # Log de procesamiento de conexiones
-        log.info(" Procesando listas de conexiones...")
-
-        # Limpiar y convertir strings de conexiones a listas
-        users_processed = users_lazy.with_columns([
-            pl.col("connections")
-            .str.strip_chars()  # Eliminar espacios u otros caracteres
-            .str.split(",")     # Separar por comas y convertir en listas
-        ])
-
-        # --------------------------
-        # Ejecutar el plan (collect)
-        # --------------------------
-        log.info(" Ejecutando procesamiento de ubicaciones (esto puede tardar un poco)...")
-
-        # Ejecutar la carga perezosa y recolectar el resultado en memoria
-        locations_final = locations_valid.collect(engine="streaming")
-
-        # Mostrar tamaño final de ubicaciones procesadas
-        log.info(f" Ubicaciones válidas: {locations_final.shape}")
-
-        # Ejecutar procesamiento de usuarios y recolectar
-        log.info(" Ejecutando procesamiento de usuarios...")
-        users_final = users_processed.collect(engine="streaming")
-
-        # Mostrar tamaño final de conexiones procesadas
-        log.info(f" Usuarios procesados: {users_final.shape}")
-
-        # --------------------------
-        # Guardar los resultados
-        # --------------------------
-        log.info(" Guardando archivos .parquet...")
-
-        # Guardar ubicaciones validadas en formato Parquet
-        locations_final.write_parquet("data/ubicaciones_limpias.parquet")
-
-        # Guardar conexiones procesadas en formato Parquet
-        users_final.write_parquet("data/usuarios_conexiones.parquet")
-
-        # Mensaje final de éxito
-        log.info(" Preprocesamiento terminado (eficiente y escalable).")
-
-    except Exception as e:
-        # Captura de errores y log del fallo
-        log.exception(" Ocurrió un error crítico durante el preprocesamiento.")
-        sys.exit(1)
-
-# --------------------------
-# Entry point
-# --------------------------
-# Ejecutar función principal si el script es ejecutado directamente
-if __name__ == "__main__":
-    main()
\ No newline at end of file
+# Importación de bibliotecas necesarias
+import polars as pl
+import json
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+from ingesta_paralela import ingerir_adyacencias
+
+# --------------------------
+# Configurar logging
+# --------------------------
+from logger_config import setup_logger
+
+# Inicialización del logger personalizado
+log = setup_logger()
+
+LOCATION = "data/10_million_location.txt"
+USER = "data/10_million_user.txt"
+UBICACIONES = "data/ubicaciones_limpias.parquet"
+RECHAZADAS = "data/ubicaciones_rechazadas.parquet"
+CONEXIONES = "data/usuarios_conexiones.parquet"
+ESTADISTICAS = "data/ingesta_stats.json"  # Conteos, rechazos y extremos de la ingesta
+PROCESOS = os.cpu_count() or 1  # Procesos que parsean el archivo de adyacencias
+FILAS_POR_GRUPO = 128 * 1024  # Filas por row group de los .parquet de salida
+COMPRESION = "zstd"           # Códec de los .parquet de salida
+
+# --------------------------
+# Función principal
+# --------------------------
+def main(filas_por_grupo=FILAS_POR_GRUPO, compresion=COMPRESION):
+    try:
+        inicio = time.time()
+        # Log de inicio de carga de ubicaciones usando lectura perezosa (lazy)
+        log.info(" Cargando ubicaciones en modo streaming (lazy)...")
+
+        # Cargar archivo de ubicaciones usando polars en modo scan_csv (streaming/lazy)
+        locations_lazy = pl.scan_csv(
+            LOCATION,  # Ruta al archivo
+            separator=",",  # Separador de columnas
+            has_header=False,  # El archivo no tiene encabezados
+            new_columns=["latitude", "longitude"],  # Nombres de columnas asignados
+            # Como texto: un valor no numérico va a rechazadas en vez de frenar la lectura
+            schema={"latitude": pl.String, "longitude": pl.String},
+        )
+
+        # --------------------------
+        # Limpieza y validaciones
+        # --------------------------
+        log.info(" Validando datos de ubicación...")
+
+        # node_id = número de línea, el mismo que usa 10_million_user.txt. Se asigna antes de
+        # filtrar: descartar una fila ya no corre los IDs de todos los usuarios siguientes
+        locations_checked = locations_lazy.with_row_index("node_id").with_columns(
+            pl.col("latitude").str.strip_chars().cast(pl.Float64, strict=False).alias("lat"),
+            pl.col("longitude").str.strip_chars().cast(pl.Float64, strict=False).alias("lon"),
+        ).with_columns(
+            pl.when(pl.col("lat").is_null() | pl.col("lon").is_null()).then(pl.lit("no_numerico"))
+            .when(~pl.col("lat").is_between(-90, 90) | ~pl.col("lon").is_between(-180, 180))
+            .then(pl.lit("fuera_de_rango"))
+            .alias("motivo")  # null = ubicación válida
+        )
+        valida = pl.col("motivo").is_null()
+
+        # Válidas con coordenadas numéricas; rechazadas con el texto original y el motivo
+        locations_final = locations_checked.filter(valida).select(
+            "node_id", pl.col("lat").alias("latitude"), pl.col("lon").alias("longitude")
+        )
+        locations_rejected = locations_checked.filter(~valida).select("node_id", "latitude", "longitude", "motivo")
+
+        # Estadísticas para el archivo de resumen, calculadas sobre el mismo recorrido
+        locations_stats = locations_checked.select(
+            pl.len().alias("filas"),
+            valida.sum().alias("validas"),
+            (pl.col("motivo") == "no_numerico").sum().alias("no_numerico"),
+            (pl.col("motivo") == "fuera_de_rango").sum().alias("fuera_de_rango"),
+            pl.col("lat").filter(valida).min().alias("lat_min"),
+            pl.col("lat").filter(valida).max().alias("lat_max"),
+            pl.col("lon").filter(valida).min().alias("lon_min"),
+            pl.col("lon").filter(valida).max().alias("lon_max"),
+        )
+
+        # --------------------------
+        # Ejecutar el plan en streaming
+        # --------------------------
+        log.info(f" Escribiendo ubicaciones en streaming ({filas_por_grupo:,} filas por row group, {compresion})...")
+
+        # Un solo plan con las dos escrituras y las estadísticas: el CSV se lee una vez y
+        # nunca está completo en memoria (sink_parquet escribe por lotes)
+        *_, stats = pl.collect_all(
+            [
+                locations_final.sink_parquet(UBICACIONES, compression=compresion,
+                                             row_group_size=filas_por_grupo, lazy=True),
+                locations_rejected.sink_parquet(RECHAZADAS, compression=compresion,
+                                                row_group_size=filas_por_grupo, lazy=True),
+                locations_stats,
+            ],
+            engine="streaming",
+        )
+        stats = stats.row(0, named=True)
+
+        # Mostrar tamaño final de ubicaciones procesadas
+        rechazadas = stats["filas"] - stats["validas"]
+        log.info(f" Ubicaciones válidas: {stats['validas']:,}, rechazadas: {rechazadas:,}")
+
+        # Conexiones: el archivo se parte en rangos de bytes que se parsean en paralelo a
+        # listas UInt32 con su node_id; ningún script posterior vuelve a convertir texto
+        log.info(f" Procesando listas de conexiones en {PROCESOS} procesos...")
+        resumen = ingerir_adyacencias(USER, CONEXIONES, procesos=PROCESOS, compresion=compresion,
+                                      filas_por_grupo=filas_por_grupo)
+        log.info(f" Usuarios procesados: {resumen['filas']:,} con {resumen['ids']:,} conexiones "
+                 f"({resumen['partes']} rangos, {resumen['invalidos']:,} ids inválidos descartados)")
+
+        # --------------------------
+        # Archivo de estadísticas
+        # --------------------------
+        estadisticas = {
+            "ubicaciones": {
+                "filas": stats["filas"],
+                "validas": stats["validas"],
+                "rechazadas": rechazadas,
+                "rechazos_por_motivo": {"no_numerico": stats["no_numerico"], "fuera_de_rango": stats["fuera_de_rango"]},
+                "latitud": {"min": stats["lat_min"], "max": stats["lat_max"]},
+                "longitud": {"min": stats["lon_min"], "max": stats["lon_max"]},
+            },
+            "conexiones": {
+                "filas": resumen["filas"],
+                "ids": resumen["ids"],
+                "ids_invalidos": resumen["invalidos"],
+                "id_seguido": {"min": resumen["id_min"], "max": resumen["id_max"]},
+            },
+            "parquet": {"filas_por_grupo": filas_por_grupo, "compresion": compresion},
+            "duracion_s": round(time.time() - inicio, 2),
+        }
+        with open(ESTADISTICAS, "w", encoding="utf-8") as f:
+            json.dump(estadisticas, f, indent=2)
+        if resumen["filas"] != stats["filas"]:
+            log.warning(f" ⚠️ {resumen['filas']:,} usuarios con conexiones y {stats['filas']:,} ubicaciones: "
+                        "los archivos crudos no tienen la misma cantidad de líneas.")
+
+        # Mensaje final de éxito
+        log.info(f" Preprocesamiento terminado (eficiente y escalable). Resumen en {ESTADISTICAS}")
+
+    except Exception as e:
+        # Captura de errores y log del fallo
+        log.exception(" Ocurrió un error crítico durante el preprocesamiento.")
+        sys.exit(1)
+
+
+def _opcion(argumentos, nombre, tipo, defecto):
+    """Valor de `--nombre N` (o `defecto`); lo quita de `argumentos`."""
+    if nombre not in argumentos:
+        return defecto
+    i = argumentos.index(nombre)
+    if i + 1 >= len(argumentos):
+        raise SystemExit(f"❌ Falta el valor de {nombre}.")
+    valor = tipo(argumentos[i + 1])
+    del argumentos[i:i + 2]
+    return valor
+
+# --------------------------
+# Entry point
+# --------------------------
+# Ejecutar función principal si el script es ejecutado directamente
+# Uso: python data_to_parquet.py [--filas-por-grupo N] [--compresion zstd|snappy|lz4|gzip|uncompressed]
+if __name__ == "__main__":
+    argumentos = sys.argv[1:]
+    main(
+        filas_por_grupo=_opcion(argumentos, "--filas-por-grupo", lambda v: int(v.replace("_", "")), FILAS_POR_GRUPO),
+        compresion=_opcion(argumentos, "--compresion", str, COMPRESION),
+    )
\ No newline at end of file
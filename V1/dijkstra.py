@@ -1,129 +1,325 @@
-import heapq
-import pickle
-from graphObj import Graph
-import time
-import plotly.graph_objects as go
-# Cargar grafo
-with open("data/grafo_con_comunidades.pkl", "rb") as f:
-    grafo = pickle.load(f)
-
-def dijkstra(graph, start, goal):
-    dist = {start: 0}
-    prev = {}
-    visited = set()
-    heap = [(0, start)]
-
-    while heap:
-        current_dist, u = heapq.heappop(heap)
-        if u in visited:
-            continue
-        visited.add(u)
-
-        if u == goal:
-            break
-
-        for v, weight in graph.adj.get(u, []):
-            if v in visited:
-                continue
-            new_dist = current_dist + weight
-            if new_dist < dist.get(v, float('inf')):
-                dist[v] = new_dist
-                prev[v] = u
-                heapq.heappush(heap, (new_dist, v))
-
-    # Reconstruir camino
-    if goal not in dist:
-        return None, float('inf')  # No hay camino
-
-    path = []
-    current = goal
-    while current != start:
-        path.append(current)
-        current = prev[current]
-    path.append(start)
-    path.reverse()
-    return path, dist[goal]
-
-# ====================
-# 🧪 Prueba
-# ====================
-origen = 2572385
-destino = 942391
-
-inicio = time.time()
-path, costo = dijkstra(grafo, origen, destino)
-tiempo = time.time() - inicio
-
-if path:
-    print(f"✅ Camino más corto ({len(path)} nodos, costo total: {costo:.2f}):")
-    print(" → ".join(map(str, path[:10])), "...")  # Imprime solo los primeros 10 si es muy largo
-    print(f"Tiempo transcurrido: {tiempo:.4f} segundos")
-else:
-    print("❌ No hay camino entre los nodos.")
-
-
-# =============================
-# 🗺️ Construcción del mapa
-# =============================
-lats, lons = [], []
-for nodo in path:
-    if nodo in grafo.locations:
-        lat, lon = grafo.locations[nodo]
-        lats.append(lat)
-        lons.append(lon)
-
-# ➤ Traza del camino
-path_trace = go.Scattergeo(
-    lat=lats,
-    lon=lons,
-    mode="lines+markers",
-    line=dict(width=2, color="orange"),
-    marker=dict(size=5, color="orange"),
-    name="Camino más corto",
-    hoverinfo="text",
-    text=[f"ID: {nid}" for nid in path]
-)
-
-# ➤ Nodo origen
-lat_o, lon_o = grafo.locations[origen]
-origen_trace = go.Scattergeo(
-    lat=[lat_o],
-    lon=[lon_o],
-    mode="markers+text",
-    marker=dict(size=10, color="blue", symbol="circle"),
-    text=["Origen"],
-    textposition="bottom center",
-    name="Origen"
-)
-
-# ➤ Nodo destino
-lat_d, lon_d = grafo.locations[destino]
-destino_trace = go.Scattergeo(
-    lat=[lat_d],
-    lon=[lon_d],
-    mode="markers+text",
-    marker=dict(size=10, color="red", symbol="circle"),
-    text=["Destino"],
-    textposition="bottom center",
-    name="Destino"
-)
-
-# ➤ Mostrar figura
-fig = go.Figure([path_trace, origen_trace, destino_trace])
-
-fig.update_geos(
-    showland=True,
-    landcolor="rgb(240,240,240)",
-    oceancolor="rgb(210, 230, 255)",
-    showocean=True,
-    showcountries=True,
-    countrycolor="black"
-)
-
-fig.update_layout(
-    title=f"Camino más corto entre {origen} y {destino} (costo: {costo:.2f})",
-    margin=dict(l=0, r=0, t=40, b=0)
-)
-
-fig.write_html("graficos/dijkstra/camino_mas_corto.html")
-fig.show()
\ No newline at end of file
+import heapq
+import math
+import random
+import sys
+from graphObj import CSRGraph
+import time
+import numpy as np
+import plotly.graph_objects as go
+
+RADIO_TIERRA_KM = 6371  # Mismo radio que calc_weight.py
+# Los pesos se guardan en float32: la heurística se reduce un poco para que nunca supere
+# el costo real redondeado y siga siendo admisible
+MARGEN_HEURISTICA = 1 - 1e-6
+
+
+def dijkstra(graph, start, goal, stats=None):
+    dist = {start: 0}
+    prev = {}
+    visited = set()
+    heap = [(0, start)]
+
+    while heap:
+        current_dist, u = heapq.heappop(heap)
+        if u in visited:
+            continue
+        visited.add(u)
+
+        if u == goal:
+            break
+
+        for v, weight in graph.adj.get(u, []):
+            if v in visited:
+                continue
+            new_dist = current_dist + weight
+            if new_dist < dist.get(v, float('inf')):
+                dist[v] = new_dist
+                prev[v] = u
+                heapq.heappush(heap, (new_dist, v))
+
+    if stats is not None:
+        stats["asentados"] = len(visited)
+    return _reconstruir(prev, dist, start, goal)
+
+
+def _reconstruir(prev, dist, start, goal):
+    # Reconstruir camino
+    if goal not in dist:
+        return None, float('inf')  # No hay camino
+
+    path = []
+    current = goal
+    while current != start:
+        path.append(current)
+        current = prev[current]
+    path.append(start)
+    path.reverse()
+    return path, dist[goal]
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    """Distancia en km entre dos puntos (misma fórmula que los pesos de las aristas)."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = math.radians(lat2 - lat1)
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * RADIO_TIERRA_KM * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+
+def astar(graph, start, goal, stats=None):
+    """A* con la distancia haversine al destino como heurística (admisible: los pesos son km).
+
+    Mismo contrato que dijkstra(): devuelve (camino, costo). Los nodos sin ubicación usan
+    heurística 0, que sigue siendo admisible.
+    """
+    locations = graph.locations
+    if goal not in locations:
+        return dijkstra(graph, start, goal, stats)
+    lat_g, lon_g = locations[goal]
+
+    h = {}
+
+    def heuristica(u):
+        if u not in h:
+            loc = locations.get(u)
+            h[u] = haversine(loc[0], loc[1], lat_g, lon_g) * MARGEN_HEURISTICA if loc else 0.0
+        return h[u]
+
+    dist = {start: 0}
+    prev = {}
+    visited = set()
+    heap = [(heuristica(start), start)]
+
+    while heap:
+        _, u = heapq.heappop(heap)
+        if u in visited:
+            continue
+        visited.add(u)
+
+        if u == goal:
+            break
+
+        current_dist = dist[u]
+        for v, weight in graph.adj.get(u, []):
+            if v in visited:
+                continue
+            new_dist = current_dist + weight
+            if new_dist < dist.get(v, float('inf')):
+                dist[v] = new_dist
+                prev[v] = u
+                heapq.heappush(heap, (new_dist + heuristica(v), v))
+
+    if stats is not None:
+        stats["asentados"] = len(visited)
+    return _reconstruir(prev, dist, start, goal)
+
+
+def dijkstra_bidireccional(graph, start, goal, stats=None):
+    """Dijkstra simultáneo hacia adelante (adj) y hacia atrás (radj, aristas entrantes).
+
+    Se detiene cuando la suma de los mínimos de ambas colas ya no puede mejorar el mejor
+    camino encontrado (mu). Mismo contrato que dijkstra(): devuelve (camino, costo).
+    """
+    if start == goal:
+        if stats is not None:
+            stats["asentados"] = 0
+        return [start], 0
+
+    # Índice 0: búsqueda hacia adelante, índice 1: hacia atrás
+    vecinos = (graph.adj, graph.radj)
+    dist = ({start: 0}, {goal: 0})
+    prev = ({}, {})
+    visited = (set(), set())
+    heaps = ([(0, start)], [(0, goal)])
+    mejor = float('inf')
+    encuentro = None
+
+    while heaps[0] and heaps[1]:
+        if heaps[0][0][0] + heaps[1][0][0] >= mejor:
+            break
+
+        # Se expande el lado con la menor distancia en el tope de su cola
+        lado = 0 if heaps[0][0][0] <= heaps[1][0][0] else 1
+        otro = 1 - lado
+        current_dist, u = heapq.heappop(heaps[lado])
+        if u in visited[lado]:
+            continue
+        visited[lado].add(u)
+
+        for v, weight in vecinos[lado].get(u, []):
+            if v in visited[lado]:
+                continue
+            new_dist = current_dist + weight
+            if new_dist < dist[lado].get(v, float('inf')):
+                dist[lado][v] = new_dist
+                prev[lado][v] = u
+                heapq.heappush(heaps[lado], (new_dist, v))
+                if v in dist[otro] and new_dist + dist[otro][v] < mejor:
+                    mejor = new_dist + dist[otro][v]
+                    encuentro = v
+
+    if stats is not None:
+        stats["asentados"] = len(visited[0]) + len(visited[1])
+    if encuentro is None:
+        return None, float('inf')  # No hay camino
+
+    path, _ = _reconstruir(prev[0], dist[0], start, encuentro)
+    current = encuentro
+    while current != goal:
+        current = prev[1][current]
+        path.append(current)
+    return path, mejor
+
+
+def benchmark(grafo, pares=100, semilla=0):
+    """Compara latencia y nodos asentados de Dijkstra, bidireccional y A* en pares aleatorios."""
+    inicio = time.time()
+    grafo.radj.get(0)  # Construye (o abre) el índice inverso antes de medir
+    print(f"🔁 Índice inverso listo en {time.time() - inicio:.2f} s")
+
+    # Orígenes con aristas salientes y destinos con aristas entrantes
+    origenes = np.flatnonzero(grafo.out_degree)
+    destinos = np.flatnonzero(grafo.in_degree)
+    rng = random.Random(semilla)
+    muestras = [(int(rng.choice(origenes)), int(rng.choice(destinos))) for _ in range(pares)]
+
+    algoritmos = [("Dijkstra", dijkstra), ("Bidireccional", dijkstra_bidireccional), ("A*", astar)]
+    resultados = {nombre: {"tiempos": [], "asentados": []} for nombre, _ in algoritmos}
+    discrepancias = 0
+    for origen, destino in muestras:
+        costos = []
+        for nombre, funcion in algoritmos:
+            stats = {}
+            t0 = time.perf_counter()
+            _, costo = funcion(grafo, origen, destino, stats)
+            resultados[nombre]["tiempos"].append(time.perf_counter() - t0)
+            resultados[nombre]["asentados"].append(stats["asentados"])
+            costos.append(costo)
+        if not all(math.isclose(c, costos[0], rel_tol=1e-6) for c in costos):
+            discrepancias += 1
+
+    print(f"\n⏱️ {pares} pares aleatorios (semilla {semilla})")
+    print(f"{'Algoritmo':<14}{'p50 (ms)':>10}{'p95 (ms)':>10}{'media (ms)':>12}{'asentados (media)':>20}")
+    for nombre, _ in algoritmos:
+        tiempos = np.array(resultados[nombre]["tiempos"]) * 1000
+        asentados = np.mean(resultados[nombre]["asentados"])
+        print(f"{nombre:<14}{np.percentile(tiempos, 50):>10.2f}{np.percentile(tiempos, 95):>10.2f}"
+              f"{tiempos.mean():>12.2f}{asentados:>20,.0f}")
+    if discrepancias:
+        print(f"⚠️ {discrepancias} pares con costos distintos entre algoritmos")
+    else:
+        print("✅ Los tres algoritmos devuelven el mismo costo en todos los pares")
+    return resultados
+
+
+def buscar(nombre, funcion, grafo, origen, destino):
+    stats = {}
+    inicio = time.time()
+    path, costo = funcion(grafo, origen, destino, stats)
+    tiempo = time.time() - inicio
+
+    print(f"\n🔎 {nombre}")
+    if path:
+        print(f"✅ Camino más corto ({len(path)} nodos, costo total: {costo:.2f}):")
+        print(" → ".join(map(str, path[:10])), "...")  # Imprime solo los primeros 10 si es muy largo
+    else:
+        print("❌ No hay camino entre los nodos.")
+    print(f"Nodos asentados: {stats['asentados']:,}")
+    print(f"Tiempo transcurrido: {tiempo:.4f} segundos")
+    return path, costo, stats["asentados"]
+
+
+def dibujar_camino(grafo, path, origen, destino, costo):
+    # =============================
+    # 🗺️ Construcción del mapa
+    # =============================
+    lats, lons = [], []
+    for nodo in path:
+        if nodo in grafo.locations:
+            lat, lon = grafo.locations[nodo]
+            lats.append(lat)
+            lons.append(lon)
+
+    # ➤ Traza del camino
+    path_trace = go.Scattergeo(
+        lat=lats,
+        lon=lons,
+        mode="lines+markers",
+        line=dict(width=2, color="orange"),
+        marker=dict(size=5, color="orange"),
+        name="Camino más corto",
+        hoverinfo="text",
+        text=[f"ID: {nid}" for nid in path]
+    )
+
+    # ➤ Nodo origen
+    lat_o, lon_o = grafo.locations[origen]
+    origen_trace = go.Scattergeo(
+        lat=[lat_o],
+        lon=[lon_o],
+        mode="markers+text",
+        marker=dict(size=10, color="blue", symbol="circle"),
+        text=["Origen"],
+        textposition="bottom center",
+        name="Origen"
+    )
+
+    # ➤ Nodo destino
+    lat_d, lon_d = grafo.locations[destino]
+    destino_trace = go.Scattergeo(
+        lat=[lat_d],
+        lon=[lon_d],
+        mode="markers+text",
+        marker=dict(size=10, color="red", symbol="circle"),
+        text=["Destino"],
+        textposition="bottom center",
+        name="Destino"
+    )
+
+    # ➤ Mostrar figura
+    fig = go.Figure([path_trace, origen_trace, destino_trace])
+
+    fig.update_geos(
+        showland=True,
+        landcolor="rgb(240,240,240)",
+        oceancolor="rgb(210, 230, 255)",
+        showocean=True,
+        showcountries=True,
+        countrycolor="black"
+    )
+
+    fig.update_layout(
+        title=f"Camino más corto entre {origen} y {destino} (costo: {costo:.2f})",
+        margin=dict(l=0, r=0, t=40, b=0)
+    )
+
+    fig.write_html("graficos/dijkstra/camino_mas_corto.html")
+    fig.show()
+
+
+# ====================
+# 🧪 Prueba
+# ====================
+if __name__ == "__main__":
+    # Cargar grafo
+    grafo = CSRGraph.load("data/grafo")
+
+    if "--benchmark" in sys.argv:
+        # `python dijkstra.py --benchmark [pares]`
+        posicion = sys.argv.index("--benchmark") + 1
+        benchmark(grafo, int(sys.argv[posicion]) if len(sys.argv) > posicion else 100)
+        sys.exit(0)
+
+    # Par de ejemplo; se puede cambiar con `python dijkstra.py <origen> <destino>`
+    origen, destino = (int(sys.argv[1]), int(sys.argv[2])) if len(sys.argv) > 2 else (2572385, 942391)
+
+    path, costo, asentados_dijkstra = buscar("Dijkstra", dijkstra, grafo, origen, destino)
+    _, _, asentados_bidireccional = buscar("Dijkstra bidireccional", dijkstra_bidireccional, grafo, origen, destino)
+    path_astar, costo_astar, asentados_astar = buscar("A* (heurística haversine)", astar, grafo, origen, destino)
+
+    if path:
+        print(f"\n📉 Nodos asentados: Dijkstra {asentados_dijkstra:,} | bidireccional "
+              f"{asentados_bidireccional:,} | A* {asentados_astar:,} "
+              f"({asentados_dijkstra / max(asentados_astar, 1):.1f}x menos que Dijkstra); "
+              f"diferencia de costo: {abs(costo - costo_astar):.6f}")
+        dibujar_camino(grafo, path_astar, origen, destino, costo_astar)
@@ -0,0 +1,174 @@
+import os
+import sys
+import time
+
+import numpy as np
+import polars as pl
+from logger_config import setup_logger
+
+log = setup_logger()
+
+# =============================
+# Generador de datos sintéticos con el formato de 10_million_*.txt
+# =============================
+# Escribe los dos archivos crudos que lee data_to_parquet.py:
+#   - 10_million_location.txt: "lat,lon" por usuario (la fila i es el usuario i)
+#   - 10_million_user.txt:     ids seguidos por el usuario i, separados por comas
+# Los usuarios se agrupan en ciudades (centros al azar con tamaños tipo Zipf), el grado de
+# salida sigue una ley de potencias y la mayoría de los seguidos son de la misma ciudad,
+# elegidos según su popularidad (así el grado de entrada también queda sesgado). Con la
+# misma semilla y los mismos parámetros los archivos son idénticos byte a byte.
+
+# ========================
+# Parámetros
+# ========================
+USUARIOS = 100_000
+SEMILLA = 42
+DIRECTORIO = "data"
+LOCATION = "10_million_location.txt"
+USER = "10_million_user.txt"
+
+CIUDADES = 500          # Centros geográficos
+EXPONENTE_CIUDADES = 1.1  # Tamaño de la ciudad k proporcional a 1 / k^exponente
+DISPERSION_GRADOS = 1.5   # Desvío estándar (grados) de los usuarios alrededor de su ciudad
+FRACCION_DISPERSOS = 0.05  # Usuarios ubicados al azar en todo el mapa, sin ciudad cercana
+EXPONENTE_GRADO = 2.2     # P(grado de salida = k) ∝ k^-exponente (k >= 1)
+GRADO_MAXIMO = 1_000      # Tope del grado de salida
+LOCALIDAD = 0.8           # Fracción de seguidos elegidos dentro de la propia ciudad
+EXPONENTE_POPULARIDAD = 2.0  # Cola de Pareto de la popularidad (define el grado de entrada)
+LOTE = 250_000            # Usuarios por bloque al generar las listas de seguidos
+
+
+def _ciudades(rng, usuarios, ciudades=CIUDADES):
+    """Ciudad de cada usuario (-1 = disperso) y coordenadas de los centros."""
+    pesos = 1.0 / np.arange(1, ciudades + 1) ** EXPONENTE_CIUDADES
+    centros_lat = np.degrees(np.arcsin(rng.uniform(-0.9, 0.95, ciudades)))  # Uniformes sobre la esfera, sin polos
+    centros_lon = rng.uniform(-180, 180, ciudades)
+    ciudad = rng.choice(ciudades, size=usuarios, p=pesos / pesos.sum()).astype(np.int32)
+    ciudad[rng.random(usuarios) < FRACCION_DISPERSOS] = -1
+    return ciudad, centros_lat, centros_lon
+
+
+def ubicaciones(rng, ciudad, centros_lat, centros_lon):
+    """Latitud y longitud de cada usuario: normal alrededor de su ciudad (o uniforme si es disperso)."""
+    n = len(ciudad)
+    dispersos = ciudad < 0
+    lat = centros_lat[ciudad] + rng.normal(0, DISPERSION_GRADOS, n)
+    lon = centros_lon[ciudad] + rng.normal(0, DISPERSION_GRADOS, n)
+    lat[dispersos] = np.degrees(np.arcsin(rng.uniform(-1, 1, int(dispersos.sum()))))
+    lon[dispersos] = rng.uniform(-180, 180, int(dispersos.sum()))
+    # Rebote en los polos y vuelta completa en longitud: todo queda en el rango válido
+    lat = np.where(lat > 90, 180 - lat, np.where(lat < -90, -180 - lat, lat))
+    lon = (lon + 180) % 360 - 180
+    return lat, lon
+
+
+def grados_salida(rng, n, exponente=EXPONENTE_GRADO, maximo=GRADO_MAXIMO):
+    """Grado de salida con ley de potencias (Zipf), entre 1 y `maximo`.
+
+    Nunca es 0: todos los usuarios siguen al menos a otro, como en los datos reales.
+    """
+    return np.minimum(rng.zipf(exponente, n), maximo).astype(np.int64)
+
+
+class Seguidos:
+    """Elige destinos de aristas proporcionalmente a la popularidad de cada usuario.
+
+    Los usuarios se ordenan por ciudad y se guarda la suma acumulada de su popularidad:
+    elegir un destino dentro de una ciudad es un searchsorted sobre el tramo de esa ciudad.
+    """
+
+    def __init__(self, rng, ciudad):
+        n = len(ciudad)
+        popularidad = 1 + rng.pareto(EXPONENTE_POPULARIDAD - 1, n)
+        self.orden = np.argsort(ciudad, kind="stable").astype(np.int64)
+        self.acumulada = np.cumsum(popularidad[self.orden])
+        ciudades = int(ciudad.max()) + 2  # +1 por los dispersos (-1), que van primero
+        limites = np.searchsorted(ciudad[self.orden], np.arange(-1, ciudades - 1), side="left")
+        limites = np.append(limites, n)
+        base = np.concatenate([[0.0], self.acumulada])
+        self.desde = base[limites[:-1]]   # Popularidad acumulada antes de cada ciudad
+        self.hasta = base[limites[1:]]
+
+    def elegir(self, rng, ciudades_origen, localidad=LOCALIDAD):
+        """Un destino por arista: de la ciudad de origen con prob. `localidad`, si no global."""
+        m = len(ciudades_origen)
+        c = ciudades_origen + 1
+        locales = (rng.random(m) < localidad) & (ciudades_origen >= 0)
+        desde = np.where(locales, self.desde[c], 0.0)
+        hasta = np.where(locales, self.hasta[c], self.acumulada[-1])
+        objetivo = desde + rng.random(m) * (hasta - desde)
+        posiciones = np.minimum(np.searchsorted(self.acumulada, objetivo, side="right"), len(self.orden) - 1)
+        return self.orden[posiciones]
+
+
+def generar(usuarios=USUARIOS, directorio=DIRECTORIO, semilla=SEMILLA, sobrescribir=False):
+    """Escribe 10_million_location.txt y 10_million_user.txt en `directorio`; devuelve sus rutas."""
+    ruta_loc = os.path.join(directorio, LOCATION)
+    ruta_user = os.path.join(directorio, USER)
+    existentes = [r for r in (ruta_loc, ruta_user) if os.path.exists(r)]
+    if existentes and not sobrescribir:
+        raise FileExistsError(f"❌ Ya existen {', '.join(existentes)}. Usa --sobrescribir para reemplazarlos.")
+    os.makedirs(directorio, exist_ok=True)
+    inicio = time.time()
+    rng = np.random.default_rng(semilla)
+
+    log.info(f"🌍 Generando ubicaciones de {usuarios:,} usuarios en {CIUDADES} ciudades...")
+    ciudad, centros_lat, centros_lon = _ciudades(rng, usuarios)
+    lat, lon = ubicaciones(rng, ciudad, centros_lat, centros_lon)
+    pl.DataFrame({"latitude": lat, "longitude": lon}).write_csv(
+        ruta_loc, include_header=False, float_precision=6
+    )
+    del lat, lon
+
+    log.info("👥 Generando listas de seguidos (ley de potencias, sesgo geográfico)...")
+    seguidos = Seguidos(rng, ciudad)
+    aristas = 0
+    with open(ruta_user, "wb") as f:
+        for bloque, desde in enumerate(range(0, usuarios, LOTE)):
+            hasta = min(desde + LOTE, usuarios)
+            # Un generador por bloque: el resultado no depende de cuántos bloques ya se escribieron
+            rng_bloque = np.random.default_rng([semilla, bloque])
+            grados = np.minimum(grados_salida(rng_bloque, hasta - desde), usuarios - 1)
+            origenes = np.repeat(np.arange(desde, hasta, dtype=np.int64), grados)
+            destinos = seguidos.elegir(rng_bloque, ciudad[origenes])
+            # Sin lazos: quien se elige a sí mismo pasa a seguir al usuario siguiente
+            lazos = destinos == origenes
+            destinos[lazos] = (destinos[lazos] + 1) % usuarios
+
+            (
+                pl.DataFrame({"usuario": origenes, "seguido": destinos})
+                .group_by("usuario", maintain_order=True)
+                .agg(pl.col("seguido").cast(pl.String).str.join(","))
+                .select("seguido")
+                .write_csv(f, include_header=False, quote_style="never")
+            )
+            aristas += len(destinos)
+            log.info(f"  Usuarios {desde:,}–{hasta - 1:,}: {len(destinos):,} aristas")
+
+    log.info(f"✅ {usuarios:,} usuarios y {aristas:,} aristas (grado medio {aristas / usuarios:.2f}) "
+             f"en {time.time() - inicio:.2f} s → {ruta_loc}, {ruta_user}")
+    return ruta_loc, ruta_user
+
+
+def _opcion(argumentos, nombre, tipo, defecto):
+    """Valor de `--nombre N` (o `defecto`); lo quita de `argumentos`."""
+    if nombre not in argumentos:
+        return defecto
+    i = argumentos.index(nombre)
+    if i + 1 >= len(argumentos):
+        raise SystemExit(f"❌ Falta el valor de {nombre}.")
+    valor = tipo(argumentos[i + 1])
+    del argumentos[i:i + 2]
+    return valor
+
+
+if __name__ == "__main__":
+    # Uso: python generar_datos.py [usuarios] [--semilla N] [--salida DIR] [--sobrescribir]
+    # Ej.: python generar_datos.py 1_000_000 --salida data  (luego: python main.py)
+    argumentos = sys.argv[1:]
+    semilla = _opcion(argumentos, "--semilla", int, SEMILLA)
+    directorio = _opcion(argumentos, "--salida", str, DIRECTORIO)
+    posicionales = [a for a in argumentos if not a.startswith("--")]
+    usuarios = int(posicionales[0].replace("_", "")) if posicionales else USUARIOS
+    generar(usuarios, directorio, semilla, sobrescribir="--sobrescribir" in argumentos)
@@ -0,0 +1,134 @@
+import io
+import multiprocessing
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import polars as pl
+
+# =============================
+# Ingesta paralela de 10_million_user.txt por rangos de bytes
+# =============================
+# El archivo se corta en rangos de BLOQUE bytes alineados a fin de línea y cada rango se
+# parsea en otro proceso: los enteros se leen una sola vez y cada proceso escribe su parte
+# como un parquet de un solo row group con listas UInt32. Al final las partes se concatenan
+# en streaming en un único parquet con la columna node_id (número de línea del usuario),
+# así que ningún script vuelve a parsear texto.
+BLOQUE = 16 * 1024 * 1024  # Bytes por rango: acota la memoria de cada proceso
+
+
+def rangos_de_bytes(ruta, bloque=BLOQUE):
+    """Lista de (inicio, fin) que cubre el archivo; cada rango termina justo después de un '\\n'."""
+    tamano = os.path.getsize(ruta)
+    rangos, inicio = [], 0
+    with open(ruta, "rb") as f:
+        while inicio < tamano:
+            f.seek(min(inicio + bloque, tamano))
+            f.readline()  # Avanza hasta el próximo fin de línea (o el final del archivo)
+            fin = min(f.tell(), tamano)
+            rangos.append((inicio, fin))
+            inicio = fin
+    return rangos
+
+
+def parsear_adyacencias(datos):
+    """Parsea bytes con una lista de ids por línea: (DataFrame fila/connections, ids inválidos).
+
+    Cada línea es una fila (las vacías quedan con la lista vacía). Los tokens vacíos (coma
+    final) se ignoran; los que no son un entero UInt32 tras quitar espacios se cuentan como
+    inválidos y se descartan, igual que el cast no estricto de antes.
+    """
+    if not datos:
+        return pl.DataFrame(schema={"fila": pl.UInt32, "connections": pl.List(pl.UInt32)}), 0
+    lineas = pl.read_csv(
+        io.BytesIO(datos),
+        has_header=False,
+        separator="\n",   # Una sola columna con la línea completa
+        quote_char=None,
+        new_columns=["texto"],
+        schema={"texto": pl.String},
+    )
+    esperadas = datos.count(b"\n") + (not datos.endswith(b"\n"))
+    if lineas.height != esperadas:
+        raise ValueError(f"❌ Se leyeron {lineas.height:,} líneas de {esperadas:,}: los node_id quedarían corridos.")
+
+    # Camino rápido: cast directo de cada token. strip_chars cuesta más que el cast, así que
+    # solo se aplica a las filas con algún token que no se pudo convertir (espacios, \r,
+    # coma final o texto inválido), que en los datos reales son pocas o ninguna
+    filas = lineas.select(
+        pl.int_range(pl.len(), dtype=pl.UInt32).alias("fila"),
+        pl.col("texto").fill_null("").str.split(",").alias("tokens"),
+    ).with_columns(
+        pl.col("tokens").list.eval(pl.element().cast(pl.UInt32, strict=False)).list.drop_nulls().alias("connections")
+    )
+    sucias = filas.filter(pl.col("tokens").list.len() != pl.col("connections").list.len())
+    invalidos = 0
+    if sucias.height:
+        corregidas = sucias.select(
+            "fila",
+            pl.col("tokens").list.eval(pl.element().str.strip_chars()).list.eval(pl.element().filter(pl.element() != "")),
+        ).with_columns(
+            pl.col("tokens").list.eval(pl.element().cast(pl.UInt32, strict=False)).list.drop_nulls().alias("connections")
+        )
+        invalidos = int(corregidas["tokens"].list.len().sum() - corregidas["connections"].list.len().sum())
+        filas = filas.update(corregidas.select("fila", "connections"), on="fila")
+    return filas.select("fila", "connections"), invalidos
+
+
+def _parsear_rango(ruta, inicio, fin, ruta_parte):
+    """Proceso de trabajo: parsea [inicio, fin) y escribe la parte.
+
+    Devuelve (filas, ids, inválidos, id mínimo, id máximo); los extremos son None si no hay ids.
+    """
+    with open(ruta, "rb") as f:
+        f.seek(inicio)
+        datos = f.read(fin - inicio)
+    parte, invalidos = parsear_adyacencias(datos)
+    del datos
+    parte.write_parquet(ruta_parte, row_group_size=max(parte.height, 1))
+    ids = parte["connections"].explode()
+    return parte.height, int(parte["connections"].list.len().sum() or 0), invalidos, ids.min(), ids.max()
+
+
+def ingerir_adyacencias(ruta, salida, procesos=None, bloque=BLOQUE, compresion="zstd", filas_por_grupo=None):
+    """Convierte el archivo de adyacencias en un parquet (node_id UInt32, connections List[UInt32]).
+
+    Devuelve un dict con filas, ids, ids inválidos, partes procesadas y el menor y mayor id seguido.
+    """
+    procesos = procesos or os.cpu_count() or 1
+    rangos = rangos_de_bytes(ruta, bloque)
+    temporal = tempfile.mkdtemp(prefix="adyacencias_", dir=os.path.dirname(os.path.abspath(salida)))
+    try:
+        partes = [os.path.join(temporal, f"parte_{i:05d}.parquet") for i in range(len(rangos))]
+        # spawn en lugar de fork: Polars tiene hilos propios y no es seguro copiarlos con fork
+        contexto = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=min(procesos, max(len(rangos), 1)), mp_context=contexto) as pool:
+            resultados = list(pool.map(_parsear_rango, [ruta] * len(rangos), *zip(*rangos), partes)) if rangos else []
+
+        # node_id = número de línea global: desplazamiento acumulado de las partes anteriores
+        desplazamientos = np.concatenate([[0], np.cumsum([r[0] for r in resultados], dtype=np.int64)])
+        if desplazamientos[-1] > np.iinfo(np.uint32).max:
+            raise ValueError("❌ Hay más usuarios de los que entran en UInt32.")
+        planes = [
+            pl.scan_parquet(parte).select(
+                (pl.col("fila") + int(desplazamiento)).cast(pl.UInt32).alias("node_id"), "connections"
+            )
+            for parte, desplazamiento in zip(partes, desplazamientos)
+        ]
+        if planes:
+            pl.concat(planes).sink_parquet(salida, compression=compresion, row_group_size=filas_por_grupo)
+        else:
+            pl.DataFrame(schema={"node_id": pl.UInt32, "connections": pl.List(pl.UInt32)}).write_parquet(salida)
+    finally:
+        shutil.rmtree(temporal, ignore_errors=True)
+
+    return {
+        "filas": int(desplazamientos[-1]),
+        "ids": sum(r[1] for r in resultados),
+        "invalidos": sum(r[2] for r in resultados),
+        "partes": len(rangos),
+        "id_min": min((r[3] for r in resultados if r[3] is not None), default=None),
+        "id_max": max((r[4] for r in resultados if r[4] is not None), default=None),
+    }
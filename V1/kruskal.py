@@ -1,65 +1,73 @@
-import pickle
-# Import graphObj to be able to load the pickled graph.
+import os
+import resource
+import sys
+import tempfile
+import time
+
+import numpy as np
+import polars as pl
+# Import graphObj to be able to load the saved graph.
 # This is not used by Kruskal's algorithm itself but by the example loader.
-from graphObj import Graph
+from graphObj import CSRGraph
+from union_find import UnionFind
+
+# Edges handed to the union-find per call (rejected edges are filtered in bulk)
+BATCH = 1_000_000
+
+# External-memory mode (python kruskal.py --externo [presupuesto_mb])
+EDGES_PATH = "data/aristas_completo.parquet"
+FOREST_PATH = "data/mst_bosque.parquet"
+MEMORY_BUDGET_MB = 1024
+
+# On-disk record of a sorted run
+RECORD = np.dtype([("u", "<i4"), ("v", "<i4"), ("w", "<f8")])
+# Rows read from the Parquet table per slice in pass 1
+READ_ROWS = 1_000_000
+# Bytes held per edge while sorting a run: buffered records, concatenated copy, weight copy +
+# argsort indices, sorted copy
+SORT_BYTES_PER_EDGE = 4 * RECORD.itemsize
+# Bytes held per edge during the merge: run buffers, merged block, weight copy + argsort
+# indices, sorted block, plus union-find temporaries
+MERGE_BYTES_PER_EDGE = 5 * RECORD.itemsize
 
-class DSU:
+def kruskal_arrays(u, v, weights, num_nodes, max_edges=None):
     """
-    Disjoint Set Union (DSU) data structure, also known as Union-Find.
-    Used to efficiently track connected components and detect cycles.
+    Kruskal over edge arrays with node IDs 0..num_nodes-1.
+    Args:
+        u, v (array-like of int): Endpoints of each edge.
+        weights (array-like of float): Weight of each edge.
+        num_nodes (int): Size of the node ID space.
+        max_edges (int, optional): Stop once this many MST edges are accepted
+                                   (defaults to num_nodes - 1).
+    Returns:
+        numpy.ndarray: Indices (into the input arrays) of the MST edges, in
+                       non-decreasing weight order.
     """
-    def __init__(self, n):
-        """
-        Initializes DSU for n elements. Each element is initially in its own set.
-        Args:
-            n (int): The number of elements (nodes). Can also be initialized lazily.
-        """
-        self.parent = {} # Using a dictionary for sparse node IDs
-        self.num_nodes_processed = 0
-
-    def _add_node_if_not_exists(self, i):
-        """Adds a node to the DSU if it's not already present."""
-        if i not in self.parent:
-            self.parent[i] = i
-            self.num_nodes_processed +=1
-
-    def find(self, i):
-        """
-        Finds the representative (root) of the set containing element i,
-        with path compression.
-        Args:
-            i: The element to find.
-        Returns:
-            The representative of the set containing i.
-        """
-        self._add_node_if_not_exists(i)
-        if self.parent[i] == i:
-            return i
-        self.parent[i] = self.find(self.parent[i])  # Path compression
-        return self.parent[i]
-
-    def union(self, i, j):
-        """
-        Merges the sets containing elements i and j.
-        Uses union by rank (implicitly, by always making root_i parent of root_j,
-        though a more explicit rank/size tracking could be added if needed).
-        Args:
-            i: An element from the first set.
-            j: An element from the second set.
-        Returns:
-            bool: True if a union occurred (i and j were in different sets),
-                  False otherwise (i and j were already in the same set).
-        """
-        self._add_node_if_not_exists(i)
-        self._add_node_if_not_exists(j)
-
-        root_i = self.find(i)
-        root_j = self.find(j)
-
-        if root_i != root_j:
-            self.parent[root_j] = root_i  # Merge smaller tree under larger (simplified here)
-            return True
-        return False
+    weights = np.asarray(weights)
+    if max_edges is None:
+        max_edges = max(num_nodes - 1, 0)
+
+    # Sort edges by weight in non-decreasing order (stable: ties keep input order)
+    order = np.argsort(weights, kind="stable")
+    u = np.asarray(u)
+    v = np.asarray(v)
+
+    uf = UnionFind(num_nodes)
+    accepted = []
+    total = 0
+    for start in range(0, len(order), BATCH):
+        batch = order[start:start + BATCH]
+        mask = uf.union_many(u[batch], v[batch])
+        chosen = batch[mask]
+        if total + len(chosen) >= max_edges:
+            # The MST is complete (for a connected graph): keep only the first edges needed
+            accepted.append(chosen[:max_edges - total])
+            break
+        accepted.append(chosen)
+        total += len(chosen)
+
+    return np.concatenate(accepted) if accepted else np.empty(0, dtype=np.int64)
+
 
 def kruskal_mst(edges, num_nodes=None):
     """
@@ -68,7 +76,7 @@ def kruskal_mst(edges, num_nodes=None):
         edges (list of tuples): A list where each tuple represents an edge
                                 (weight, u, v), where u and v are node identifiers.
         num_nodes (int, optional): The total number of nodes in the graph.
-                                   If not provided, DSU will initialize nodes lazily.
+                                   If given, the search stops after num_nodes - 1 edges.
     Returns:
         tuple: (mst_edges, mst_weight)
                mst_edges (list of tuples): The edges forming the MST.
@@ -77,46 +85,199 @@ def kruskal_mst(edges, num_nodes=None):
     if not edges:
         return [], 0
 
-    # Sort edges by weight in non-decreasing order
-    # The items in the edge tuple are (weight, u, v)
-    sorted_edges = sorted(edges, key=lambda edge: edge[0])
-
-    mst_edges = []
-    mst_weight = 0.0
-
-    # Initialize DSU. If num_nodes is not given, it handles nodes as they appear.
-    # However, for Kruskal's, it's typical to know the set of vertices.
-    # If num_nodes is not given, DSU will create entries for nodes as they are seen.
-    # Max node ID could be inferred if num_nodes is None, but DSU handles sparse IDs.
-    if num_nodes is None:
-        all_nodes = set()
-        for _, u, v in edges:
-            all_nodes.add(u)
-            all_nodes.add(v)
-        # DSU can be initialized with count, but our dictionary-based DSU is fine.
-        dsu = DSU(len(all_nodes))
-    else:
-        dsu = DSU(num_nodes)
-
-
-    for weight, u, v in sorted_edges:
-        # If adding edge (u,v) doesn't form a cycle
-        if dsu.union(u, v):
-            mst_edges.append((u, v, weight)) # Storing as (u,v,weight) for consistency
-            mst_weight += weight
-            # Optimization: if MST has V-1 edges, it's complete (for a connected graph)
-            # This requires knowing V (number of nodes involved in edges).
-            # dsu.num_nodes_processed gives nodes seen by DSU.
-            # If num_nodes is supplied and represents the total expected nodes in the component:
-            if num_nodes and len(mst_edges) == num_nodes -1:
-                 break
-            # If num_nodes is not supplied, we might not reach V-1 if graph is disconnected.
-            # The DSU will correctly find MST for each connected component if run till end.
-            # For a single component MST, it would be num_nodes_in_component - 1.
+    weights = np.array([edge[0] for edge in edges], dtype=np.float64)
 
+    # Node IDs are mapped to 0..n-1 so any hashable ID (e.g. 'A', 'B') works with the
+    # array-based union-find
+    ids = {}
+    u = np.array([ids.setdefault(edge[1], len(ids)) for edge in edges], dtype=np.int64)
+    v = np.array([ids.setdefault(edge[2], len(ids)) for edge in edges], dtype=np.int64)
+
+    max_edges = num_nodes - 1 if num_nodes else None
+    chosen = kruskal_arrays(u, v, weights, len(ids), max_edges=max_edges)
+
+    mst_edges = [(edges[i][1], edges[i][2], edges[i][0]) for i in chosen.tolist()]  # Stored as (u, v, weight)
+    mst_weight = float(weights[chosen].sum())
     return mst_edges, mst_weight
 
-if __name__ == "__main__":
+def _write_run(pieces, tmp_dir, runs):
+    """Sorts the buffered records by weight and writes them as one raw binary run."""
+    records = np.concatenate(pieces)
+    pieces.clear()
+    records = records[np.argsort(records["w"], kind="stable")]
+    path = os.path.join(tmp_dir, f"run_{len(runs):05d}.bin")
+    records.tofile(path)
+    runs.append((path, len(records)))
+
+
+def _write_sorted_runs(edges_path, tmp_dir, rows_per_run, num_ids):
+    """
+    Pass 1: reads the Parquet edge table in bounded batches and writes runs of at most
+    ~rows_per_run edges, each sorted by weight.
+    Returns:
+        tuple: (runs, num_touched) where runs is a list of (path, rows) and num_touched
+               the number of distinct nodes that appear in some edge.
+    """
+    runs = []
+    touched = np.zeros(num_ids, dtype=bool)
+    pieces, buffered = [], 0
+
+    # Slices are pushed down to the Parquet reader, so only the needed row groups are read
+    table = pl.scan_parquet(edges_path).select("source", "target", "weight")
+    total_rows = table.select(pl.len()).collect().item()
+    read_rows = max(min(READ_ROWS, rows_per_run), 1)
+    for offset in range(0, total_rows, read_rows):
+        batch = table.slice(offset, read_rows).drop_nulls().collect()
+        records = np.empty(batch.height, dtype=RECORD)
+        records["u"] = batch["source"].to_numpy()
+        records["v"] = batch["target"].to_numpy()
+        records["w"] = batch["weight"].to_numpy()
+        del batch
+        touched[records["u"]] = True
+        touched[records["v"]] = True
+
+        pieces.append(records)
+        buffered += len(records)
+        if buffered >= rows_per_run:
+            _write_run(pieces, tmp_dir, runs)
+            buffered = 0
+
+    if pieces:
+        _write_run(pieces, tmp_dir, runs)
+    return runs, int(np.count_nonzero(touched))
+
+
+def _merge_runs(runs, block_rows):
+    """
+    Pass 2: k-way merge of the sorted runs, yielding record blocks in global weight order.
+
+    Each run keeps one buffer of at most block_rows records. Every record not heavier than
+    the smallest "last weight" among the buffers is safe to emit: no unread record can be
+    lighter. Those records are sorted together and yielded, and emptied buffers are refilled.
+    """
+    offsets = [0] * len(runs)
+    buffers = [None] * len(runs)
+
+    def refill(i):
+        path, rows = runs[i]
+        count = min(block_rows, rows - offsets[i])
+        buffers[i] = np.fromfile(path, dtype=RECORD, count=count, offset=offsets[i] * RECORD.itemsize)
+        offsets[i] += count
+
+    for i in range(len(runs)):
+        refill(i)
+
+    while True:
+        active = [i for i in range(len(runs)) if len(buffers[i])]
+        if not active:
+            return
+        bound = min(buffers[i]["w"][-1] for i in active)
+
+        pieces = []
+        for i in active:
+            cut = np.searchsorted(buffers[i]["w"], bound, side="right")
+            pieces.append(buffers[i][:cut])
+            buffers[i] = buffers[i][cut:]
+            if not len(buffers[i]):
+                refill(i)
+
+        block = np.concatenate(pieces)
+        del pieces
+        yield block[np.argsort(block["w"], kind="stable")]
+
+
+def kruskal_external(edges_path=EDGES_PATH, output_path=FOREST_PATH, memory_budget_mb=MEMORY_BUDGET_MB, tmp_dir=None):
+    """
+    Out-of-core Kruskal over the Parquet edge table.
+
+    The edges are sorted by weight in bounded-memory runs (pass 1), merged k-way (pass 2)
+    and streamed into the array-based union-find, stopping once num_nodes - 1 edges are
+    accepted. The minimum spanning forest is written to output_path as Parquet
+    (source, target, weight).
+
+    The memory budget covers the union-find, the accepted edges and the sort/merge
+    buffers; run and block sizes are derived from it.
+    Returns:
+        dict: Summary (edges, weight, components, runs, times and peak RSS).
+    """
+    start = time.time()
+    # Bytes enteros: con un presupuesto fraccionario (1.5 MB) los tamaños derivados
+    # serían float y np.fromfile(count=...) falla
+    budget = int(memory_budget_mb * 1024**2)
+
+    max_id = (
+        pl.scan_parquet(edges_path)
+        .select(pl.max_horizontal(pl.col("source").max(), pl.col("target").max()))
+        .collect()
+        .item()
+    )
+    num_ids = 0 if max_id is None else int(max_id) + 1
+
+    # Resident for the whole run: union-find (parent + size int32), touched flags and the
+    # accepted edges (at most num_ids - 1 records)
+    resident = num_ids * (4 + 4 + 1 + RECORD.itemsize)
+    available = budget - resident
+    if available <= 0:
+        raise MemoryError(
+            f"❌ El presupuesto de {memory_budget_mb} MB no alcanza para el Union-Find y el bosque "
+            f"de {num_ids:,} nodos (se necesitan ~{resident / 1024**2:,.0f} MB)"
+        )
+    rows_per_run = max(available // SORT_BYTES_PER_EDGE, 1)
+
+    with tempfile.TemporaryDirectory(prefix="kruskal_", dir=tmp_dir) as tmp:
+        runs, num_touched = _write_sorted_runs(edges_path, tmp, rows_per_run, num_ids)
+        sorted_at = time.time()
+        print(f"🧮 Pasada 1: {sum(r for _, r in runs):,} aristas en {len(runs)} corridas ordenadas "
+              f"({time.time() - start:.2f} s)")
+
+        max_edges = max(num_touched - 1, 0)
+        block_rows = max(available // (max(len(runs), 1) * MERGE_BYTES_PER_EDGE), 1)
+
+        uf = UnionFind(num_ids)
+        accepted, total = [], 0
+        scanned = 0
+        if max_edges:
+            for block in _merge_runs(runs, block_rows):
+                scanned += len(block)
+                chosen = block[uf.union_many(block["u"], block["v"])][:max_edges - total]
+                accepted.append(chosen)
+                total += len(chosen)
+                if total >= max_edges:
+                    break  # The forest is a spanning tree: no later edge can be accepted
+
+    forest = np.concatenate(accepted) if accepted else np.empty(0, dtype=RECORD)
+    pl.DataFrame({
+        "source": forest["u"].astype(np.int64),
+        "target": forest["v"].astype(np.int64),
+        "weight": forest["w"],
+    }).write_parquet(output_path)
+
+    return {
+        "edges": len(forest),
+        "weight": float(forest["w"].sum()),
+        "components": num_touched - len(forest),
+        "runs": len(runs),
+        "scanned": scanned,
+        "sort_seconds": sorted_at - start,
+        "merge_seconds": time.time() - sorted_at,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+if __name__ == "__main__" and "--externo" in sys.argv:
+    # Out-of-core mode over the full edge table: python kruskal.py --externo [presupuesto_mb]
+    position = sys.argv.index("--externo") + 1
+    budget_mb = int(sys.argv[position]) if len(sys.argv) > position else MEMORY_BUDGET_MB
+    print(f"🌲 Kruskal en memoria externa sobre '{EDGES_PATH}' (presupuesto: {budget_mb:,} MB)")
+    result = kruskal_external(memory_budget_mb=budget_mb)
+    print(f"🔀 Pasada 2: {result['scanned']:,} aristas recorridas en la mezcla ({result['merge_seconds']:.2f} s)")
+    print(f"✅ Bosque guardado en '{FOREST_PATH}'")
+    print(f" - Número de aristas en el bosque: {result['edges']:,}")
+    print(f" - Peso total: {result['weight']:.2f}")
+    print(f" - Componentes (árboles del bosque): {result['components']:,}")
+    print(f" - Pico de RSS: {result['peak_rss_mb']:,.1f} MB")
+
+elif __name__ == "__main__":
     print(" Kuskal's Algorithm for Minimum Spanning Tree (MST) ")
     print("----------------------------------------------------")
 
@@ -152,78 +313,47 @@ if __name__ == "__main__":
     # Expected for Example 2: (2,3,7), (1,2,8), (0,1,10) -> Weight 7+8+10 = 25
 
     # --- Example 3: Loading graph from project data ---
-    print("\n--- Ejemplo 3: Cargando grafo desde 'data/grafo_guardado.pkl' ---")
-    GRAPH_PATH = "data/grafo_guardado.pkl"
+    print("\n--- Ejemplo 3: Cargando grafo desde 'data/grafo' ---")
+    GRAPH_PATH = "data/grafo"
     try:
-        with open(GRAPH_PATH, "rb") as f:
-            project_graph = pickle.load(f)
+        project_graph = CSRGraph.load(GRAPH_PATH)
 
         print(f"Grafo cargado: {project_graph.num_nodes()} nodos, {project_graph.num_edges()} aristas.")
 
-        # Convert project_graph to list of edges (weight, u, v)
-        # project_graph.adj is like: {u: [(v1, w1), (v2, w2), ...]}
-        graph_edges = []
-        if hasattr(project_graph, 'adj'):
-            for u, neighbors in project_graph.adj.items():
-                for v, weight in neighbors:
-                    # Kruskal typically works on undirected graphs.
-                    # If the stored graph is directed, we add each edge.
-                    # To make it undirected for Kruskal, ensure (u,v,w) and (v,u,w) are considered once.
-                    # A common way is to add only if u < v, or handle duplicates if graph is already undirected.
-                    # For now, assuming weights are symmetric or we want MST of this directed structure.
-                    # To treat as undirected, one might sort (u,v) to (min(u,v), max(u,v)) before adding to a set.
-                    # Here, we just add all edges as they are.
-                    graph_edges.append((weight, u, v))
-
-            print(f"Número de aristas extraídas para Kruskal: {len(graph_edges)}")
-            if not graph_edges:
-                print("No se extrajeron aristas del grafo. No se puede ejecutar Kruskal.")
-            else:
-                # Get unique nodes to determine num_nodes for DSU if graph might be disconnected
-                # or if node IDs are not sequential from 0.
-                all_nodes_in_project_graph = set()
-                for u, neighbors in project_graph.adj.items():
-                    all_nodes_in_project_graph.add(u)
-                    for v, _ in neighbors:
-                        all_nodes_in_project_graph.add(v)
-
-                num_distinct_nodes = len(all_nodes_in_project_graph)
-                print(f"Número de nodos distintos en el grafo cargado: {num_distinct_nodes}")
-
-                print("Ejecutando Kruskal en el grafo del proyecto (esto puede tardar)...")
-                # Pass num_distinct_nodes for potentially better DSU initialization if graph is connected.
-                # If the graph could have multiple components, not passing num_nodes or passing a count
-                # of all possible nodes (e.g. max_id + 1 if dense) is also an option.
-                # DSU with dict handles sparse node IDs well.
-                mst_edges_project, mst_weight_project = kruskal_mst(graph_edges, num_nodes=num_distinct_nodes)
-
-                print(f"\nResultados de Kruskal para el grafo del proyecto:")
-                print(f" - Número de aristas en el MST: {len(mst_edges_project)}")
-                print(f" - Peso total del MST: {mst_weight_project:.2f}")
-
-                # Display a few edges from the MST if it's large
-                if mst_edges_project:
-                    print(" - Primeras 5 aristas del MST:")
-                    for i, edge in enumerate(mst_edges_project[:5]):
-                        print(f"   {i+1}. Nodo {edge[0]} - Nodo {edge[1]} (Peso: {edge[2]:.2f})")
+        # The CSR arrays are passed straight to Kruskal: no list of (weight, u, v) tuples.
+        # All directed edges are kept; a reciprocal pair just adds a redundant candidate.
+        sources = project_graph.edge_sources()
+        targets = project_graph.indices
+        weights = project_graph.weights
+
+        print(f"Número de aristas para Kruskal: {len(targets)}")
+        if not len(targets):
+            print("No se extrajeron aristas del grafo. No se puede ejecutar Kruskal.")
         else:
-            print("El objeto grafo cargado no tiene el atributo 'adj'. No se puede procesar.")
+            # Nodes touched by at least one edge (the graph may have isolated IDs)
+            touched = np.zeros(project_graph.num_ids, dtype=bool)
+            touched[sources] = True
+            touched[targets] = True
+            num_distinct_nodes = int(np.count_nonzero(touched))
+            print(f"Número de nodos distintos en el grafo cargado: {num_distinct_nodes}")
+
+            print("Ejecutando Kruskal en el grafo del proyecto...")
+            chosen = kruskal_arrays(sources, targets, weights, project_graph.num_ids,
+                                    max_edges=num_distinct_nodes - 1)
+            mst_weight_project = float(weights[chosen].astype(np.float64).sum())
+
+            print("\nResultados de Kruskal para el grafo del proyecto:")
+            print(f" - Número de aristas en el MST: {len(chosen)}")
+            print(f" - Peso total del MST: {mst_weight_project:.2f}")
+            print(f" - Componentes (árboles del bosque): {num_distinct_nodes - len(chosen)}")
+
+            # Display a few edges from the MST if it's large
+            if len(chosen):
+                print(" - Primeras 5 aristas del MST:")
+                for i, e in enumerate(chosen[:5].tolist()):
+                    print(f"   {i+1}. Nodo {sources[e]} - Nodo {targets[e]} (Peso: {weights[e]:.2f})")
 
     except FileNotFoundError:
         print(f"❌ Error: Archivo del grafo '{GRAPH_PATH}' no encontrado.")
     except Exception as e:
         print(f"❌ Error al cargar o procesar el grafo del proyecto: {e}")
-
-```
-This implementation includes:
-- A `DSU` (Disjoint Set Union) class with `find` (with path compression) and `union` operations. It uses a dictionary for `parent` to handle potentially sparse or non-integer node IDs (though the example uses integers from the project graph).
-- The `kruskal_mst` function that takes a list of edges `(weight, u, v)` and an optional `num_nodes`. It sorts edges and uses DSU to build the MST.
-- An `if __name__ == "__main__":` block with three examples:
-    1. A simple graph with character node IDs.
-    2. A simple graph with numerical node IDs.
-    3. Loading the graph from `data/grafo_guardado.pkl`, converting its adjacency list to the required edge list format, and then running Kruskal's algorithm on it. It prints the total weight and number of edges in the resulting MST.
-
-A note on graph representation for Kruskal:
-The `project_graph` is loaded from a pickle file. Its `adj` attribute is a dictionary like `{u: [(v1, w1), (v2, w2), ...]}`. Kruskal's algorithm generally assumes an undirected graph. If the stored graph is directed, simply adding all its edges might not be standard for a classical MST unless that's the specific intent. For a true undirected MST, one would typically ensure each edge `(u, v)` with weight `w` is considered only once (e.g., by processing edges `(w, u, v)` where `u < v`, or by adding both `(u,v,w)` and `(v,u,w)` to the list if the original graph is stored as directed but represents an undirected one, and then letting Kruskal sort them). The current example code directly converts all edges from `adj` list.
-The DSU is initialized with `num_distinct_nodes` found in the graph, which is appropriate if we expect a single MST for the main connected component. If the graph has multiple disconnected components, Kruskal's will find an MST for each (a minimum spanning forest).
-```
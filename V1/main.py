@@ -1,97 +1,119 @@
-import subprocess
 import os
+import sys
 from logger_config import setup_logger
+from metricas import RUTA_METRICAS
+from pipeline import DIRECTORIO_RUNS, Etapa, Pipeline
 
 # Configure logger
 log = setup_logger()
 
-# Define the sequence of scripts to run
+# Files shared between stages (paths relative to V1/)
+UBICACIONES = "data/ubicaciones_limpias.parquet"
+RECHAZADAS = "data/ubicaciones_rechazadas.parquet"
+ESTADISTICAS = "data/ingesta_stats.json"
+CONEXIONES = "data/usuarios_conexiones.parquet"
+ARISTAS = "data/aristas_completo.parquet"
+COMUNIDADES = "data/comunidades.parquet"
+# Only the CSR arrays: radj and other lazily added arrays do not invalidate later stages
+GRAFO = [f"data/grafo/{nombre}.npy" for nombre in ("indptr", "indices", "weights", "latitudes", "longitudes")]
+
+# Pipeline stages. Dependencies come from the declared inputs/outputs.
+# memoria_mb is the estimated peak RSS with the full 10M dataset: stages that run in
+# parallel never add up to more than the memory budget.
 # We'll use comunidad_igraph.py for community detection by default.
-SCRIPTS_TO_RUN = [
-    "data_to_parquet.py",
-    "calc_weight.py",
-    "join_weights.py",
-    "graph_construction.py",
-    "comunidad_igraph.py",
-    # EDA and other analyses can be run manually as they are for exploration
-    # "eda.py",
-    # "analisis_comunidades.py",
-    # "dijkstra.py",
-    # "mapa_BFS.py",
-    # "mapa_comunidad.py",
-    # "mapa_por_comunidad.py",
+ETAPAS = [
+    Etapa("data_to_parquet", "data_to_parquet.py",
+          entradas=["data/10_million_location.txt", "data/10_million_user.txt"],
+          salidas=[UBICACIONES, RECHAZADAS, CONEXIONES, ESTADISTICAS],
+          memoria_mb=1000),
+    Etapa("calc_weight", "calc_weight.py",
+          entradas=[UBICACIONES, CONEXIONES],
+          salidas=[ARISTAS],
+          memoria_mb=8000),
+    Etapa("graph_construction", "graph_construction.py",
+          entradas=[ARISTAS, UBICACIONES],
+          salidas=GRAFO,
+          memoria_mb=8000),
+    Etapa("comunidad_igraph", "comunidad_igraph.py",
+          entradas=GRAFO,
+          salidas=[COMUNIDADES],
+          memoria_mb=12000),
+    # EDA, shortest paths and maps are optional: `--todas` or by name.
+    # analisis_comunidades.py is interactive, so it is not a stage.
+    Etapa("eda", "eda.py",
+          entradas=[UBICACIONES, CONEXIONES],
+          salidas=["data/outliers_geograficos.parquet", "graficos/distribucion_outliers.png",
+                   "graficos/distribucion_geografica.png"],
+          opcional=True, memoria_mb=2000),
+    Etapa("dijkstra", "dijkstra.py",
+          entradas=GRAFO,
+          salidas=["graficos/dijkstra/camino_mas_corto.html"],
+          opcional=True, memoria_mb=3000),
+    Etapa("mapa_BFS", "mapa_BFS.py",
+          entradas=GRAFO + [COMUNIDADES],
+          salidas=["graficos/BFS/grafo_bfs.html"],
+          opcional=True, memoria_mb=3000),
+    Etapa("mapa_comunidad", "mapa_comunidad.py",
+          entradas=GRAFO + [COMUNIDADES],
+          salidas=["graficos/grafo_top_50_comunidades.html"],
+          opcional=True, memoria_mb=3000),
+    Etapa("mapa_por_comunidad", "mapa_por_comunidad.py",
+          entradas=GRAFO + [COMUNIDADES],
+          salidas=["graficos/comunidades/comunidad_27_con_aristas_True.html"],
+          opcional=True, memoria_mb=3000),
 ]
 
-def run_script(script_name):
-    """Executes a Python script using subprocess and logs its output."""
-    script_path = os.path.join(os.path.dirname(__file__), script_name)
-    if not os.path.exists(script_path):
-        log.error(f"❌ Script '{script_name}' not found at '{script_path}'. Skipping.")
-        return False
-
-    log.info(f"🚀 Iniciando ejecución de: {script_name}")
-    try:
-        # Using sys.executable to ensure the same Python interpreter is used
-        process = subprocess.Popen(
-            [os.sys.executable, script_path],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            cwd=os.path.dirname(__file__) # Execute in the V1 directory context
-        )
-        stdout, stderr = process.communicate()
-
-        if stdout:
-            log.info(f"Salida de {script_name}:\n{stdout}")
-        if stderr:
-            if process.returncode == 0:
-                log.warning(f"Salida de error (pero con código 0) de {script_name}:\n{stderr}")
-            else:
-                log.error(f"Errores de {script_name}:\n{stderr}")
-
-        if process.returncode == 0:
-            log.info(f"✅ {script_name} completado exitosamente.")
-            return True
-        else:
-            log.error(f"❌ {script_name} falló con código de error {process.returncode}.")
-            return False
-    except Exception as e:
-        log.exception(f"💥 Excepción al ejecutar {script_name}: {e}")
-        return False
-
-def main():
+def main(nombres=None, todas=False, forzar=False, procesos=1, memoria_mb=None):
     """
     Función principal para ejecutar el pipeline de scripts del proyecto V1.
+
+    Sin `nombres` se ejecutan las etapas principales (o todas con `todas=True`); las
+    etapas al día se omiten salvo con `forzar=True`. Hasta `procesos` etapas independientes
+    corren a la vez, dentro de `memoria_mb` (por defecto, 80% de la RAM).
     """
     log.info("🏁 Iniciando pipeline principal del Proyecto V1...")
+    directorio = os.path.dirname(os.path.abspath(__file__))
 
     # Create necessary subdirectories if they don't exist
     # (some scripts might do this, but it's good to ensure)
-    os.makedirs(os.path.join(os.path.dirname(__file__), "data", "aristas_parquet"), exist_ok=True)
-    os.makedirs(os.path.join(os.path.dirname(__file__), "graficos", "BFS"), exist_ok=True)
-    os.makedirs(os.path.join(os.path.dirname(__file__), "graficos", "comunidades"), exist_ok=True)
-    os.makedirs(os.path.join(os.path.dirname(__file__), "graficos", "dijkstra"), exist_ok=True)
-
-    total_scripts = len(SCRIPTS_TO_RUN)
-    successful_scripts = 0
+    os.makedirs(os.path.join(directorio, "graficos", "BFS"), exist_ok=True)
+    os.makedirs(os.path.join(directorio, "graficos", "comunidades"), exist_ok=True)
+    os.makedirs(os.path.join(directorio, "graficos", "dijkstra"), exist_ok=True)
 
-    for i, script_name in enumerate(SCRIPTS_TO_RUN):
-        log.info(f"--- Paso {i+1}/{total_scripts} ---")
-        if run_script(script_name):
-            successful_scripts += 1
-        else:
-            log.error(f"Pipeline detenido debido a error en {script_name}.")
-            break
-            # Option: continue running other scripts if they are independent
-            # log.warning(f"Continuando con el siguiente script a pesar del error en {script_name}.")
-            # continue
+    pipeline = Pipeline(ETAPAS, directorio)
+    if not nombres:
+        nombres = [e.nombre for e in ETAPAS if todas or not e.opcional]
+    manifiesto = pipeline.ejecutar(nombres, forzar=forzar, max_procesos=procesos, memoria_mb=memoria_mb)
 
     log.info("--- Fin del Pipeline ---")
-    if successful_scripts == total_scripts:
-        log.info("🎉 Todos los scripts del pipeline principal se ejecutaron exitosamente.")
-    else:
-        log.warning(f"⚠️ {successful_scripts}/{total_scripts} scripts del pipeline principal se completaron. "
-                    f"{total_scripts - successful_scripts} fallaron o fueron omitidos.")
+    conteo = {}
+    for registro in manifiesto["etapas"]:
+        conteo[registro["estado"]] = conteo.get(registro["estado"], 0) + 1
+        rss = f"{registro['rss_pico_mb']:>9,.0f} MB" if "rss_pico_mb" in registro else ""
+        log.info(f"  {registro['nombre']:<20} {registro['estado']:<10} {registro.get('duracion_s', 0):>9.2f} s {rss}")
+    log.info(f"Manifiesto: {DIRECTORIO_RUNS}/run_{manifiesto['corrida']}.json")
+    log.info(f"Métricas: {RUTA_METRICAS} (comparar con corridas previas: python metricas.py)")
+
+    total = len(manifiesto["etapas"])
+    correctas = conteo.get("ejecutada", 0) + conteo.get("al_dia", 0)
+    if correctas == total:
+        log.info(f"🎉 Pipeline completo: {conteo.get('ejecutada', 0)} ejecutadas, "
+                 f"{conteo.get('al_dia', 0)} al día en {manifiesto['duracion_s']:.2f} s.")
+        return True
+    log.warning(f"⚠️ {correctas}/{total} etapas del pipeline se completaron. "
+                f"{total - correctas} fallaron o fueron omitidas.")
+    return False
+
+def _opcion(argumentos, nombre, tipo):
+    """Valor de `--nombre N` (None si no está); lo quita de `argumentos`."""
+    if nombre not in argumentos:
+        return None
+    i = argumentos.index(nombre)
+    if i + 1 >= len(argumentos):
+        raise SystemExit(f"❌ Falta el valor de {nombre}.")
+    valor = tipo(argumentos[i + 1])
+    del argumentos[i:i + 2]
+    return valor
 
 if __name__ == "__main__":
     # Note: Ensure that the required input data files (e.g., 10_million_location.txt)
@@ -101,6 +123,16 @@ if __name__ == "__main__":
     log.info("=================================================================")
     log.info("Este script ejecutará la secuencia principal de procesamiento de datos y construcción del grafo.")
     log.info("Asegúrate de que los archivos de datos iniciales (ej: 10_million_location.txt) estén en V1/data/")
+    log.info("Uso: python main.py [etapa ...] [--todas] [--forzar] [--procesos N] [--memoria MB]")
     log.info("-----------------------------------------------------------------\n")
 
-    main()
+    argumentos = sys.argv[1:]
+    procesos = _opcion(argumentos, "--procesos", int)
+    if procesos is None:
+        procesos = 1
+    elif procesos < 1:
+        raise SystemExit(f"❌ --procesos debe ser al menos 1 (se recibió {procesos}).")
+    memoria_mb = _opcion(argumentos, "--memoria", float)
+    exito = main([a for a in argumentos if not a.startswith("--")], todas="--todas" in argumentos,
+                 forzar="--forzar" in argumentos, procesos=procesos, memoria_mb=memoria_mb)
+    sys.exit(0 if exito else 1)
@@ -0,0 +1,100 @@
+import numpy as np
+import plotly.graph_objects as go
+import plotly.express as px
+
+# =============================
+# Aristas para mapas Plotly: una sola traza por grupo
+# =============================
+# Una traza Scattergeo por arista multiplica el tamaño del HTML y el costo de render.
+# Aquí todas las aristas van en los mismos arreglos de coordenadas, separadas por NaN
+# (Plotly corta la línea en cada NaN), armados con NumPy.
+
+
+def aristas_entre(grafo, nodos):
+    """Aristas (origenes, destinos, pesos) del grafo con ambos extremos en `nodos`.
+
+    Lee los tramos del CSR de cada nodo sin recorrer listas de Python; `pesos` es None si
+    el grafo no es ponderado.
+    """
+    if not isinstance(nodos, np.ndarray):
+        nodos = np.fromiter(nodos, dtype=np.int64)
+    nodos = np.unique(nodos.astype(np.int64))
+    nodos = nodos[(nodos >= 0) & (nodos < grafo.num_ids)]
+    grafo.num_edges()  # Incorpora las aristas pendientes de add_edge
+    miembro = np.zeros(grafo.num_ids, dtype=bool)
+    miembro[nodos] = True
+
+    inicios = grafo.indptr[nodos]
+    grados = grafo.indptr[nodos + 1] - inicios
+    # Posición en indices de cada vecino: inicio del tramo + desplazamiento dentro del tramo
+    desplazamientos = np.repeat(inicios - (np.cumsum(grados) - grados), grados)
+    posiciones = np.arange(int(grados.sum()), dtype=np.int64) + desplazamientos
+
+    origenes = np.repeat(nodos, grados)
+    destinos = np.asarray(grafo.indices[posiciones], dtype=np.int64)
+    dentro = miembro[destinos]
+    pesos = None if grafo.weights is None else np.asarray(grafo.weights[posiciones[dentro]])
+    return origenes[dentro], destinos[dentro], pesos
+
+
+def coordenadas_aristas(latitudes, longitudes, origenes, destinos):
+    """Arreglos lat/lon de largo 3·E: (origen, destino, NaN) por arista."""
+    origenes = np.asarray(origenes, dtype=np.int64)
+    destinos = np.asarray(destinos, dtype=np.int64)
+    lat = np.full(3 * len(origenes), np.nan)
+    lon = np.full(3 * len(origenes), np.nan)
+    lat[0::3] = latitudes[origenes]
+    lat[1::3] = latitudes[destinos]
+    lon[0::3] = longitudes[origenes]
+    lon[1::3] = longitudes[destinos]
+    return lat, lon
+
+
+def trazas_aristas(grafo, origenes, destinos, pesos=None, cortes=None, color="gray", width=0.3,
+                   nombre="Aristas", colores=None):
+    """Lista de trazas Scattergeo con las aristas dadas.
+
+    Sin `cortes` devuelve una sola traza. Con `cortes` (p. ej. [100, 1000] km) y `pesos`,
+    devuelve una traza por tramo de peso, cada una con su color y su entrada en la leyenda.
+    """
+    if cortes is None or pesos is None:
+        lat, lon = coordenadas_aristas(grafo.latitudes, grafo.longitudes, origenes, destinos)
+        return [go.Scattergeo(
+            lat=lat,
+            lon=lon,
+            mode="lines",
+            line=dict(width=width, color=color),
+            hoverinfo="none",
+            name=nombre,
+            showlegend=False,
+        )]
+
+    origenes = np.asarray(origenes)
+    destinos = np.asarray(destinos)
+    cortes = list(cortes)
+    colores = colores or px.colors.sequential.Viridis[::max(1, len(px.colors.sequential.Viridis) // (len(cortes) + 1))]
+    tramo = np.digitize(pesos, cortes)
+    limites = [None] + cortes + [None]
+
+    trazas = []
+    for i in range(len(cortes) + 1):
+        en_tramo = tramo == i
+        if not en_tramo.any():
+            continue
+        desde, hasta = limites[i], limites[i + 1]
+        if desde is None:
+            etiqueta = f"< {hasta:g}"
+        elif hasta is None:
+            etiqueta = f"≥ {desde:g}"
+        else:
+            etiqueta = f"{desde:g} – {hasta:g}"
+        lat, lon = coordenadas_aristas(grafo.latitudes, grafo.longitudes, origenes[en_tramo], destinos[en_tramo])
+        trazas.append(go.Scattergeo(
+            lat=lat,
+            lon=lon,
+            mode="lines",
+            line=dict(width=width, color=colores[i % len(colores)]),
+            hoverinfo="none",
+            name=f"{nombre} {etiqueta} ({int(en_tramo.sum()):,})",
+        ))
+    return trazas
@@ -0,0 +1,189 @@
+import json
+import os
+import subprocess
+import sys
+
+import polars as pl
+
+# =============================
+# Métricas de recursos por etapa del pipeline
+# =============================
+# Cada etapa ejecutada deja una fila en runs/metrics.parquet con el tiempo de reloj, el CPU
+# de usuario y de sistema, el pico de memoria residente y los bytes de disco leídos y
+# escritos (todo sale del rusage del subproceso, vía os.wait4), más las filas de sus salidas
+# parquet. `python metricas.py` compara la última corrida con las anteriores.
+#
+# En Linux un proceso hereda como pico de RSS el tamaño de su padre al momento del fork
+# (ru_maxrss sobrevive a exec), así que medir directo desde el pipeline, que ya cargó
+# Polars, infla las etapas chicas. Por eso cada comando se lanza a través de LANZADOR: un
+# intérprete mínimo (python -S, unos pocos MB) que hace fork + exec del comando real, lo
+# espera con os.wait4 y devuelve el rusage por un pipe.
+RUTA_METRICAS = "runs/metrics.parquet"
+CORRIDAS_PREVIAS = 5  # Corridas anteriores contra las que se compara la última
+UMBRAL_REGRESION = 1.2  # Se marca una métrica si supera en este factor a la mediana previa
+BYTES_BLOQUE = 512  # ru_inblock / ru_oublock se cuentan en bloques de 512 bytes
+
+ESQUEMA = {
+    "corrida": pl.String,
+    "etapa": pl.String,
+    "script": pl.String,
+    "estado": pl.String,
+    "inicio": pl.String,
+    "duracion_s": pl.Float64,
+    "cpu_usuario_s": pl.Float64,
+    "cpu_sistema_s": pl.Float64,
+    "rss_pico_mb": pl.Float64,
+    "bytes_leidos": pl.Int64,
+    "bytes_escritos": pl.Int64,
+    "filas_salida": pl.Int64,
+}
+# Métricas que entran en la comparación (las de costo: más alto es peor) y el aumento absoluto
+# mínimo para marcarlas: con datos chicos, 0.03 s → 0.05 s no es una regresión
+COMPARADAS = {
+    "duracion_s": 1.0,
+    "cpu_usuario_s": 1.0,
+    "cpu_sistema_s": 1.0,
+    "rss_pico_mb": 50.0,
+    "bytes_leidos": 64 * 1024**2,
+    "bytes_escritos": 64 * 1024**2,
+}
+
+
+LANZADOR = """
+import json, os, sys
+fd, comando = int(sys.argv[1]), sys.argv[2:]
+pid = os.fork()
+if pid == 0:
+    try:
+        os.close(fd)
+        os.execv(comando[0], comando)
+    finally:
+        os._exit(127)
+_, estado, uso = os.wait4(pid, 0)
+os.write(fd, json.dumps([uso.ru_utime, uso.ru_stime, uso.ru_maxrss, uso.ru_inblock, uso.ru_oublock]).encode())
+codigo = os.waitstatus_to_exitcode(estado)
+sys.exit(codigo if codigo >= 0 else 128 - codigo)
+"""
+
+
+def lanzar_medido(comando, **kwargs):
+    """Popen de `comando` a través del lanzador; devuelve (proceso, uso).
+
+    `uso()` se llama después de que el proceso terminó y devuelve el dict de métricas de
+    recursos del comando (None si el lanzador no llegó a reportarlas).
+    """
+    lectura, escritura = os.pipe()
+    try:
+        proceso = subprocess.Popen([sys.executable, "-S", "-c", LANZADOR, str(escritura), *comando],
+                                   pass_fds=(escritura,), **kwargs)
+    finally:
+        os.close(escritura)
+
+    def uso():
+        with os.fdopen(lectura, "rb") as f:
+            datos = f.read()
+        return desde_rusage(json.loads(datos)) if datos else None
+
+    return proceso, uso
+
+
+def desde_rusage(uso):
+    """Métricas de recursos a partir de (ru_utime, ru_stime, ru_maxrss, ru_inblock, ru_oublock)."""
+    utime, stime, maxrss, inblock, oublock = uso
+    return {
+        "cpu_usuario_s": round(utime, 3),
+        "cpu_sistema_s": round(stime, 3),
+        # En Linux ru_maxrss viene en KB (en macOS, en bytes)
+        "rss_pico_mb": round(maxrss / (1024**2 if sys.platform == "darwin" else 1024), 1),
+        "bytes_leidos": inblock * BYTES_BLOQUE,
+        "bytes_escritos": oublock * BYTES_BLOQUE,
+    }
+
+
+def filas_salidas(rutas):
+    """Filas totales de las salidas .parquet (solo lee los metadatos); None si no hay ninguna."""
+    parquets = [r for r in rutas if r.endswith(".parquet") and os.path.exists(r)]
+    if not parquets:
+        return None
+    return sum(pl.scan_parquet(r).select(pl.len()).collect().item() for r in parquets)
+
+
+def registrar(filas, ruta=RUTA_METRICAS):
+    """Agrega las filas (dicts con las claves de ESQUEMA) al final de `ruta`."""
+    if not filas:
+        return
+    nuevas = pl.DataFrame([{c: f.get(c) for c in ESQUEMA} for f in filas], schema=ESQUEMA)
+    if os.path.exists(ruta):
+        nuevas = pl.concat([pl.read_parquet(ruta), nuevas], how="diagonal_relaxed")
+
+    os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+    temporal = f"{ruta}.{os.getpid()}.tmp"
+    nuevas.write_parquet(temporal)
+    os.replace(temporal, ruta)
+
+
+def comparar(ruta=RUTA_METRICAS, previas=CORRIDAS_PREVIAS, umbral=UMBRAL_REGRESION):
+    """Tabla por etapa: métricas de la última corrida, mediana de las `previas` corridas
+    anteriores (solo ejecuciones exitosas) y el cociente entre ambas."""
+    metricas = pl.read_parquet(ruta)
+    ultima = metricas["corrida"].max()
+    actual = metricas.filter(pl.col("corrida") == ultima)
+
+    # Para cada etapa, sus últimas `previas` ejecuciones exitosas antes de la corrida actual
+    historial = (
+        metricas.filter((pl.col("corrida") < ultima) & (pl.col("estado") == "ejecutada"))
+        .sort("corrida", descending=True)
+        .group_by("etapa", maintain_order=True)
+        .head(previas)
+        .group_by("etapa")
+        .agg(pl.len().alias("n_previas"), *[pl.col(c).median().alias(f"{c}_previa") for c in COMPARADAS])
+    )
+
+    tabla = actual.join(historial, on="etapa", how="left")
+    return tabla.with_columns(
+        [pl.when(pl.col(f"{c}_previa") > 0).then(pl.col(c) / pl.col(f"{c}_previa")).alias(f"{c}_cociente")
+         for c in COMPARADAS]
+    ).with_columns(
+        pl.concat_list([
+            pl.when((pl.col(f"{c}_cociente") > umbral) & (pl.col(c) - pl.col(f"{c}_previa") > minimo)).then(pl.lit(c))
+            for c, minimo in COMPARADAS.items()
+        ]).list.drop_nulls().alias("regresiones")
+    ), ultima
+
+
+def _formato(valor, columna):
+    if valor is None:
+        return "-"
+    if columna.startswith("bytes"):
+        return f"{valor / 1024**2:,.1f} MB"
+    if columna == "rss_pico_mb":
+        return f"{valor:,.0f} MB"
+    return f"{valor:,.2f} s"
+
+
+def imprimir_comparacion(ruta=RUTA_METRICAS, previas=CORRIDAS_PREVIAS, umbral=UMBRAL_REGRESION):
+    tabla, ultima = comparar(ruta, previas, umbral)
+    print(f"\n===== Corrida {ultima} vs mediana de hasta {previas} corridas previas =====")
+    for fila in tabla.iter_rows(named=True):
+        filas = "-" if fila["filas_salida"] is None else f"{fila['filas_salida']:,}"
+        print(f"\n{fila['etapa']} ({fila['estado']}, {fila['n_previas'] or 0} previas, filas de salida: {filas})")
+        for c in COMPARADAS:
+            cociente = fila[f"{c}_cociente"]
+            marca = "  ⚠️" if c in fila["regresiones"] else ""
+            relacion = "" if cociente is None else f"  x{cociente:.2f}"
+            print(f"  {c:<14} {_formato(fila[c], c):>12}  (previa {_formato(fila[f'{c}_previa'], c)}){relacion}{marca}")
+
+    con_regresion = tabla.filter(pl.col("regresiones").list.len() > 0)["etapa"].to_list()
+    if con_regresion:
+        print(f"\n⚠️ Regresiones (> x{umbral:g} de la mediana previa): {', '.join(con_regresion)}")
+    else:
+        print("\n✅ Sin regresiones respecto de las corridas previas.")
+
+
+if __name__ == "__main__":
+    # Uso: python metricas.py [corridas_previas]
+    directorio = os.path.dirname(os.path.abspath(__file__))
+    ruta = os.path.join(directorio, RUTA_METRICAS)
+    if not os.path.exists(ruta):
+        raise SystemExit(f"❌ No hay métricas en '{ruta}'. Ejecuta primero el pipeline (python main.py).")
+    imprimir_comparacion(ruta, int(sys.argv[1]) if len(sys.argv) > 1 else CORRIDAS_PREVIAS)
@@ -0,0 +1,359 @@
+import ast
+import hashlib
+import json
+import logging
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+
+from logger_config import setup_logger
+from metricas import RUTA_METRICAS, filas_salidas, lanzar_medido, registrar
+
+log = setup_logger()
+
+# =============================
+# Motor del pipeline: etapas con entradas y salidas declaradas
+# =============================
+# Cada etapa es un script. Su huella (sha256) combina el contenido de sus entradas, el
+# código del script y de los módulos locales que importa, y sus argumentos/parámetros.
+# Una etapa se omite si su huella coincide con la de la última ejecución exitosa y sus
+# salidas siguen en disco sin cambios (como make, pero comparando contenido).
+DIRECTORIO_RUNS = "runs"
+BLOQUE_HASH = 8 * 1024 * 1024  # Bytes leídos por iteración al calcular sha256
+FRACCION_MEMORIA = 0.8         # Presupuesto de memoria por defecto: fracción de la RAM física
+
+
+class Etapa:
+    """Un script del pipeline.
+
+    - entradas:   archivos que lee; una etapa depende de otra si lee alguna de sus salidas
+    - salidas:    archivos que escribe
+    - argumentos: argumentos de línea de comandos para el script
+    - parametros: dict de valores que afectan el resultado (entran en la huella)
+    - opcional:   solo se ejecuta con --todas o si se pide por nombre
+    - memoria_mb: pico de memoria estimado; las etapas en paralelo no superan el presupuesto
+    """
+
+    def __init__(self, nombre, script, entradas=(), salidas=(), argumentos=(), parametros=None, opcional=False,
+                 memoria_mb=0):
+        self.nombre = nombre
+        self.script = script
+        self.entradas = list(entradas)
+        self.salidas = list(salidas)
+        self.argumentos = list(argumentos)
+        self.parametros = parametros or {}
+        self.opcional = opcional
+        self.memoria_mb = memoria_mb
+
+    def __repr__(self):
+        return f"Etapa({self.nombre!r})"
+
+
+def _leer_json(ruta, defecto):
+    if not os.path.exists(ruta):
+        return defecto
+    with open(ruta, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _escribir_json(ruta, datos):
+    # Temporal + reemplazo: un corte a mitad de escritura no deja el archivo truncado
+    os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+    temporal = ruta + ".tmp"
+    with open(temporal, "w", encoding="utf-8") as f:
+        json.dump(datos, f, indent=2)
+    os.replace(temporal, ruta)
+
+
+def memoria_total_mb():
+    """RAM física del equipo en MB."""
+    return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") / 1024**2
+
+
+def _firma(ruta):
+    """(tamaño, mtime_ns) del archivo: detecta cambios sin leer el contenido."""
+    st = os.stat(ruta)
+    return [st.st_size, st.st_mtime_ns]
+
+
+class Pipeline:
+    """Ordena las etapas según sus dependencias y ejecuta solo las desactualizadas."""
+
+    def __init__(self, etapas, directorio):
+        self.etapas = {e.nombre: e for e in etapas}
+        self.directorio = directorio
+        self.dir_runs = os.path.join(directorio, DIRECTORIO_RUNS)
+        self.ruta_estado = os.path.join(self.dir_runs, "estado.json")
+        self.ruta_hashes = os.path.join(self.dir_runs, "hashes.json")
+        self.ruta_metricas = os.path.join(directorio, RUTA_METRICAS)
+        # Caché sha256 por archivo: solo se vuelve a leer si cambió su firma
+        self._hashes = _leer_json(self.ruta_hashes, {})
+        self.dependencias = self._dependencias()
+
+    # ---------- grafo de etapas ----------
+    def _dependencias(self):
+        productor = {}
+        for etapa in self.etapas.values():
+            for salida in etapa.salidas:
+                if salida in productor:
+                    raise ValueError(f"❌ '{salida}' es salida de '{productor[salida]}' y de '{etapa.nombre}'.")
+                productor[salida] = etapa.nombre
+        return {
+            etapa.nombre: sorted({productor[e] for e in etapa.entradas if e in productor} - {etapa.nombre})
+            for etapa in self.etapas.values()
+        }
+
+    def orden(self, nombres):
+        """Etapas pedidas más todas sus dependencias, en orden topológico."""
+        resultado, visitando, hechas = [], set(), set()
+
+        def visitar(nombre):
+            if nombre in hechas:
+                return
+            if nombre in visitando:
+                raise ValueError(f"❌ Ciclo de dependencias en la etapa '{nombre}'.")
+            visitando.add(nombre)
+            for previa in self.dependencias[nombre]:
+                visitar(previa)
+            visitando.discard(nombre)
+            hechas.add(nombre)
+            resultado.append(self.etapas[nombre])
+
+        for nombre in nombres:
+            if nombre not in self.etapas:
+                raise ValueError(f"❌ Etapa desconocida '{nombre}'. Disponibles: {', '.join(self.etapas)}")
+            visitar(nombre)
+        return resultado
+
+    # ---------- huellas ----------
+    def _ruta(self, relativa):
+        return os.path.join(self.directorio, relativa)
+
+    def _sha256(self, relativa):
+        ruta = self._ruta(relativa)
+        firma = _firma(ruta)
+        guardado = self._hashes.get(relativa)
+        if guardado and guardado["firma"] == firma:
+            return guardado["sha256"]
+        h = hashlib.sha256()
+        with open(ruta, "rb") as f:
+            while bloque := f.read(BLOQUE_HASH):
+                h.update(bloque)
+        self._hashes[relativa] = {"firma": firma, "sha256": h.hexdigest()}
+        return self._hashes[relativa]["sha256"]
+
+    def _codigo(self, etapa):
+        """Script de la etapa más los módulos locales que importa (recursivamente)."""
+        pendientes, vistos = [etapa.script], set()
+        while pendientes:
+            modulo = pendientes.pop()
+            if modulo in vistos:
+                continue
+            vistos.add(modulo)
+            with open(self._ruta(modulo), encoding="utf-8") as f:
+                arbol = ast.parse(f.read())
+            for nodo in ast.walk(arbol):
+                if isinstance(nodo, ast.Import):
+                    nombres = [a.name.split(".")[0] for a in nodo.names]
+                elif isinstance(nodo, ast.ImportFrom) and nodo.module and not nodo.level:
+                    nombres = [nodo.module.split(".")[0]]
+                else:
+                    continue
+                pendientes.extend(f"{n}.py" for n in nombres if os.path.exists(self._ruta(f"{n}.py")))
+        return sorted(vistos)
+
+    def huella(self, etapa):
+        faltantes = [e for e in etapa.entradas if not os.path.exists(self._ruta(e))]
+        if faltantes:
+            raise FileNotFoundError(f"❌ Faltan entradas de '{etapa.nombre}': {', '.join(faltantes)}")
+        contenido = {
+            "script": etapa.script,
+            "argumentos": etapa.argumentos,
+            "parametros": etapa.parametros,
+            "codigo": {m: self._sha256(m) for m in self._codigo(etapa)},
+            "entradas": {e: self._sha256(e) for e in sorted(etapa.entradas)},
+        }
+        return hashlib.sha256(json.dumps(contenido, sort_keys=True).encode()).hexdigest()
+
+    def motivo(self, etapa, huella, estado):
+        """Por qué la etapa debe ejecutarse (None si está al día)."""
+        previo = estado.get(etapa.nombre)
+        if previo is None:
+            return "sin ejecuciones previas"
+        if previo["huella"] != huella:
+            return "cambiaron entradas, código o parámetros"
+        for salida in etapa.salidas:
+            if not os.path.exists(self._ruta(salida)):
+                return f"falta la salida {salida}"
+            if previo["salidas"].get(salida) != _firma(self._ruta(salida)):
+                return f"la salida {salida} se modificó fuera del pipeline"
+        return None
+
+    # ---------- ejecución ----------
+    def _lanzar(self, etapa, terminadas):
+        """Inicia el script de la etapa; al terminar deja (nombre, código, métricas) en `terminadas`.
+
+        La salida se reenvía al log línea por línea mientras el script corre (stdout como
+        INFO, stderr como WARNING), con el nombre de la etapa como prefijo.
+        """
+        # A través del lanzador de metricas.py: además del código de salida se obtiene el uso
+        # de recursos (CPU, pico de RSS, bloques de disco) del script
+        proceso, uso = lanzar_medido(
+            [sys.executable, etapa.script, *etapa.argumentos],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            bufsize=1,
+            cwd=self.directorio,
+            env=dict(os.environ, PYTHONUNBUFFERED="1"),  # Sin buffer: las líneas llegan al instante
+        )
+
+        def reenviar(flujo, nivel):
+            for linea in flujo:
+                log.log(nivel, f"[{etapa.nombre}] {linea.rstrip()}")
+
+        lectores = [
+            threading.Thread(target=reenviar, args=(proceso.stdout, logging.INFO), daemon=True),
+            threading.Thread(target=reenviar, args=(proceso.stderr, logging.WARNING), daemon=True),
+        ]
+        for lector in lectores:
+            lector.start()
+
+        def esperar():
+            codigo = proceso.wait()
+            for lector in lectores:
+                lector.join()
+            terminadas.put((etapa.nombre, codigo, uso()))
+
+        threading.Thread(target=esperar, daemon=True).start()
+
+    def ejecutar(self, nombres, forzar=False, max_procesos=1, memoria_mb=None):
+        """Ejecuta las etapas pedidas (y sus dependencias); devuelve el manifiesto de la corrida.
+
+        Las etapas cuyas dependencias ya terminaron corren en paralelo, con a lo sumo
+        `max_procesos` subprocesos y sin que la suma de `memoria_mb` de las etapas en curso
+        supere el presupuesto (por defecto, FRACCION_MEMORIA de la RAM). Una etapa que por sí
+        sola excede el presupuesto se ejecuta cuando no hay ninguna otra en curso.
+        """
+        # Con menos de un proceso nunca se lanzaría nada y el bucle de espera no terminaría
+        assert max_procesos >= 1, f"max_procesos debe ser >= 1, no {max_procesos}"
+        plan = self.orden(nombres)
+        estado = _leer_json(self.ruta_estado, {})
+        presupuesto = memoria_mb if memoria_mb is not None else memoria_total_mb() * FRACCION_MEMORIA
+        inicio_corrida = datetime.now()
+        manifiesto = {
+            "corrida": inicio_corrida.strftime("%Y%m%d_%H%M%S_%f"),
+            "inicio": inicio_corrida.isoformat(timespec="seconds"),
+            "forzar": forzar,
+            "max_procesos": max_procesos,
+            "memoria_mb": round(presupuesto),
+            "etapas": [],
+        }
+        metricas = []  # Una fila por etapa ejecutada (exitosa o no) para runs/metrics.parquet
+        log.info(f"⚙️ {len(plan)} etapas | hasta {max_procesos} en paralelo | presupuesto {presupuesto:,.0f} MB")
+
+        pendientes = list(plan)
+        listas = {}    # nombre -> (huella, registro) de las etapas que esperan un proceso libre
+        en_curso = {}  # nombre -> (etapa, registro, huella, inicio)
+        terminadas = queue.Queue()
+        completas, fallidas = set(), set()
+        memoria_libre = presupuesto
+
+        while pendientes or en_curso:
+            for etapa in list(pendientes):
+                dependencias = self.dependencias[etapa.nombre]
+                bloqueada = [d for d in dependencias if d in fallidas]
+                if not bloqueada and not all(d in completas for d in dependencias):
+                    continue
+
+                if bloqueada:
+                    pendientes.remove(etapa)
+                    registro = {"nombre": etapa.nombre, "script": etapa.script,
+                                "estado": "omitida", "motivo": f"falló la dependencia {bloqueada[0]}"}
+                    manifiesto["etapas"].append(registro)
+                    fallidas.add(etapa.nombre)
+                    log.warning(f"⏭️ {etapa.nombre} omitida: falló {bloqueada[0]}")
+                    continue
+
+                # Lista: se verifica la huella antes de ocupar un proceso
+                if etapa.nombre not in listas:
+                    inicio = time.time()
+                    registro = {"nombre": etapa.nombre, "script": etapa.script}
+                    try:
+                        huella = self.huella(etapa)
+                    except (OSError, ValueError) as e:
+                        pendientes.remove(etapa)
+                        registro.update(estado="fallida", motivo=str(e))
+                        manifiesto["etapas"].append(registro)
+                        fallidas.add(etapa.nombre)
+                        log.error(str(e))
+                        continue
+                    motivo = "--forzar" if forzar else self.motivo(etapa, huella, estado)
+                    registro["huella"] = huella
+                    if motivo is None:
+                        pendientes.remove(etapa)
+                        registro.update(estado="al_dia", duracion_s=round(time.time() - inicio, 3))
+                        manifiesto["etapas"].append(registro)
+                        completas.add(etapa.nombre)
+                        log.info(f"✅ {etapa.nombre} al día, se omite ({registro['duracion_s']:.2f} s de verificación)")
+                        continue
+                    registro["motivo"] = motivo
+                    listas[etapa.nombre] = (huella, registro)
+
+                if len(en_curso) >= max_procesos:
+                    continue
+                if en_curso and etapa.memoria_mb > memoria_libre:
+                    continue
+
+                pendientes.remove(etapa)
+                huella, registro = listas.pop(etapa.nombre)
+                memoria_libre -= etapa.memoria_mb
+                registro["inicio"] = datetime.now().isoformat(timespec="seconds")
+                en_curso[etapa.nombre] = (etapa, registro, huella, time.time())
+                log.info(f"🚀 Ejecutando {etapa.script} ({registro['motivo']}) "
+                         f"[{len(en_curso)} en curso, {etapa.memoria_mb:,} MB reservados]")
+                self._lanzar(etapa, terminadas)
+
+            if not en_curso:
+                continue
+
+            # Esperar a que termine alguna etapa en curso
+            nombre, codigo, uso = terminadas.get()
+            etapa, registro, huella, inicio = en_curso.pop(nombre)
+            memoria_libre += etapa.memoria_mb
+            manifiesto["etapas"].append(registro)
+            registro.update(codigo_salida=codigo, duracion_s=round(time.time() - inicio, 3), **(uso or {}))
+            faltantes = [s for s in etapa.salidas if not os.path.exists(self._ruta(s))]
+            registro["estado"] = "fallida" if codigo != 0 or faltantes else "ejecutada"
+            registro["filas_salida"] = filas_salidas([self._ruta(s) for s in etapa.salidas])
+            metricas.append(dict(registro, corrida=manifiesto["corrida"], etapa=nombre))
+
+            if registro["estado"] == "fallida":
+                fallidas.add(nombre)
+                detalle = f"código {codigo}" if codigo != 0 else f"no generó {', '.join(faltantes)}"
+                log.error(f"❌ {nombre} falló ({detalle}).")
+                continue
+
+            completas.add(nombre)
+            estado[nombre] = {
+                "huella": huella,
+                "salidas": {s: _firma(self._ruta(s)) for s in etapa.salidas},
+                "fecha": datetime.now().isoformat(timespec="seconds"),
+                "duracion_s": registro["duracion_s"],
+            }
+            # El estado se guarda tras cada etapa: si el pipeline se corta, lo hecho no se repite
+            _escribir_json(self.ruta_estado, estado)
+            recursos = "" if uso is None else (f" (CPU {uso['cpu_usuario_s'] + uso['cpu_sistema_s']:.2f} s, "
+                                               f"pico {uso['rss_pico_mb']:,.0f} MB)")
+            log.info(f"✅ {nombre} completada en {registro['duracion_s']:.2f} s{recursos}")
+
+        manifiesto["fin"] = datetime.now().isoformat(timespec="seconds")
+        manifiesto["duracion_s"] = round((datetime.now() - inicio_corrida).total_seconds(), 3)
+        _escribir_json(self.ruta_hashes, self._hashes)
+        registrar(metricas, self.ruta_metricas)
+        _escribir_json(os.path.join(self.dir_runs, f"run_{manifiesto['corrida']}.json"), manifiesto)
+        return manifiesto
@@ -0,0 +1,81 @@
+import numpy as np
+
+# Aristas por sublote en union_many
+SUBLOTE = 65_536
+
+
+class UnionFind:
+    """Union-Find (DSU) sobre arreglos NumPy int32.
+
+    - parent[u]: padre de u (u es raíz si parent[u] == u)
+    - size[r]:   cantidad de nodos del conjunto cuya raíz es r
+
+    `find` es iterativo con path halving (no depende del límite de recursión) y `union`
+    cuelga siempre el árbol más chico del más grande. Los nodos son los enteros 0..n-1.
+    """
+
+    def __init__(self, n):
+        self.parent = np.arange(n, dtype=np.int32)
+        self.size = np.ones(n, dtype=np.int32)
+
+    def __len__(self):
+        return len(self.parent)
+
+    def find(self, u):
+        parent = self.parent
+        while parent[u] != u:
+            # Path halving: cada nodo del camino apunta a su abuelo
+            parent[u] = parent[parent[u]]
+            u = parent[u]
+        return int(u)
+
+    def _unir_raices(self, ru, rv):
+        if ru == rv:
+            return False
+        if self.size[ru] < self.size[rv]:
+            ru, rv = rv, ru
+        self.parent[rv] = ru
+        self.size[ru] += self.size[rv]
+        return True
+
+    def union(self, u, v):
+        """Une los conjuntos de u y v; devuelve False si ya estaban juntos."""
+        return self._unir_raices(self.find(u), self.find(v))
+
+    def find_many(self, nodos):
+        """Raíz de cada nodo del arreglo (saltos de puntero vectorizados)."""
+        nodos = np.asarray(nodos)
+        raices = self.parent[nodos]
+        while True:
+            siguientes = self.parent[raices]
+            if np.array_equal(siguientes, raices):
+                break
+            raices = siguientes
+        # Compresión: los nodos consultados quedan apuntando directo a su raíz
+        self.parent[nodos] = raices
+        return raices
+
+    def union_many(self, u, v):
+        """Une las aristas (u[i], v[i]) en orden; devuelve la máscara de las que unieron conjuntos.
+
+        Las aristas cuyos extremos ya comparten raíz al inicio del lote se descartan en bloque;
+        solo las restantes se procesan una por una (el orden importa para Kruskal).
+        """
+        u = np.asarray(u)
+        v = np.asarray(v)
+        aceptadas = np.zeros(len(u), dtype=bool)
+
+        # Por sublotes: las raíces se recalculan con lo ya unido (más descartes en bloque) y las
+        # listas de Python del recorrido secuencial quedan acotadas
+        for inicio in range(0, len(u), SUBLOTE):
+            ru = self.find_many(u[inicio:inicio + SUBLOTE])
+            rv = self.find_many(v[inicio:inicio + SUBLOTE])
+            candidatas = np.flatnonzero(ru != rv)
+            for i, a, b in zip(candidatas.tolist(), ru[candidatas].tolist(), rv[candidatas].tolist()):
+                if self._unir_raices(self.find(a), self.find(b)):
+                    aceptadas[inicio + i] = True
+        return aceptadas
+
+    def num_componentes(self):
+        """Cantidad de conjuntos (raíces), en O(n)."""
+        return int(np.count_nonzero(self.parent == np.arange(len(self.parent), dtype=np.int32)))
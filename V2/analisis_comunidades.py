@@ -1,98 +1,187 @@
-import pickle
-from collections import defaultdict, Counter
-import statistics
-
-# ========================
-# Cargar grafo
-# ========================
-with open("data/grafo_con_comunidades.pkl", "rb") as f:
-    grafo = pickle.load(f)
-
-if not hasattr(grafo, "comunidades"):
-    raise ValueError("❌ El grafo no tiene atributo 'comunidades'. Debes calcularlas primero.")
-
-# ========================
-# Construir estructura por comunidad
-# ========================
-comunidades = defaultdict(set)
-for nodo, comunidad in grafo.comunidades.items():
-    comunidades[comunidad].add(nodo)
-
-# ========================
-# Análisis por comunidad
-# ========================
-def analizar_comunidad(comunidad_id):
-    if comunidad_id not in comunidades:
-        print(f"❌ Comunidad {comunidad_id} no encontrada.")
-        return
-
-    nodos = comunidades[comunidad_id]
-    total_nodos = len(nodos)
-
-    aristas = 0
-    in_degrees = Counter()
-
-    for u in nodos:
-        for v, _ in grafo.adj.get(u, []):  # ahora v, peso
-            if v in nodos:
-                aristas += 1
-                in_degrees[v] += 1
-
-    grado_promedio = aristas / total_nodos if total_nodos else 0
-    top_nodos = in_degrees.most_common(10)
-
-    print(f"\n===== Comunidad {comunidad_id} =====")
-    print(f"Nodos totales       : {total_nodos}")
-    print(f"Aristas internas    : {aristas}")
-    print(f"Grado promedio      : {grado_promedio:.2f}")
-    print(f"Top 10 más populares (in-degree):")
-    for nodo, grado in top_nodos:
-        print(f"  Nodo {nodo:<6} → {grado} conexiones entrantes")
-
-# ========================
-# Análisis general
-# ========================
-def analisis_general():
-    resumen = []
-    print("\n===== Análisis General de Comunidades =====")
-    for cid, nodos in comunidades.items():
-        total_nodos = len(nodos)
-        aristas = 0
-        for u in nodos:
-            for v, _ in grafo.adj.get(u, []):  # considerar pesos, pero aquí solo se cuenta
-                if v in nodos:
-                    aristas += 1
-        grado_promedio = aristas / total_nodos if total_nodos else 0
-        resumen.append((cid, total_nodos, aristas, grado_promedio))
-
-    total_comunidades = len(resumen)
-    prom_nodos = statistics.mean(r[1] for r in resumen)
-    prom_aristas = statistics.mean(r[2] for r in resumen)
-    prom_grado = statistics.mean(r[3] for r in resumen)
-
-    print(f"Total de comunidades : {total_comunidades}")
-    print(f"Promedio de nodos    : {prom_nodos:.2f}")
-    print(f"Promedio de aristas  : {prom_aristas:.2f}")
-    print(f"Grado promedio global: {prom_grado:.2f}")
-
-    print("\nTop 5 comunidades más grandes:")
-    for cid, n, _, _ in sorted(resumen, key=lambda x: -x[1])[:25]:
-        print(f"  Comunidad {cid:<4} con {n} nodos")
-
-    min_nodos = 100
-
-    print(f"\nTop 10 comunidades más pequeñas con más de {min_nodos} nodos:")
-    for cid, n, _, _ in sorted([r for r in resumen if r[1] > min_nodos], key=lambda x: x[1])[:10]:
-        print(f"  Comunidad {cid:<4} con {n} nodos")
-
-# ========================
-# Ejecutar ejemplo
-# ========================
-if __name__ == "__main__":
-    print("ANALISIS DE COMUNIDADES\nOpciones:\n1. Analisis de Comunidad por ID\n2. Analisis General")
-    a = int(input("Opción: "))
-    if a == 1:
-        comunidad_id = int(input("Ingrese el ID de la comunidad a analizar: "))
-        analizar_comunidad(comunidad_id)
-    else:
-        analisis_general()
+import os
+import statistics
+
+import numpy as np
+import polars as pl
+from graphObj import CSRGraph
+from comunidades_io import RUTA_COMUNIDADES
+
+# ========================
+# Parámetros
+# ========================
+RUTA_GRAFO = "data/grafo"
+RUTA_ESTADISTICAS = "data/community_stats.parquet"
+CORRIDA = "louvain_propio"  # Corrida de data/comunidades.parquet
+
+
+# ========================
+# Estadísticas de todas las comunidades en una pasada
+# ========================
+def estadisticas_comunidades(grafo):
+    """Tabla con una fila por comunidad: nodos, aristas internas y de corte, grado promedio,
+    densidad y conductancia.
+
+    Cada arista se etiqueta con (comunidad del origen, comunidad del destino) y los conteos
+    por comunidad salen de un bincount sobre esas etiquetas: no se recorre ninguna lista de
+    vecinos. Las aristas hacia nodos sin comunidad (-1) cuentan como de corte.
+    """
+    n = grafo.num_ids
+    etiquetas = np.full(n, -1, dtype=np.int32)
+    m = min(n, len(grafo.community_labels))
+    etiquetas[:m] = grafo.community_labels[:m]
+    c = int(etiquetas.max()) + 1 if n else 0
+
+    com_origen = np.repeat(etiquetas, grafo.out_degree)
+    com_destino = etiquetas[grafo.indices]
+    iguales = com_origen == com_destino
+
+    nodos = np.bincount(etiquetas[etiquetas >= 0], minlength=c)
+    internas = np.bincount(com_origen[iguales & (com_origen >= 0)], minlength=c)
+    salientes = np.bincount(com_origen[~iguales & (com_origen >= 0)], minlength=c)
+    entrantes = np.bincount(com_destino[~iguales & (com_destino >= 0)], minlength=c)
+    del com_origen, com_destino, iguales
+
+    corte = salientes + entrantes
+    # Volumen = suma de grados (entrada + salida) de los miembros
+    volumen = 2 * internas + corte
+    complemento = 2 * len(grafo.indices) - volumen
+    minimo = np.minimum(volumen, complemento)
+    conductancia = np.divide(corte, minimo, out=np.full(c, np.nan), where=minimo > 0)
+    pares = nodos.astype(np.float64) * (nodos - 1)  # Aristas dirigidas posibles sin lazos
+    densidad = np.divide(internas, pares, out=np.zeros(c), where=pares > 0)
+    grado_promedio = np.divide(internas, nodos, out=np.zeros(c), where=nodos > 0)
+
+    presentes = nodos > 0
+    return pl.DataFrame({
+        "comunidad": np.flatnonzero(presentes).astype(np.int32),
+        "nodos": nodos[presentes],
+        "aristas_internas": internas[presentes],
+        "aristas_salientes": salientes[presentes],
+        "aristas_entrantes": entrantes[presentes],
+        "aristas_corte": corte[presentes],
+        "grado_promedio": grado_promedio[presentes],
+        "densidad": densidad[presentes],
+        "conductancia": conductancia[presentes],
+    })
+
+
+def guardar_estadisticas(tabla, corrida, ruta=RUTA_ESTADISTICAS):
+    """Guarda (o reemplaza) las filas de `corrida`; las demás corridas del archivo se conservan."""
+    tabla = tabla.select(pl.lit(corrida).alias("corrida"), pl.all())
+    if os.path.exists(ruta):
+        existentes = pl.read_parquet(ruta).filter(pl.col("corrida") != corrida)
+        tabla = pl.concat([existentes, tabla])
+
+    os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+    temporal = f"{ruta}.{os.getpid()}.tmp"  # Único por proceso: los mapas pueden correr en paralelo
+    tabla.write_parquet(temporal)
+    os.replace(temporal, ruta)
+
+
+def _vigentes(corrida, ruta, ruta_grafo):
+    """True si `ruta` tiene la corrida y es más nueva que el grafo y las comunidades."""
+    if not os.path.exists(ruta):
+        return False
+    fuentes = [os.path.join(ruta_grafo, "indptr.npy"), RUTA_COMUNIDADES]
+    modificado = max((os.path.getmtime(f) for f in fuentes if os.path.exists(f)), default=0)
+    if os.path.getmtime(ruta) < modificado:
+        return False
+    return pl.scan_parquet(ruta).filter(pl.col("corrida") == corrida).select(pl.len()).collect().item() > 0
+
+
+def cargar_estadisticas(corrida=CORRIDA, grafo=None, ruta=RUTA_ESTADISTICAS, ruta_grafo=RUTA_GRAFO):
+    """Estadísticas de la corrida desde `ruta`; si faltan o quedaron viejas se recalculan y guardan."""
+    if _vigentes(corrida, ruta, ruta_grafo):
+        return pl.read_parquet(ruta).filter(pl.col("corrida") == corrida).drop("corrida")
+
+    print(f"🧮 Calculando estadísticas de la corrida '{corrida}'...")
+    if grafo is None:
+        grafo = CSRGraph.load(ruta_grafo)
+        grafo.attach_communities(corrida)
+    tabla = estadisticas_comunidades(grafo)
+    guardar_estadisticas(tabla, corrida, ruta)
+    print(f"💾 Estadísticas guardadas en '{ruta}'")
+    return tabla
+
+
+# ========================
+# Análisis por comunidad
+# ========================
+def analizar_comunidad(grafo, estadisticas, comunidad_id):
+    fila = estadisticas.filter(pl.col("comunidad") == comunidad_id)
+    if fila.is_empty():
+        print(f"❌ Comunidad {comunidad_id} no encontrada.")
+        return
+    fila = fila.row(0, named=True)
+
+    # Top 10 por in-degree: el grafo ya trae el arreglo de grados, no hace falta contarlos
+    ids = np.flatnonzero(np.asarray(grafo.community_labels) == comunidad_id)
+    ids = ids[ids < grafo.num_ids]
+    grados = grafo.in_degree[ids]
+    top = np.argsort(-grados, kind="stable")[:10]
+    top_nodos = zip(ids[top].tolist(), grados[top].tolist())
+
+    print(f"\n===== Comunidad {comunidad_id} =====")
+    print(f"Nodos totales       : {fila['nodos']}")
+    print(f"Aristas internas    : {fila['aristas_internas']}")
+    print(f"Aristas de corte    : {fila['aristas_corte']} "
+          f"({fila['aristas_salientes']} salientes, {fila['aristas_entrantes']} entrantes)")
+    print(f"Grado promedio      : {fila['grado_promedio']:.2f}")
+    print(f"Densidad            : {fila['densidad']:.6f}")
+    print(f"Conductancia        : {fila['conductancia']:.4f}")
+    print(f"Top 10 más populares (in-degree):")
+    for nodo, grado in top_nodos:
+        print(f"  Nodo {nodo:<6} → {grado} conexiones entrantes")
+
+# ========================
+# Análisis general
+# ========================
+def analisis_general(estadisticas):
+    print("\n===== Análisis General de Comunidades =====")
+    resumen = estadisticas.select("comunidad", "nodos", "aristas_internas", "grado_promedio").rows()
+
+    total_comunidades = len(resumen)
+    prom_nodos = statistics.mean(r[1] for r in resumen)
+    prom_aristas = statistics.mean(r[2] for r in resumen)
+    prom_grado = statistics.mean(r[3] for r in resumen)
+    prom_conductancia = estadisticas["conductancia"].drop_nans().mean()
+
+    print(f"Total de comunidades : {total_comunidades}")
+    print(f"Promedio de nodos    : {prom_nodos:.2f}")
+    print(f"Promedio de aristas  : {prom_aristas:.2f}")
+    print(f"Grado promedio global: {prom_grado:.2f}")
+    print(f"Conductancia promedio: {prom_conductancia or 0:.4f}")
+
+    print("\nTop 5 comunidades más grandes:")
+    for cid, n, _, _ in sorted(resumen, key=lambda x: -x[1])[:25]:
+        print(f"  Comunidad {cid:<4} con {n} nodos")
+
+    min_nodos = 100
+
+    print(f"\nTop 10 comunidades más pequeñas con más de {min_nodos} nodos:")
+    for cid, n, _, _ in sorted([r for r in resumen if r[1] > min_nodos], key=lambda x: x[1])[:10]:
+        print(f"  Comunidad {cid:<4} con {n} nodos")
+
+# ========================
+# Ejecutar ejemplo
+# ========================
+if __name__ == "__main__":
+    # ========================
+    # Cargar grafo
+    # ========================
+    grafo = CSRGraph.load(RUTA_GRAFO)
+    grafo.attach_communities(CORRIDA)
+
+    if not hasattr(grafo, "comunidades"):
+        raise ValueError("❌ El grafo no tiene atributo 'comunidades'. Debes calcularlas primero.")
+
+    # Se leen de data/community_stats.parquet (se calculan solo si faltan o quedaron viejas)
+    estadisticas = cargar_estadisticas(CORRIDA, grafo)
+
+    print("ANALISIS DE COMUNIDADES\nOpciones:\n1. Analisis de Comunidad por ID\n2. Analisis General")
+    a = int(input("Opción: "))
+    if a == 1:
+        comunidad_id = int(input("Ingrese el ID de la comunidad a analizar: "))
+        analizar_comunidad(grafo, estadisticas, comunidad_id)
+    else:
+        analisis_general(estadisticas)
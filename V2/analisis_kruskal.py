@@ -1,137 +1,187 @@
-import pickle
-import plotly.graph_objects as go
-from collections import deque, defaultdict
-
-# =======================
-# 📦 Cargar grafo con comunidades
-# =======================
-with open("data/grafo_con_comunidades.pkl", "rb") as f:
-    grafo = pickle.load(f)
-
-# =======================
-# 🎯 Comunidad objetivo
-# =======================
-comunidad_objetivo = 7
-max_nodos_mostrar = 5000  # Limitar cantidad de nodos mostrados
-
-# =======================
-# 🔎 Filtrar nodos de la comunidad
-# =======================
-nodos = {nid for nid, com in grafo.comunidades.items() if com == comunidad_objetivo}
-aristas = []
-
-for u in nodos:
-    for v, w in grafo.adj.get(u, []):
-        if v in nodos and u < v:
-            aristas.append((u, v, w))
-
-# =======================
-# 🔗 Kruskal con Union-Find
-# =======================
-class UnionFind:
-    def __init__(self):
-        self.parent = {}
-
-    def find(self, u):
-        if self.parent.get(u, u) != u:
-            self.parent[u] = self.find(self.parent[u])
-        return self.parent.get(u, u)
-
-    def union(self, u, v):
-        pu, pv = self.find(u), self.find(v)
-        if pu == pv:
-            return False
-        self.parent[pu] = pv
-        return True
-
-uf = UnionFind()
-mst = []
-peso_total = 0
-aristas_ordenadas = sorted(aristas, key=lambda x: x[2])
-
-for u, v, w in aristas_ordenadas:
-    if uf.union(u, v):
-        mst.append((u, v, w))
-        peso_total += w
-
-# =======================
-# 🌳 Construir grafo MST para BFS
-# =======================
-mst_adj = defaultdict(list)
-for u, v, w in mst:
-    mst_adj[u].append((v, w))
-    mst_adj[v].append((u, w))
-
-# Elegir raíz como nodo con mayor grado
-root = max(mst_adj, key=lambda x: len(mst_adj[x]))
-
-# BFS para recorrer primeros niveles
-visited = set()
-queue = deque([root])
-ordenado = []
-
-while queue and len(visited) < max_nodos_mostrar:
-    u = queue.popleft()
-    if u in visited:
-        continue
-    visited.add(u)
-    ordenado.append(u)
-    for v, _ in mst_adj[u]:
-        if v not in visited:
-            queue.append(v)
-
-nodos_visibles = set(ordenado)
-
-# =======================
-# 📈 Visualización del MST limitado por BFS
-# =======================
-edges = []
-for u, v, _ in mst:
-    if u in nodos_visibles and v in nodos_visibles:
-        lat1, lon1 = grafo.locations[u]
-        lat2, lon2 = grafo.locations[v]
-        edges.append(go.Scattergeo(
-            lon=[lon1, lon2, None],
-            lat=[lat1, lat2, None],
-            mode='lines',
-            line=dict(width=0.7, color='orange'),
-            hoverinfo='none',
-            showlegend=False
-        ))
-
-nodes = go.Scattergeo(
-    lon=[grafo.locations[n][1] for n in nodos_visibles],
-    lat=[grafo.locations[n][0] for n in nodos_visibles],
-    mode="markers",
-    marker=dict(size=3, color="blue", opacity=0.7),
-    name=f"Nodos Comunidad {comunidad_objetivo}",
-    hovertext=[f"ID: {nid}" for nid in nodos_visibles],
-    hoverinfo="text"
-)
-
-fig = go.Figure(data=[*edges, nodes])
-fig.update_layout(
-    title=f"MST – Comunidad {comunidad_objetivo} (primeros niveles, máx. {max_nodos_mostrar} nodos)",
-    geo=dict(
-        showland=True,
-        landcolor="rgb(240,240,240)",
-        oceancolor="rgb(210, 230, 255)",
-        showocean=True,
-        showcountries=True,
-        countrycolor="black",
-        projection_type="natural earth"
-    ),
-    margin=dict(l=0, r=0, t=50, b=0)
-)
-
-fig.write_html(f"graficos/MST/mst_comunidad_{comunidad_objetivo}_niveles.html")
-fig.show()
-
-# =======================
-# 📊 Resultados finales
-# =======================
-print(f"✅ Comunidad analizada: {comunidad_objetivo}")
-print(f"🌲 Aristas en el MST: {len(mst)}")
-print(f"⚖️ Peso total del árbol: {peso_total:.2f}")
-print(f"🔗 Componentes conectados: {len(set(uf.find(n) for n in nodos))}")
-print(f"📌 Nodos visualizados (niveles más cercanos): {len(nodos_visibles)}")
+import sys
+import time
+
+import numpy as np
+import polars as pl
+from graphObj import CSRGraph
+from union_find import UnionFind
+from mapa_aristas import trazas_aristas
+import plotly.graph_objects as go
+from collections import deque, defaultdict
+
+# =======================
+# ⚙️ Parámetros
+# =======================
+CORRIDA = "louvain_propio"  # Corrida de data/comunidades.parquet
+comunidad_objetivo = 7
+max_nodos_mostrar = 5000  # Limitar cantidad de nodos mostrados
+RUTA_TABLA = "data/mst_comunidades.parquet"
+
+
+# =======================
+# 🔎 Aristas internas de las comunidades (vectorizado sobre el CSR)
+# =======================
+def aristas_internas(grafo, etiquetas):
+    """Aristas cuyos dos extremos tienen la misma comunidad: (comunidad, u, v, peso)."""
+    if len(etiquetas) < grafo.num_ids:
+        etiquetas = np.concatenate([etiquetas, np.full(grafo.num_ids - len(etiquetas), -1, dtype=np.int32)])
+    origenes = grafo.edge_sources()
+    destinos = np.asarray(grafo.indices)
+    comunidad = etiquetas[origenes]
+    internas = (comunidad >= 0) & (comunidad == etiquetas[destinos]) & (origenes != destinos)
+    return (
+        comunidad[internas],
+        origenes[internas],
+        destinos[internas],
+        np.asarray(grafo.weights[internas], dtype=np.float64),
+    )
+
+
+# =======================
+# 🔗 Kruskal de una comunidad
+# =======================
+def mst_comunidad(grafo, etiquetas, objetivo):
+    comunidades, u, v, w = aristas_internas(grafo, etiquetas)
+    propias = comunidades == objetivo
+    u, v, w = u[propias], v[propias], w[propias]
+    orden = np.argsort(w, kind="stable")
+
+    uf = UnionFind(grafo.num_ids)
+    aceptadas = orden[uf.union_many(u[orden], v[orden])]
+    mst = list(zip(u[aceptadas].tolist(), v[aceptadas].tolist(), w[aceptadas].tolist()))
+    componentes = int(np.count_nonzero(etiquetas == objetivo)) - len(mst)  # En un bosque: componentes = nodos - aristas
+    return mst, float(w[aceptadas].sum()), componentes
+
+
+# =======================
+# 🗂️ Kruskal de todas las comunidades en una sola pasada
+# =======================
+def mst_por_comunidad(grafo, etiquetas):
+    """Tabla por comunidad: nodos, aristas internas, aristas y peso del MST, componentes.
+
+    Las aristas internas se ordenan una vez por (comunidad, peso) y pasan por un único
+    Union-Find: como las comunidades son conjuntos disjuntos de nodos, cada una obtiene
+    su propio bosque de expansión mínima.
+    """
+    comunidades, u, v, w = aristas_internas(grafo, etiquetas)
+    orden = np.lexsort((w, comunidades))
+
+    uf = UnionFind(grafo.num_ids)
+    aceptadas = orden[uf.union_many(u[orden], v[orden])]
+
+    validas = etiquetas[etiquetas >= 0]
+    total = int(validas.max()) + 1 if len(validas) else 0
+    nodos = np.bincount(validas, minlength=total)
+    aristas_mst = np.bincount(comunidades[aceptadas], minlength=total)
+
+    tabla = pl.DataFrame({
+        "comunidad": np.arange(total, dtype=np.int32),
+        "nodos": nodos,
+        "aristas_internas": np.bincount(comunidades, minlength=total),
+        "aristas_mst": aristas_mst,
+        "peso_mst": np.bincount(comunidades[aceptadas], weights=w[aceptadas], minlength=total),
+        "componentes": nodos - aristas_mst,
+    })
+    return tabla.filter(pl.col("nodos") > 0)
+
+
+def dibujar_mst(grafo, mst):
+    # =======================
+    # 🌳 Construir grafo MST para BFS
+    # =======================
+    mst_adj = defaultdict(list)
+    for u, v, w in mst:
+        mst_adj[u].append((v, w))
+        mst_adj[v].append((u, w))
+
+    # Elegir raíz como nodo con mayor grado
+    root = max(mst_adj, key=lambda x: len(mst_adj[x]))
+
+    # BFS para recorrer primeros niveles
+    visited = set()
+    queue = deque([root])
+    ordenado = []
+
+    while queue and len(visited) < max_nodos_mostrar:
+        u = queue.popleft()
+        if u in visited:
+            continue
+        visited.add(u)
+        ordenado.append(u)
+        for v, _ in mst_adj[u]:
+            if v not in visited:
+                queue.append(v)
+
+    nodos_visibles = set(ordenado)
+
+    # =======================
+    # 📈 Visualización del MST limitado por BFS
+    # =======================
+    # Aristas del MST entre nodos visibles, todas en una sola traza
+    mst_u = np.array([a[0] for a in mst], dtype=np.int64)
+    mst_v = np.array([a[1] for a in mst], dtype=np.int64)
+    visibles = np.zeros(grafo.num_ids, dtype=bool)
+    visibles[list(nodos_visibles)] = True
+    en_vista = visibles[mst_u] & visibles[mst_v]
+    edges = trazas_aristas(grafo, mst_u[en_vista], mst_v[en_vista], color="orange", width=0.7)
+
+    nodes = go.Scattergeo(
+        lon=[grafo.locations[n][1] for n in nodos_visibles],
+        lat=[grafo.locations[n][0] for n in nodos_visibles],
+        mode="markers",
+        marker=dict(size=3, color="blue", opacity=0.7),
+        name=f"Nodos Comunidad {comunidad_objetivo}",
+        hovertext=[f"ID: {nid}" for nid in nodos_visibles],
+        hoverinfo="text"
+    )
+
+    fig = go.Figure(data=[*edges, nodes])
+    fig.update_layout(
+        title=f"MST – Comunidad {comunidad_objetivo} (primeros niveles, máx. {max_nodos_mostrar} nodos)",
+        geo=dict(
+            showland=True,
+            landcolor="rgb(240,240,240)",
+            oceancolor="rgb(210, 230, 255)",
+            showocean=True,
+            showcountries=True,
+            countrycolor="black",
+            projection_type="natural earth"
+        ),
+        margin=dict(l=0, r=0, t=50, b=0)
+    )
+
+    fig.write_html(f"graficos/MST/mst_comunidad_{comunidad_objetivo}_niveles.html")
+    fig.show()
+
+    return nodos_visibles
+
+
+if __name__ == "__main__":
+    # =======================
+    # 📦 Cargar grafo con comunidades
+    # =======================
+    grafo = CSRGraph.load("data/grafo")
+    grafo.attach_communities(CORRIDA)
+    etiquetas = grafo.community_labels
+
+    if "--todas" in sys.argv:
+        # `python analisis_kruskal.py --todas`: MST de todas las comunidades
+        inicio = time.time()
+        tabla = mst_por_comunidad(grafo, etiquetas)
+        tabla.write_parquet(RUTA_TABLA)
+        print(f"✅ MST de {tabla.height:,} comunidades en {time.time() - inicio:.2f} s")
+        print(f"💾 Tabla guardada en '{RUTA_TABLA}'")
+        print(tabla.sort("nodos", descending=True).head(10))
+        sys.exit(0)
+
+    mst, peso_total, componentes = mst_comunidad(grafo, etiquetas, comunidad_objetivo)
+    nodos_visibles = dibujar_mst(grafo, mst)
+
+    # =======================
+    # 📊 Resultados finales
+    # =======================
+    print(f"✅ Comunidad analizada: {comunidad_objetivo}")
+    print(f"🌲 Aristas en el MST: {len(mst)}")
+    print(f"⚖️ Peso total del árbol: {peso_total:.2f}")
+    print(f"🔗 Componentes conectados: {componentes}")
+    print(f"📌 Nodos visualizados (niveles más cercanos): {len(nodos_visibles)}")
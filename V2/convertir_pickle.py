@@ -0,0 +1,45 @@
+import os
+import pickle
+import sys
+import time
+from graphObj import CSRGraph  # pickle importa graphObj por su cuenta para reconstruir los Graph antiguos
+from comunidades_io import guardar_comunidades
+
+# =============================
+# Conversión única: .pkl -> directorio de arreglos .npy
+# =============================
+# Se usa el pickle con comunidades si existe; si no, el grafo sin comunidades.
+PICKLES = ["data/grafo_con_comunidades.pkl", "data/grafo_guardado.pkl"]
+RUTA_GRAFO = "data/grafo"
+CORRIDA = "louvain_propio"  # Nombre con el que se guardan las comunidades del pickle
+
+
+def convertir(ruta_pkl, ruta_grafo):
+    print(f"📥 Cargando '{ruta_pkl}' con pickle (puede tardar)...")
+    inicio = time.time()
+    with open(ruta_pkl, "rb") as f:
+        grafo = pickle.load(f)
+    print(f"  → Cargado en {time.time() - inicio:.2f} s")
+
+    print("🔁 Convirtiendo a formato CSR...")
+    if not isinstance(grafo, CSRGraph):
+        grafo = CSRGraph.from_graph(grafo)
+
+    grafo.save(ruta_grafo)
+    print(f"💾 Grafo guardado en '{ruta_grafo}/' ({grafo.num_edges():,} aristas)")
+
+    if grafo.community_labels is not None:
+        guardar_comunidades(grafo.community_labels, CORRIDA)
+        print(f"💾 Comunidades guardadas como corrida '{CORRIDA}' en 'data/comunidades.parquet'")
+
+    inicio = time.time()
+    CSRGraph.load(ruta_grafo)
+    print(f"⚡ Apertura con mmap: {time.time() - inicio:.4f} s")
+
+
+if __name__ == "__main__":
+    origen = sys.argv[1] if len(sys.argv) > 1 else next((p for p in PICKLES if os.path.exists(p)), None)
+    if origen is None:
+        print(f"❌ No se encontró ningún pickle de grafo ({', '.join(PICKLES)}).")
+        sys.exit(1)
+    convertir(origen, RUTA_GRAFO)
@@ -0,0 +1,73 @@
+import matplotlib.pyplot as plt
+import numpy as np
+import polars as pl
+from matplotlib.colors import LogNorm
+
+# =============================
+# Mapas de densidad para millones de puntos
+# =============================
+# Un scatter de 10M puntos dibuja cada punto por separado (minutos y varios GB de RAM).
+# Aquí los puntos se cuentan en un solo recorrido en una grilla lat/lon de tamaño fijo y la grilla
+# se dibuja como imagen en escala logarítmica: la memoria no crece con la cantidad de
+# puntos y el costo de dibujar depende solo de la resolución.
+EXTENSION = (-180.0, 180.0, -90.0, 90.0)  # (lon_min, lon_max, lat_min, lat_max)
+CELDAS = (1440, 720)                       # (ancho, alto): celdas de 0.25°
+MAX_PUNTOS_CAPA = 50_000                   # Tope de puntos de la capa dispersa (outliers)
+
+
+def histograma_2d(datos, celdas=CELDAS, extension=EXTENSION, lat="latitude", lon="longitude"):
+    """Cantidad de puntos por celda: arreglo int64 de forma (alto, ancho), fila 0 = lat_min.
+
+    `datos` es un LazyFrame (o DataFrame) con las columnas de coordenadas. Se recorre una
+    sola vez con el motor de streaming: cada punto se convierte en su celda (bx, by) y un
+    group_by cuenta los puntos por celda, así que la memoria es la grilla más las celdas no
+    vacías. Los puntos fuera de la extensión o con nulos/NaN se descartan.
+    """
+    ancho, alto = celdas
+    lon_min, lon_max, lat_min, lat_max = extension
+    datos = datos.lazy()
+    x = ((pl.col(lon) - lon_min) / (lon_max - lon_min) * ancho).floor().clip(0, ancho - 1).cast(pl.Int64)
+    y = ((pl.col(lat) - lat_min) / (lat_max - lat_min) * alto).floor().clip(0, alto - 1).cast(pl.Int64)
+    dentro = pl.col(lon).is_between(lon_min, lon_max) & pl.col(lat).is_between(lat_min, lat_max)
+
+    por_celda = (
+        datos.filter(dentro)
+        .group_by([x.alias("bx"), y.alias("by")])
+        .len()
+        .collect(engine="streaming")
+    )
+    grilla = np.zeros((alto, ancho), dtype=np.int64)
+    grilla[por_celda["by"].to_numpy(), por_celda["bx"].to_numpy()] = por_celda["len"].to_numpy()
+    return grilla
+
+
+def dibujar_densidad(grilla, ruta, titulo, extension=EXTENSION, capa=None, etiqueta_capa="Outliers",
+                     figsize=(10, 6), dpi=300, cmap="viridis"):
+    """Guarda la grilla como imagen log-escalada; `capa` = (lon, lat) se dibuja encima como puntos."""
+    fig, ax = plt.subplots(figsize=figsize)
+    maximo = max(int(grilla.max()), 1)
+    imagen = ax.imshow(
+        np.ma.masked_equal(grilla, 0),  # Las celdas vacías quedan transparentes
+        origin="lower",
+        extent=extension,
+        norm=LogNorm(vmin=1, vmax=maximo),
+        cmap=cmap,
+        aspect="auto",
+        interpolation="nearest",
+    )
+    fig.colorbar(imagen, ax=ax, label="Usuarios por celda (escala log)")
+
+    if capa is not None:
+        capa_lon, capa_lat = (np.asarray(c) for c in capa)
+        if len(capa_lon) > MAX_PUNTOS_CAPA:
+            # Muestra fija para que el tiempo de dibujo no dependa de la cantidad de outliers
+            elegidos = np.random.default_rng(0).choice(len(capa_lon), MAX_PUNTOS_CAPA, replace=False)
+            capa_lon, capa_lat = capa_lon[elegidos], capa_lat[elegidos]
+        ax.scatter(capa_lon, capa_lat, s=4, c="red", linewidths=0, label=f"{etiqueta_capa} ({len(capa[0]):,})")
+        ax.legend(loc="lower left")
+
+    ax.set_title(titulo)
+    ax.set_xlabel("Longitud")
+    ax.set_ylabel("Latitud")
+    fig.savefig(ruta, dpi=dpi)
+    plt.close(fig)